@@ -1,25 +1,17 @@
-import os
-import json
-import uuid
-import requests
-from flask import Flask, request, jsonify, send_file, render_template
+from flask import Flask
 from flask_cors import CORS
 from dotenv import load_dotenv
-import spacy
-from gtts import gTTS
-from moviepy.editor import VideoFileClip, AudioFileClip, concatenate_videoclips
-import tempfile
-import shutil
-from pathlib import Path
 from config import Config
-from routes.api_routes import api_bp
-from routes.web_routes import web_bp
 
 # Load environment variables
 load_dotenv()
 
 def create_app():
     """Application factory pattern"""
+    # Imported here so that re-importing this module stays cheap (see below)
+    from routes.api_routes import api_bp
+    from routes.web_routes import web_bp
+    
     app = Flask(__name__)
     
     # Configure CORS
@@ -34,8 +26,10 @@ def create_app():
     
     return app
 
-# Create the Flask application
-app = create_app()
+# Create the Flask application. Segment render workers re-import this file as __mp_main__
+# and must not build their own copy of the app (spaCy, video catalog, generators).
+if __name__ != '__mp_main__':
+    app = create_app()
 
 if __name__ == '__main__':
     app.run(
@@ -0,0 +1 @@
+# Benchmarks package for video generator
\ No newline at end of file
@@ -0,0 +1,160 @@
+"""Peak memory and open readers of MoviePy assembly as scripts get longer.
+
+Renders scripts of increasing scene counts at preview quality with the
+MoviePy backend, once opening every scene up front (the old behaviour) and
+once with streaming assembly. Each render runs in a fresh process; a sampler
+sums the resident memory of that process and its ffmpeg reader children and
+counts the readers alive at once. Linux only (reads /proc). Run from the
+project root:
+    python -m benchmarks.bench_assembly_memory
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from moviepy.config import get_setting
+
+SCENE_SECONDS = 0.5
+SOURCE_COUNT = 4
+SCENE_COUNTS = [10, 50, 200]
+EAGER_MAX_SCENES = 50  # the eager path opens one ffmpeg reader per scene; past this it only gets worse
+SAMPLE_INTERVAL = 0.05
+
+
+def make_sources(directory):
+    """A few short test-pattern clips, reused round robin as scene footage"""
+    ffmpeg = get_setting("FFMPEG_BINARY")
+    paths = []
+    for i in range(SOURCE_COUNT):
+        path = directory / f"source_{i}.mp4"
+        subprocess.run(
+            [ffmpeg, '-y', '-f', 'lavfi', '-i', f"testsrc2=size=1280x720:rate=30:duration=2",
+             '-c:v', 'libx264', '-pix_fmt', 'yuv420p', str(path)],
+            check=True, capture_output=True
+        )
+        paths.append(path)
+    return paths
+
+
+def make_voiceover(directory, scenes):
+    path = directory / f"voiceover_{scenes}.mp3"
+    subprocess.run(
+        [get_setting("FFMPEG_BINARY"), '-y', '-f', 'lavfi', '-i',
+         f"sine=frequency=220:duration={scenes * SCENE_SECONDS}", str(path)],
+        check=True, capture_output=True
+    )
+    return path
+
+
+def descendants(pid):
+    """pids of every process below pid"""
+    children = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # The command name may contain spaces; fields after it are fixed
+                parent = int(f.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(parent, []).append(int(entry))
+    found, stack = [], [pid]
+    while stack:
+        for child in children.get(stack.pop(), []):
+            found.append(child)
+            stack.append(child)
+    return found
+
+
+def rss_bytes(pid):
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return 0
+
+
+class Sampler(threading.Thread):
+    """Tracks peak RSS of this process plus its children, and the most child processes alive at once"""
+
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.peak_rss = 0
+        self.peak_children = 0
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.is_set():
+            children = descendants(os.getpid())
+            total = rss_bytes(os.getpid()) + sum(rss_bytes(pid) for pid in children)
+            self.peak_rss = max(self.peak_rss, total)
+            self.peak_children = max(self.peak_children, len(children))
+            time.sleep(SAMPLE_INTERVAL)
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+def render(mode, scenes, root):
+    """Child process: one render, reports 'seconds peak_rss peak_children ok'"""
+    from config import Config
+    root = Path(root)
+    Config.TEMP_DIR = root / 'temp'
+    Config.USE_PROXY_CACHE = False
+    Config.PARALLEL_SEGMENT_RENDER = False
+    Config.STREAMING_ASSEMBLY = mode == 'streaming'
+    from services.video_processor import VideoProcessor
+
+    sources = sorted(root.glob('source_*.mp4'))
+    clips = [sources[i % len(sources)] for i in range(scenes)]
+    processor = VideoProcessor('preview')
+    sampler = Sampler()
+    sampler.start()
+    start = time.perf_counter()
+    ok = processor.merge_clips_with_voiceover(
+        clips, root / f"voiceover_{scenes}.mp3", root / f"{mode}_{scenes}.mp4",
+        scene_texts=[f"scene number {i}" for i in range(scenes)], render_backend='moviepy'
+    )
+    seconds = time.perf_counter() - start
+    sampler.stop()
+    print(f"RESULT {seconds:.2f} {sampler.peak_rss} {sampler.peak_children} {ok}")
+
+
+def run():
+    with tempfile.TemporaryDirectory() as root:
+        root = Path(root)
+        (root / 'temp').mkdir()
+        make_sources(root)
+        print(f"{'scenes':>6} {'mode':>10} {'seconds':>8} {'peak MiB':>9} {'processes':>9} {'ok':>5}")
+        for scenes in SCENE_COUNTS:
+            make_voiceover(root, scenes)
+            for mode in ('eager', 'streaming'):
+                if mode == 'eager' and scenes > EAGER_MAX_SCENES:
+                    continue
+                result = subprocess.run(
+                    [sys.executable, '-m', 'benchmarks.bench_assembly_memory', 'render', mode, str(scenes), str(root)],
+                    capture_output=True, text=True
+                )
+                line = next((l for l in result.stdout.splitlines() if l.startswith('RESULT ')), None)
+                if line is None:
+                    print(f"{scenes:>6} {mode:>10} failed:\n{result.stderr[-2000:]}")
+                    continue
+                seconds, peak_rss, peak_children, ok = line.split()[1:]
+                # Processes are the clip readers plus the encoder and its audio reader
+                print(f"{scenes:>6} {mode:>10} {float(seconds):>8.2f} {int(peak_rss) / 1024 ** 2:>9.1f} "
+                      f"{peak_children:>9} {ok:>5}")
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == 'render':
+        render(sys.argv[2], int(sys.argv[3]), sys.argv[4])
+    else:
+        run()
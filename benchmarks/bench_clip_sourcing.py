@@ -0,0 +1,69 @@
+"""Bytes written and time spent sourcing library clips for a render.
+
+Compares the old full copy into TEMP_DIR with linking (download_video) and
+opening in place (get_local_path). Run from the project root:
+    python -m benchmarks.bench_clip_sourcing
+"""
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from utils.file_utils import link_or_copy
+
+CLIP_SIZES_MB = [25, 100, 250]
+SCENES = 5
+
+
+def disk_used(path):
+    """Bytes in use on the filesystem holding path"""
+    stats = os.statvfs(path)
+    return (stats.f_blocks - stats.f_bfree) * stats.f_frsize
+
+
+def measure(strategy, sources, temp_dir):
+    """Source every clip with a strategy; returns (seconds, bytes written, method)"""
+    before = disk_used(temp_dir)
+    method = strategy
+    start = time.perf_counter()
+    for i, source in enumerate(sources):
+        target = temp_dir / f"clip_{i}.mp4"
+        if strategy == 'copy':
+            shutil.copy2(source, target)
+        elif strategy == 'link':
+            method = link_or_copy(source, target)
+        # 'in place' opens the library file directly, nothing to write
+    os.sync()
+    elapsed = time.perf_counter() - start
+    written = max(disk_used(temp_dir) - before, 0)
+    for target in temp_dir.glob('clip_*.mp4'):
+        target.unlink()
+    return elapsed, written, method
+
+
+def run():
+    with tempfile.TemporaryDirectory() as root:
+        library = Path(root) / 'videos'
+        temp_dir = Path(root) / 'temp'
+        library.mkdir()
+        temp_dir.mkdir()
+
+        print(f"{'clip MB':>8} {'strategy':>10} {'method':>9} {'seconds':>9} {'MB written':>11}")
+        for size_mb in CLIP_SIZES_MB:
+            sources = []
+            for i in range(SCENES):
+                source = library / f"clip_{size_mb}_{i}.mp4"
+                with open(source, 'wb') as f:
+                    f.write(os.urandom(size_mb * 1024 * 1024))
+                sources.append(source)
+
+            for strategy in ['copy', 'link', 'in place']:
+                elapsed, written, method = measure(strategy, sources, temp_dir)
+                print(f"{size_mb:>8} {strategy:>10} {method:>9} {elapsed:>9.3f} {written / 1024 ** 2:>11.1f}")
+
+            for source in sources:
+                source.unlink()
+
+
+if __name__ == '__main__':
+    run()
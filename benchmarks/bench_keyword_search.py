@@ -0,0 +1,93 @@
+"""Per-query latency of LocalVideoService.search_stock_videos as the library grows.
+
+Run from the project root:
+    python -m benchmarks.bench_keyword_search
+"""
+import random
+import time
+from services.local_video_service import LocalVideoService
+
+LIBRARY_SIZES = [1000, 10000, 100000]
+QUERIES = 200
+SUBJECTS = ['cat', 'kitten', 'puppy', 'dog', 'car', 'city', 'night', 'mountain', 'sunset', 'snow']
+# Fixed vocabulary with Zipfian word frequencies, as in real filenames: a few words are in many of them
+VOCABULARY = [f"topic{n:05d}" for n in range(5000)]
+ZIPF_WEIGHTS = [1 / rank for rank in range(1, len(VOCABULARY) + 1)]
+
+
+def zipf_words(rng, count):
+    """Draw words from the fixed vocabulary, weighted 1/rank"""
+    return rng.choices(VOCABULARY, weights=ZIPF_WEIGHTS, k=count)
+
+
+class SyntheticCatalog:
+    """In-memory stand-in for VideoCatalog holding generated filenames"""
+
+    def __init__(self, size, seed=0):
+        rng = random.Random(seed)
+        self.videos = []
+        for i in range(size):
+            words = zipf_words(rng, 2) + [rng.choice(SUBJECTS) if rng.random() < 0.001 else 'clip']
+            filename = f"{'_'.join(words)}_{i}.mp4"
+            self.videos.append({'path': f"/library/{filename}", 'filename': filename, 'size': 0, 'source': 'local'})
+
+    def refresh(self):
+        return {'added': len(self.videos), 'updated': 0, 'removed': 0, 'unchanged': 0}
+
+    def list_videos(self):
+        return list(self.videos)
+
+    def random_videos(self, count):
+        return random.sample(self.videos, min(count, len(self.videos)))
+
+    def count(self):
+        return len(self.videos)
+
+
+def full_scan(service, keywords):
+    """Reference scorer over every video, as search did before the index"""
+    scored = []
+    for video_id, filename in enumerate(service.keyword_index.filenames):
+        score, _ = service._score_filename(filename, keywords)
+        if score > 0:
+            scored.append((score, video_id))
+    scored.sort(key=lambda item: item[0], reverse=True)
+    return [video_id for _, video_id in scored]
+
+
+def indexed(service, keywords):
+    """Indexed candidate scoring, as search does now"""
+    scored = []
+    for video_id in sorted(service._candidate_ids(keywords)):
+        score, _ = service._score_filename(service.keyword_index.filenames[video_id], keywords)
+        if score > 0:
+            scored.append((score, video_id))
+    scored.sort(key=lambda item: item[0], reverse=True)
+    return [video_id for _, video_id in scored]
+
+
+def run():
+    print(f"{'videos':>8} {'indexed ms/query':>18} {'full scan ms/query':>20}")
+    for size in LIBRARY_SIZES:
+        catalog = SyntheticCatalog(size)
+        service = LocalVideoService(catalog=catalog)
+        rng = random.Random(1)
+        # Queries follow the same distribution, so common words (long posting lists) are searched most
+        queries = [zipf_words(rng, 1) + [rng.choice(SUBJECTS)] for _ in range(QUERIES)]
+
+        start = time.perf_counter()
+        indexed_results = [indexed(service, keywords) for keywords in queries]
+        indexed_ms = (time.perf_counter() - start) * 1000 / QUERIES
+
+        scan_queries = queries[:20]
+        start = time.perf_counter()
+        scan_results = [full_scan(service, keywords) for keywords in scan_queries]
+        scan_ms = (time.perf_counter() - start) * 1000 / len(scan_queries)
+
+        # The index must not change which videos are chosen or their order
+        assert indexed_results[:len(scan_queries)] == scan_results, "indexed results differ from full scan"
+        print(f"{size:>8} {indexed_ms:>18.3f} {scan_ms:>20.3f}")
+
+
+if __name__ == '__main__':
+    run()
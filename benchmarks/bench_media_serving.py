@@ -0,0 +1,145 @@
+"""Worker occupancy per viewer for the media download path.
+
+Serves a synthetic video with send_media from a threaded WSGI server and
+runs concurrent viewers against it: full downloads, seeking players (Range
+requests), revalidating players (If-None-Match -> 304) and the same seeking
+players with X-Accel-Redirect offload. Occupancy is the time a server thread
+spends inside the app until the response body is closed. Run from the
+project root:
+    python -m benchmarks.bench_media_serving
+"""
+import http.client
+import os
+import statistics
+import tempfile
+import threading
+import time
+from pathlib import Path
+from flask import Flask
+from werkzeug.serving import WSGIRequestHandler, make_server
+from config import Config
+from utils.media_response import send_media
+
+VIDEO_BYTES = 64 * 1024 ** 2
+VIEWERS = [1, 8, 32]
+SEEKS_PER_VIEWER = 6
+RANGE_BYTES = 2 * 1024 ** 2
+
+
+class OccupancyMeter:
+    """WSGI middleware adding up the seconds each request holds a server thread"""
+
+    def __init__(self, app):
+        self.app = app
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.busy_seconds = 0.0
+            self.body_bytes = 0
+            self.requests = 0
+
+    def __call__(self, environ, start_response):
+        start = time.perf_counter()
+        body = self.app(environ, start_response)
+        sent = 0
+        try:
+            for chunk in body:
+                sent += len(chunk)
+                yield chunk
+        finally:
+            if hasattr(body, 'close'):
+                body.close()
+            with self.lock:
+                self.busy_seconds += time.perf_counter() - start
+                self.body_bytes += sent
+                self.requests += 1
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+def make_app(video_path):
+    app = Flask(__name__)
+
+    @app.route('/video')
+    def video():
+        return send_media(video_path, mimetype='video/mp4')
+
+    return app
+
+
+def request(port, headers):
+    """One GET; returns (status, etag, seconds), reading the whole body"""
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+    start = time.perf_counter()
+    try:
+        connection.request('GET', '/video', headers=headers)
+        response = connection.getresponse()
+        response.read()
+        return response.status, response.getheader('ETag'), time.perf_counter() - start
+    finally:
+        connection.close()
+
+
+def viewer(port, pattern, latencies, etag):
+    if pattern == 'full':
+        latencies.append(request(port, {})[2])
+        return
+    if pattern == 'revalidate':
+        for _ in range(SEEKS_PER_VIEWER):
+            status, _, seconds = request(port, {'If-None-Match': etag})
+            assert status == 304, status
+            latencies.append(seconds)
+        return
+    step = (VIDEO_BYTES - RANGE_BYTES) // SEEKS_PER_VIEWER
+    for i in range(SEEKS_PER_VIEWER):
+        start = i * step
+        status, _, seconds = request(port, {'Range': f"bytes={start}-{start + RANGE_BYTES - 1}"})
+        # With offload the app only answers with headers and the proxy serves the range
+        assert status == (206 if Config.MEDIA_OFFLOAD == 'none' else 200), status
+        latencies.append(seconds)
+
+
+def run():
+    with tempfile.TemporaryDirectory() as root:
+        Config.OUTPUTS_DIR = Path(root)
+        video_path = Config.OUTPUTS_DIR / 'project' / 'final_video.mp4'
+        video_path.parent.mkdir()
+        with open(video_path, 'wb') as f:
+            f.write(os.urandom(VIDEO_BYTES))
+
+        meter = OccupancyMeter(make_app(video_path))
+        server = make_server('127.0.0.1', 0, meter, threaded=True, request_handler=QuietHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        port = server.server_port
+        _, etag, _ = request(port, {'Range': 'bytes=0-0'})
+
+        print(f"{'pattern':>10} {'offload':>8} {'viewers':>7} {'requests':>8} {'p50 ms':>8} "
+              f"{'busy s/viewer':>13} {'MiB/viewer via Python':>22}")
+        cases = [('full', 'none'), ('seek', 'none'), ('revalidate', 'none'), ('seek', 'x-accel')]
+        try:
+            for pattern, offload in cases:
+                Config.MEDIA_OFFLOAD = offload
+                for count in VIEWERS:
+                    meter.reset()
+                    latencies = []
+                    threads = [
+                        threading.Thread(target=viewer, args=(port, pattern, latencies, etag)) for _ in range(count)
+                    ]
+                    for thread in threads:
+                        thread.start()
+                    for thread in threads:
+                        thread.join()
+                    print(f"{pattern:>10} {offload:>8} {count:>7} {meter.requests:>8} "
+                          f"{statistics.median(latencies) * 1000:>8.2f} {meter.busy_seconds / count:>13.4f} "
+                          f"{meter.body_bytes / count / 1024 ** 2:>22.2f}")
+        finally:
+            server.shutdown()
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,93 @@
+"""Sentences per second for NLPAnalyzer keyword extraction.
+
+Compares the old two-parse approach (full pipeline, every sentence parsed
+again) with the single-pass analyze_script and the batched analyze_scripts,
+each on a fresh analyzer with caching off so spaCy is what gets timed. The
+analysis cache is then measured on its own: a warm in-process LRU, and the
+disk tier as seen after a restart (in a temporary database). Run from the
+project root:
+    python -m benchmarks.bench_nlp_analysis
+"""
+import tempfile
+import time
+from pathlib import Path
+import spacy
+from config import Config
+from utils.memo_cache import MemoCache
+from utils.nlp_analyzer import NLPAnalyzer
+
+SENTENCES = [
+    "A young musician sits in a studio playing guitar.",
+    "The city lights shine through the window.",
+    "People walk on busy streets below.",
+    "Birds fly over green hills in the distance.",
+    "A storm approaches the mountains.",
+    "The sun sets behind the skyline.",
+    "A cute kitten plays with a ball of yarn.",
+    "Cars drive through the snowy streets at night.",
+]
+SCRIPTS = 50
+SENTENCES_PER_SCRIPT = 8
+
+
+def legacy_analyze(nlp, script):
+    """The previous analyze_script: parse the script, then parse each sentence again"""
+    doc = nlp(script)
+    analysis = []
+    for sentence in [sent.text.strip() for sent in doc.sents if sent.text.strip()]:
+        sent_doc = nlp(sentence)
+        keywords = [t.lemma_.lower() for t in sent_doc if t.pos_ in ['NOUN', 'VERB', 'ADJ'] and not t.is_stop]
+        noun_phrases = [chunk.text.lower() for chunk in sent_doc.noun_chunks]
+        analysis.append({'sentence': sentence, 'keywords': list(set(keywords + noun_phrases))})
+    return analysis
+
+
+def uncached_analyzer():
+    """Fresh analyzer that neither reads nor writes analyses (LRU of size 0, no disk tier)"""
+    Config.NLP_DISK_CACHE = False
+    analyzer = NLPAnalyzer()
+    analyzer.cache = MemoCache(0)
+    return analyzer
+
+
+def timed(label, func, sentence_count):
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:>28} {sentence_count / elapsed:>12.1f} sentences/s")
+
+
+def run():
+    scripts = [
+        " ".join(SENTENCES[(i + j) % len(SENTENCES)] for j in range(SENTENCES_PER_SCRIPT))
+        for i in range(SCRIPTS)
+    ]
+    sentence_count = SCRIPTS * SENTENCES_PER_SCRIPT
+
+    full_nlp = spacy.load(Config.SPACY_MODEL)
+
+    print("uncached")
+    timed("legacy (two parses, NER on)", lambda: [legacy_analyze(full_nlp, s) for s in scripts], sentence_count)
+    analyzer = uncached_analyzer()
+    timed("single pass", lambda: [analyzer.analyze_script(s) for s in scripts], sentence_count)
+    analyzer = uncached_analyzer()
+    timed("batched nlp.pipe", lambda: analyzer.analyze_scripts(scripts), sentence_count)
+    analyzer = uncached_analyzer()
+    timed("batched nlp.pipe, 2 procs", lambda: analyzer.analyze_scripts(scripts, n_process=2), sentence_count)
+
+    print("cached (same scripts again)")
+    with tempfile.TemporaryDirectory() as root:
+        Config.NLP_DISK_CACHE = True
+        Config.NLP_CACHE_PATH = Path(root) / 'nlp_cache.sqlite3'
+        analyzer = NLPAnalyzer()
+        analyzer.analyze_scripts(scripts)
+        timed("in-process LRU", lambda: analyzer.analyze_scripts(scripts), sentence_count)
+        # A new analyzer starts with an empty LRU but the same database, as after a restart
+        restarted = NLPAnalyzer()
+        timed("disk tier after restart", lambda: restarted.analyze_scripts(scripts), sentence_count)
+        stats = restarted.cache_stats()
+        print(f"{'after restart':>28} {stats['disk_hits']} disk hits, {stats['misses']} misses")
+
+
+if __name__ == '__main__':
+    run()
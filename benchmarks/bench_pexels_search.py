@@ -0,0 +1,148 @@
+"""Search throughput under bursty job load against a rate-limited fake Pexels API.
+
+The fake server allows WINDOW_LIMIT requests per WINDOW seconds and answers
+the rest with 429 plus Retry-After / X-Ratelimit-* headers, like the real
+API. Concurrent jobs search overlapping queries (differing only in case and
+spacing) with the query cache, token bucket and header-aware retries switched
+on step by step. Every case still pauses when the API reports its quota spent.
+Fallbacks are searches that ended in mock results. Run from the project root:
+    python -m benchmarks.bench_pexels_search
+"""
+import json
+import random
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+from config import Config
+from services.stock_video_service import StockVideoService
+from utils.download_cache import DownloadCache
+from utils.memo_cache import MemoCache
+from utils.rate_limiter import TokenBucket
+
+WINDOW = 1.0  # seconds
+WINDOW_LIMIT = 10  # requests per window
+JOBS = 12
+SEARCHES_PER_JOB = 8
+DISTINCT_QUERIES = 24
+CASES = [
+    # (label, ttl, requests per second, retries)
+    ('no cache, no bucket, no retry', 0, 0, 0),
+    ('retry honoring headers', 0, 0, 4),
+    ('token bucket + retry', 0, WINDOW_LIMIT / WINDOW, 4),
+    ('query cache + bucket + retry', 3600, WINDOW_LIMIT / WINDOW, 4)
+]
+
+
+class FakePexels(BaseHTTPRequestHandler):
+    """Fixed-window rate-limited /videos/search"""
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True  # Headers and body go out in separate writes
+    lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    @classmethod
+    def reset(cls):
+        cls.window_start = time.time()
+        cls.used = 0
+        cls.requests = 0
+        cls.throttled = 0
+
+    def do_GET(self):
+        with self.lock:
+            now = time.time()
+            if now - FakePexels.window_start >= WINDOW:
+                FakePexels.window_start = now
+                FakePexels.used = 0
+            FakePexels.requests += 1
+            allowed = FakePexels.used < WINDOW_LIMIT
+            if allowed:
+                FakePexels.used += 1
+            else:
+                FakePexels.throttled += 1
+            remaining = WINDOW_LIMIT - FakePexels.used
+            reset = FakePexels.window_start + WINDOW
+
+        if allowed:
+            query = parse_qs(urlparse(self.path).query).get('query', [''])[0]
+            body = json.dumps({'videos': [{
+                'duration': 8, 'image': None,
+                'video_files': [{'link': f"http://clips.invalid/{query}.mp4", 'width': 1280, 'height': 720}]
+            }]}).encode()
+            self.send_response(200)
+        else:
+            body = b'{"error": "Rate limit exceeded"}'
+            self.send_response(429)
+            self.send_header('Retry-After', f"{max(reset - time.time(), 0):.3f}")
+        self.send_header('X-Ratelimit-Limit', str(WINDOW_LIMIT))
+        self.send_header('X-Ratelimit-Remaining', str(remaining))
+        self.send_header('X-Ratelimit-Reset', f"{reset:.3f}")
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def job_queries(rng):
+    """A job's scene searches: overlapping topics, written with varying case and spacing"""
+    queries = []
+    for _ in range(SEARCHES_PER_JOB):
+        words = f"topic{rng.randrange(DISTINCT_QUERIES)} city night".split()
+        words = [word.upper() if rng.random() < 0.3 else word for word in words]
+        queries.append([f" {word}" if rng.random() < 0.2 else word for word in words])
+    return queries
+
+
+def run():
+    FakePexels.reset()
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakePexels)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    Config.PEXELS_SEARCH_URL = f"http://127.0.0.1:{server.server_port}/videos/search"
+    Config.PEXELS_API_KEY = 'benchmark-key'
+    rng = random.Random(0)
+    workload = [job_queries(rng) for _ in range(JOBS)]
+
+    download_dir = tempfile.TemporaryDirectory()
+
+    print(f"{'case':<32} {'seconds':>8} {'searches/s':>10} {'API calls':>9} {'429s':>5} {'fallbacks':>9}")
+    try:
+        for label, ttl, rate, retries in CASES:
+            Config.PEXELS_SEARCH_TTL = ttl
+            Config.PEXELS_RETRIES = retries
+            service = StockVideoService(
+                cache=DownloadCache(Path(download_dir.name)),
+                search_cache=MemoCache(Config.PEXELS_SEARCH_CACHE_SIZE),
+                rate_limiter=TokenBucket(rate, WINDOW_LIMIT)
+            )
+            # Start from a fresh window so each case sees the same quota
+            time.sleep(WINDOW)
+            FakePexels.reset()
+            fallbacks = []
+
+            def job(queries):
+                for keywords in queries:
+                    videos = service.search_stock_videos(keywords)
+                    if videos and videos[0]['source'] == 'mock':
+                        fallbacks.append(keywords)
+
+            threads = [threading.Thread(target=job, args=(queries,)) for queries in workload]
+            start = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            seconds = time.perf_counter() - start
+            print(f"{label:<32} {seconds:>8.2f} {JOBS * SEARCHES_PER_JOB / seconds:>10.1f} "
+                  f"{FakePexels.requests:>9} {FakePexels.throttled:>5} {len(fallbacks):>9}")
+    finally:
+        server.shutdown()
+        download_dir.cleanup()
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,310 @@
+"""End-to-end stage benchmarks on a synthetic library and script corpus.
+
+Generates a VIDEOS_DIR of ffmpeg test-pattern clips (varied length,
+resolution, container and naming style) and scripts of 1 to 500 sentences
+built from the library's vocabulary, then times each pipeline stage:
+
+    catalog  LocalVideoService start-up (cold catalog scan and probe)
+    nlp      NLPAnalyzer.analyze_script
+    search   LocalVideoService.search_stock_videos for every sentence
+    tts      TTSGenerator.generate_voiceover_with_timing on the stub backend
+    render   VideoProcessor.create_video (preview quality unless --quality final)
+
+Every (stage, script size) runs in a fresh process, so peak RSS (process plus
+ffmpeg children, sampled from /proc) belongs to that stage alone; the stages
+before it run first, unmeasured. Caches start cold in each process. Each
+measurement is repeated (--repeat) and the median run kept. Results are
+written as JSON to benchmarks/results/ (git-ignored) unless --output says
+otherwise. With --baseline, latency, throughput and peak RSS are
+compared against an earlier results file and the run exits non-zero if any
+got worse by more than --tolerance. Baselines are machine specific, so record
+one per machine with --save-baseline. Linux only. Run from the project root:
+    python -m benchmarks.bench_pipeline
+    python -m benchmarks.bench_pipeline --save-baseline benchmarks/pipeline_baseline.json
+    python -m benchmarks.bench_pipeline --baseline benchmarks/pipeline_baseline.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from moviepy.config import get_setting
+from benchmarks.bench_assembly_memory import Sampler
+
+SCRIPT_SIZES = [1, 10, 50, 100, 250, 500]
+RENDER_MAX_SENTENCES = 50  # render time grows with narration length; larger scripts only run the cheap stages
+LIBRARY_CLIPS = 40
+STAGES = ['catalog', 'nlp', 'search', 'tts', 'render']
+# (metric, True if larger is worse)
+COMPARED_METRICS = [('latency_s', True), ('throughput', False), ('peak_rss_mb', True)]
+NOISE_FLOOR_S = 0.05  # latencies below this are timer noise and never flagged
+RESULTS_DIR = Path(__file__).parent / 'results'
+
+SUBJECTS = ['city', 'traffic', 'kitten', 'puppy', 'mountain', 'ocean', 'forest', 'sunset',
+            'snow', 'guitar', 'coffee', 'bridge', 'harbour', 'desert', 'rain', 'market']
+SETTINGS = ['night', 'morning', 'aerial', 'closeup', 'slowmotion', 'timelapse', 'street', 'studio']
+# (seconds, size): short loops, clips longer than a scene, portrait and odd aspect ratios
+CLIP_SHAPES = [(0.6, '640x360'), (2.0, '1280x720'), (4.0, '1920x1080'), (8.0, '960x540'),
+               (12.0, '1280x720'), (3.0, '720x1280'), (5.0, '1024x768')]
+NAMING_STYLES = [
+    lambda a, b, n: f"{a}_{b}_{n:02d}.mp4",
+    lambda a, b, n: f"{a.title()}-{b.title()}-{n}.mov",
+    lambda a, b, n: f"{a} {b} stock footage {n}.mkv",
+    lambda a, b, n: f"{a.upper()}{b.title()}{n}.mp4",
+    lambda a, b, n: f"clip{n:04d}.avi"  # no keywords at all; only reachable through the random fallback
+]
+TEMPLATES = [
+    "A {adjective} {subject} appears in the {setting} light.",
+    "The camera follows the {subject} through the {setting}.",
+    "We see a {subject} near the {other}.",
+    "Slowly the {subject} fades into {setting} scenery.",
+    "Nobody expected the {subject} to meet a {other} that {setting}."
+]
+ADJECTIVES = ['quiet', 'busy', 'bright', 'lonely', 'colorful', 'misty']
+
+
+def make_library(videos_dir, clips, seed=0):
+    """Synthetic VIDEOS_DIR; returns the filenames"""
+    rng = random.Random(seed)
+    ffmpeg = get_setting("FFMPEG_BINARY")
+    videos_dir.mkdir(parents=True, exist_ok=True)
+    names = []
+    for n in range(clips):
+        seconds, size = CLIP_SHAPES[n % len(CLIP_SHAPES)]
+        name = NAMING_STYLES[n % len(NAMING_STYLES)](rng.choice(SUBJECTS), rng.choice(SETTINGS), n)
+        subprocess.run(
+            [ffmpeg, '-y', '-f', 'lavfi', '-i', f"testsrc2=size={size}:rate=30:duration={seconds}",
+             '-c:v', 'libx264', '-preset', 'ultrafast', '-pix_fmt', 'yuv420p', str(videos_dir / name)],
+            check=True, capture_output=True
+        )
+        names.append(name)
+    return names
+
+
+def make_corpus(sizes, seed=0):
+    """One script per size, each sentence drawn from the library's vocabulary"""
+    rng = random.Random(seed)
+    corpus = {}
+    for size in sizes:
+        sentences = [
+            rng.choice(TEMPLATES).format(
+                adjective=rng.choice(ADJECTIVES), subject=rng.choice(SUBJECTS),
+                other=rng.choice(SUBJECTS), setting=rng.choice(SETTINGS)
+            )
+            for _ in range(size)
+        ]
+        corpus[str(size)] = " ".join(sentences)
+    return corpus
+
+
+def configure(workdir, label):
+    """Point every path and cache at the work directory; caches are per measurement, so cold"""
+    from config import Config
+    Config.VIDEOS_DIR = workdir / 'videos'
+    Config.VIDEO_CATALOG_PATH = workdir / 'catalog.sqlite3'
+    Config.CACHE_DIR = workdir / 'cache' / label
+    Config.TEMP_DIR = workdir / 'temp' / label
+    Config.OUTPUTS_DIR = workdir / 'outputs' / label
+    Config.PROXY_CACHE_DIR = Config.CACHE_DIR / 'proxies'
+    Config.TTS_CACHE_DIR = Config.CACHE_DIR / 'tts'
+    Config.NLP_CACHE_PATH = Config.CACHE_DIR / 'nlp_cache.sqlite3'
+    Config.TTS_BACKEND = 'stub'
+    for directory in (Config.CACHE_DIR, Config.TEMP_DIR, Config.OUTPUTS_DIR):
+        directory.mkdir(parents=True, exist_ok=True)
+    return Config
+
+
+def run_stage(stage, state, script, quality):
+    """Run one pipeline stage, storing what later stages need in state"""
+    from config import Config
+    from services.local_video_service import LocalVideoService
+    from services.video_processor import VideoProcessor
+    from utils.nlp_analyzer import NLPAnalyzer
+    from utils.tts_backends import create_tts_backend
+    from utils.tts_generator import TTSGenerator
+
+    if stage == 'catalog':
+        state['service'] = LocalVideoService()
+    elif stage == 'nlp':
+        state['analysis'] = NLPAnalyzer().analyze_script(script)
+    elif stage == 'search':
+        state['searches'] = [state['service'].search_stock_videos(item['keywords']) for item in state['analysis']]
+    elif stage == 'tts':
+        state['voiceover'] = Config.OUTPUTS_DIR / 'voiceover.mp3'
+        state['tts'] = TTSGenerator(backend=create_tts_backend('stub')).generate_voiceover_with_timing(
+            script, state['voiceover']
+        )
+    elif stage == 'render':
+        state['video'] = Config.OUTPUTS_DIR / 'video.mp4'
+        state['rendered'] = VideoProcessor(quality).create_video(
+            state['analysis'], state['voiceover'], state['video'], state['service'],
+            sentence_timings=state['tts'].get('timings')
+        )
+
+
+def measure(stage, size, workdir, quality, run_index):
+    """Child process: run the stages before `stage` unmeasured, then measure it"""
+    workdir = Path(workdir)
+    Config = configure(workdir, f"{stage}_{size}_{run_index}")
+    script = json.loads((workdir / 'corpus.json').read_text())[str(size)]
+    if stage == 'catalog':
+        # Cold start: no catalog database yet
+        Config.VIDEO_CATALOG_PATH = Config.CACHE_DIR / 'catalog.sqlite3'
+
+    state = {}
+    for earlier in STAGES[:STAGES.index(stage)]:
+        run_stage(earlier, state, script, quality)
+    sampler = Sampler()
+    sampler.start()
+    start = time.perf_counter()
+    run_stage(stage, state, script, quality)
+    latency = time.perf_counter() - start
+    sampler.stop()
+
+    if stage == 'catalog':
+        items, unit, ok = len(state['service'].list_videos()), 'clips', True
+    elif stage == 'nlp':
+        items, unit, ok = len(state['analysis']), 'sentences', bool(state['analysis'])
+    elif stage == 'search':
+        items, unit, ok = len(state['searches']), 'queries', all(state['searches'])
+    elif stage == 'tts':
+        items, unit, ok = len(state['analysis']), 'sentences', state['tts']['success']
+    else:
+        items, unit, ok = len(state['analysis']), 'scenes', state['rendered']
+    result = {
+        'stage': stage, 'sentences': size, 'items': items, 'unit': unit, 'ok': bool(ok),
+        'latency_s': round(latency, 4), 'throughput': round(items / latency, 2) if latency else None,
+        'peak_rss_mb': round(sampler.peak_rss / 1024 ** 2, 1)
+    }
+    if stage == 'render' and ok:
+        from services.media_probe import MediaProbe
+        metadata = MediaProbe().probe(str(state['video'])) or {}
+        if metadata.get('duration'):
+            # Seconds of video produced per second of rendering
+            result['realtime_factor'] = round(metadata['duration'] / latency, 2)
+    print("RESULT " + json.dumps(result))
+
+
+def compare(results, baseline, tolerance):
+    """Regressions of results against baseline: (key, metric, old, new, change)"""
+    regressions = []
+    for key, entry in results['results'].items():
+        old_entry = baseline.get('results', {}).get(key)
+        if not old_entry or not old_entry['ok'] or not entry['ok']:
+            # A failed run's timings say nothing about speed; failures are reported on their own
+            continue
+        for metric, larger_is_worse in COMPARED_METRICS:
+            old, new = old_entry.get(metric), entry.get(metric)
+            if not old or new is None:
+                continue
+            if metric == 'latency_s' and max(old, new) < NOISE_FLOOR_S:
+                continue
+            if metric == 'throughput' and old_entry['latency_s'] < NOISE_FLOOR_S:
+                continue
+            change = (new - old) / old
+            if (change if larger_is_worse else -change) > tolerance:
+                regressions.append((key, metric, old, new, change))
+    return regressions
+
+
+def run(args):
+    sizes = sorted(set(args.sizes))
+    stages = [stage for stage in STAGES if stage in args.stages]
+    with tempfile.TemporaryDirectory() as workdir:
+        workdir = Path(workdir)
+        start = time.perf_counter()
+        make_library(workdir / 'videos', args.library)
+        (workdir / 'corpus.json').write_text(json.dumps(make_corpus(sizes)))
+        print(f"library: {args.library} clips in {time.perf_counter() - start:.1f} s; scripts: {sizes} sentences")
+
+        results = {
+            'meta': {
+                'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                'python': platform.python_version(), 'platform': platform.platform(),
+                'cpus': os.cpu_count(), 'library_clips': args.library, 'quality': args.quality
+            },
+            'results': {}
+        }
+        print(f"{'stage':<8} {'sentences':>9} {'latency s':>10} {'throughput':>20} {'peak MiB':>9} {'ok':>5}")
+        for stage in stages:
+            # The catalog scan doesn't depend on the script, so it runs once
+            stage_sizes = sizes[:1] if stage == 'catalog' else sizes
+            if stage == 'render':
+                stage_sizes = [size for size in sizes if size <= args.render_max]
+            for size in stage_sizes:
+                runs = []
+                for run_index in range(args.repeat):
+                    process = subprocess.run(
+                        [sys.executable, '-m', 'benchmarks.bench_pipeline', 'measure', stage, str(size),
+                         str(workdir), args.quality, str(run_index)],
+                        capture_output=True, text=True
+                    )
+                    line = next((l for l in process.stdout.splitlines() if l.startswith('RESULT ')), None)
+                    if line is None:
+                        print(f"{stage:<8} {size:>9} failed:\n{process.stderr[-2000:]}")
+                        break
+                    runs.append(json.loads(line[len('RESULT '):]))
+                if len(runs) < args.repeat:
+                    continue
+                # The median run by latency, so one noisy run neither hides nor fakes a regression
+                entry = sorted(runs, key=lambda run: run['latency_s'])[len(runs) // 2]
+                entry['ok'] = all(run['ok'] for run in runs)
+                entry['runs'] = len(runs)
+                key = stage if stage == 'catalog' else f"{stage}/{size}"
+                results['results'][key] = entry
+                throughput = f"{entry['throughput'] or 0:.1f} {entry['unit']}/s"
+                print(f"{stage:<8} {size if stage != 'catalog' else '-':>9} {entry['latency_s']:>10.3f} "
+                      f"{throughput:>20} {entry['peak_rss_mb']:>9.1f} "
+                      f"{str(entry['ok']):>5}")
+
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2))
+    print(f"results written to {args.output}")
+    if args.save_baseline:
+        Path(args.save_baseline).write_text(json.dumps(results, indent=2))
+        print(f"baseline saved to {args.save_baseline}")
+
+    failed = [key for key, entry in results['results'].items() if not entry['ok']]
+    if failed:
+        print(f"stages that reported failure: {failed}")
+    if not args.baseline:
+        return 1 if failed else 0
+    baseline = json.loads(Path(args.baseline).read_text())
+    regressions = compare(results, baseline, args.tolerance)
+    if not regressions:
+        print(f"no regressions beyond {args.tolerance:.0%} against {args.baseline}")
+        return 1 if failed else 0
+    print(f"{len(regressions)} regression(s) beyond {args.tolerance:.0%} against {args.baseline}:")
+    for key, metric, old, new, change in regressions:
+        print(f"  {key:<12} {metric:<12} {old:>10} -> {new:<10} ({change:+.0%})")
+    return 1
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=SCRIPT_SIZES, help="script lengths in sentences")
+    parser.add_argument('--stages', nargs='+', default=STAGES, choices=STAGES)
+    parser.add_argument('--library', type=int, default=LIBRARY_CLIPS, help="synthetic clips in VIDEOS_DIR")
+    parser.add_argument('--render-max', type=int, default=RENDER_MAX_SENTENCES,
+                        help="largest script (sentences) that is also rendered")
+    parser.add_argument('--quality', default='preview', choices=['preview', 'final'])
+    parser.add_argument('--repeat', type=int, default=3, help="runs per measurement; the median is kept")
+    parser.add_argument('--output', default=str(RESULTS_DIR / 'pipeline_results.json'))
+    parser.add_argument('--baseline', help="earlier results file to compare against")
+    parser.add_argument('--save-baseline', help="also write this run's results here")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="allowed relative slowdown, e.g. 0.2 = 20%%")
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == 'measure':
+        measure(sys.argv[2], int(sys.argv[3]), sys.argv[4], sys.argv[5], sys.argv[6])
+    else:
+        sys.exit(run(parse_args()))
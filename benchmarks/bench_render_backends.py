@@ -0,0 +1,176 @@
+"""Render time and output parity of the MoviePy and ffmpeg filtergraph backends.
+
+Builds synthetic library clips (shorter and longer than their scenes, one
+sub-second, 4:3 and portrait as well as 16:9) and a tone voiceover, renders
+the same timeline with both backends through create_video and through
+merge_clips_with_voiceover (the /api/generate-video path), and checks that
+durations agree, both outputs carry the same streams and sampled frames stay
+close. Exits non-zero if any case falls
+outside those bounds. Run from the project root:
+    python -m benchmarks.bench_render_backends
+"""
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+import numpy as np
+from moviepy.config import get_setting
+from moviepy.editor import VideoFileClip
+from config import Config
+
+# (seconds, size) of each synthetic source clip; both backends must fill the frame the same way whatever the aspect
+SOURCES = [(8.0, '640x360'), (2.0, '1920x1080'), (0.6, '1280x720'), (6.0, '960x720'), (3.0, '720x1280')]
+SCENE_TEXTS = ['A city at dawn', 'Traffic on the bridge', 'A quick glance', 'Night falls over the harbour',
+               'A street performer looks up']
+VOICEOVER_SECONDS = 14.0
+ENTRY_POINTS = ['create_video', 'merge']
+CASES = [('none', 'none'), ('burn', 'fade'), ('soft', 'crossfade')]
+DURATION_TOLERANCE = 0.1  # seconds; a couple of frames either way
+MAX_MEAN_DIFF = 10.0  # mean absolute pixel difference; encoder and scaler noise stays well below this
+
+
+class LibraryStub:
+    """Video service whose search returns the local clip named in the keywords"""
+
+    def search_stock_videos(self, keywords):
+        return [{'source': 'local', 'path': keywords[0]}]
+
+    def get_local_path(self, video_info):
+        return video_info['path']
+
+    def download_video(self, video_info, output_path):
+        return False
+
+
+def make_sources(directory):
+    """Test-pattern clips and a sine-tone voiceover"""
+    ffmpeg = get_setting("FFMPEG_BINARY")
+    paths = []
+    for i, (seconds, size) in enumerate(SOURCES):
+        path = directory / f"source_{i}.mp4"
+        subprocess.run(
+            [ffmpeg, '-y', '-f', 'lavfi', '-i', f"testsrc2=size={size}:rate=30:duration={seconds}",
+             '-c:v', 'libx264', '-pix_fmt', 'yuv420p', str(path)],
+            check=True, capture_output=True
+        )
+        paths.append(path)
+    voiceover = directory / "voiceover.mp3"
+    subprocess.run(
+        [ffmpeg, '-y', '-f', 'lavfi', '-i', f"sine=frequency=220:duration={VOICEOVER_SECONDS}", str(voiceover)],
+        check=True, capture_output=True
+    )
+    return paths, voiceover
+
+
+def streams(path):
+    """Stream kinds in a file, read from ffmpeg's banner"""
+    result = subprocess.run([get_setting("FFMPEG_BINARY"), '-i', str(path)], capture_output=True)
+    banner = result.stderr.decode(errors='replace')
+    return [kind for kind in ('Video', 'Audio', 'Subtitle') if f": {kind}:" in banner]
+
+
+def sample_times():
+    """A quarter of the way into each planned scene and three quarters in, clear of the transitions.
+
+    Within a fade the backends may be a frame apart; what is compared is how each one fills the frame.
+    """
+    from services.clip_planner import ClipPlanner
+    times, start = [], 0.0
+    for duration in ClipPlanner().scene_durations(SCENE_TEXTS, VOICEOVER_SECONDS):
+        times += [start + duration / 4, start + duration * 3 / 4]
+        start += duration
+    return times
+
+
+def frame_difference(first, second):
+    """Mean absolute pixel difference (0-255) over the sampled timestamps"""
+    a = VideoFileClip(str(first), audio=False)
+    b = VideoFileClip(str(second), audio=False)
+    try:
+        times = [t for t in sample_times() if t < min(a.duration, b.duration)]
+        diffs = [np.abs(a.get_frame(t).astype(np.int16) - b.get_frame(t).astype(np.int16)).mean() for t in times]
+        return float(np.mean(diffs)), a.duration, b.duration
+    finally:
+        a.close()
+        b.close()
+
+
+def render(entry_point, backend, caption_mode, transition_style, sources, voiceover, output):
+    """One render through create_video or merge_clips_with_voiceover; returns seconds taken"""
+    from services.video_processor import VideoProcessor
+    processor = VideoProcessor()
+    processor.transitions.style = transition_style
+    start = time.perf_counter()
+    if entry_point == 'create_video':
+        script_analysis = [
+            {'sentence': text, 'keywords': [str(path)]} for text, path in zip(SCENE_TEXTS, sources)
+        ]
+        ok = processor.create_video(
+            script_analysis, voiceover, output, LibraryStub(), caption_mode=caption_mode, render_backend=backend
+        )
+    else:
+        ok = processor.merge_clips_with_voiceover(
+            sources, voiceover, output, scene_texts=SCENE_TEXTS, caption_mode=caption_mode, render_backend=backend
+        )
+    if not ok:
+        raise RuntimeError(f"{backend} render through {entry_point} failed")
+    return time.perf_counter() - start
+
+
+def check(caption_mode, moviepy_duration, ffmpeg_duration, diff, layouts):
+    """Reasons the two renders of one case don't match (empty when they do)"""
+    failures = []
+    if abs(moviepy_duration - ffmpeg_duration) > DURATION_TOLERANCE:
+        failures.append(f"durations differ by {abs(moviepy_duration - ffmpeg_duration):.2f}s")
+    expected = ['Video', 'Audio'] + (['Subtitle'] if caption_mode == 'soft' else [])
+    for backend, layout in layouts.items():
+        if layout != expected:
+            failures.append(f"{backend} streams {layout}, expected {expected}")
+    if diff > MAX_MEAN_DIFF:
+        failures.append(f"mean frame difference {diff:.2f} above {MAX_MEAN_DIFF}")
+    return failures
+
+
+def run():
+    """Render every case with both backends through each entry point; returns the failed checks"""
+    failures = []
+    with tempfile.TemporaryDirectory() as root:
+        root = Path(root)
+        Config.TEMP_DIR = root / 'temp'
+        Config.TEMP_DIR.mkdir()
+        Config.USE_PROXY_CACHE = False
+        Config.PARALLEL_SEGMENT_RENDER = False
+
+        sources, voiceover = make_sources(root)
+        print(f"{'entry':>12} {'captions':>8} {'transition':>10} {'moviepy s':>10} {'ffmpeg s':>9} "
+              f"{'durations':>13} {'mean diff':>10} {'streams match':>14} {'ok':>5}")
+        for entry_point in ENTRY_POINTS:
+            for caption_mode, transition_style in CASES:
+                outputs = {}
+                seconds = {}
+                for backend in Config.RENDER_BACKENDS:
+                    output = root / f"{entry_point}_{backend}_{caption_mode}_{transition_style}.mp4"
+                    seconds[backend] = render(
+                        entry_point, backend, caption_mode, transition_style, sources, voiceover, output
+                    )
+                    outputs[backend] = output
+
+                diff, moviepy_duration, ffmpeg_duration = frame_difference(outputs['moviepy'], outputs['ffmpeg'])
+                layouts = {backend: streams(output) for backend, output in outputs.items()}
+                same_streams = layouts['moviepy'] == layouts['ffmpeg']
+                case_failures = check(caption_mode, moviepy_duration, ffmpeg_duration, diff, layouts)
+                print(f"{entry_point:>12} {caption_mode:>8} {transition_style:>10} {seconds['moviepy']:>10.2f} "
+                      f"{seconds['ffmpeg']:>9.2f} {moviepy_duration:>6.2f}/{ffmpeg_duration:<6.2f} {diff:>10.2f} "
+                      f"{str(same_streams):>14} {str(not case_failures):>5}")
+                failures += [
+                    f"{entry_point} {caption_mode}/{transition_style}: {failure}" for failure in case_failures
+                ]
+    return failures
+
+
+if __name__ == '__main__':
+    failures = run()
+    for failure in failures:
+        print(f"FAIL {failure}")
+    sys.exit(1 if failures else 0)
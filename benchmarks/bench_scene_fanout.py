@@ -0,0 +1,67 @@
+"""Pre-merge latency of generate_multi_scene_video with concurrent scene search and TTS.
+
+Search, TTS and merge are replaced by stand-ins with fixed latencies, so the
+numbers show only how the stages are scheduled. Run from the project root:
+    python -m benchmarks.bench_scene_fanout
+"""
+import tempfile
+import time
+from pathlib import Path
+from config import Config
+from core.video_generator import VideoGenerator
+from utils.memo_cache import MemoCache
+
+SCENES = 8
+SEARCH_SECONDS = 0.25  # e.g. a stock API round trip
+TTS_SECONDS = 1.5
+WORKER_COUNTS = [1, 4, 8]
+
+
+class SlowSearch:
+    def search_stock_videos(self, keywords, max_results=None):
+        time.sleep(SEARCH_SECONDS)
+        return [{'path': f"/library/{keywords[0]}.mp4", 'source': 'local'}]
+
+
+class SlowTTS:
+    backend_name = 'stub'
+    language = 'en'
+    slow = False
+
+    def generate_voiceover_with_timing(self, script, output_path):
+        time.sleep(TTS_SECONDS)
+        return {'success': True, 'timings': None}
+
+
+class MergeStub:
+    def merge_clips_with_voiceover(self, *args, **kwargs):
+        self.merge_started = time.perf_counter()
+        return True
+
+
+def run():
+    with tempfile.TemporaryDirectory() as root:
+        Config.OUTPUTS_DIR = Path(root)
+        scenes = [f"scene {i}" for i in range(SCENES)]
+        scene_keywords = [[f"topic{i}"] for i in range(SCENES)]
+
+        print(f"stages back to back: {SCENES * SEARCH_SECONDS + TTS_SECONDS:.2f} s "
+              f"({SCENES} searches x {SEARCH_SECONDS} s + TTS {TTS_SECONDS} s)")
+        print(f"{'search workers':>14} {'seconds to merge':>16}")
+        for workers in WORKER_COUNTS:
+            Config.SCENE_SEARCH_WORKERS = workers
+            generator = VideoGenerator.__new__(VideoGenerator)
+            generator.local_video_service = SlowSearch()
+            generator.tts_generator = SlowTTS()
+            generator.render_plans = MemoCache(16)
+            generator.video_processor = generator.preview_processor = MergeStub()
+
+            start = time.perf_counter()
+            result = generator.generate_multi_scene_video(scenes, scene_keywords, f"project_{workers}")
+            if not result['success']:
+                raise RuntimeError(result['error'])
+            print(f"{workers:>14} {generator.video_processor.merge_started - start:>16.2f}")
+
+
+if __name__ == '__main__':
+    run()
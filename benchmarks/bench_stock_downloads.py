@@ -0,0 +1,149 @@
+"""Stock clip download throughput, resume and cache reuse against a local HTTP stand-in.
+
+Starts a threaded HTTP server that serves synthetic clips with Range support,
+a fixed per-request latency and (optionally) connections dropped partway
+through. Compares the old one-request-per-clip download loop with
+StockVideoService's pooled, concurrent, cached downloads, and counts the
+bytes resent after interruptions. Run from the project root:
+    python -m benchmarks.bench_stock_downloads
+"""
+import os
+import re
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+import requests
+from config import Config
+from services.stock_video_service import StockVideoService
+from utils.download_cache import DownloadCache
+
+CLIP_BYTES = 4 * 1024 ** 2
+CLIPS = 8
+LATENCY = 0.05  # seconds before each response starts
+DROP_AFTER = CLIP_BYTES // 3  # bytes sent before a flaky response is cut off
+
+
+class StandIn(BaseHTTPRequestHandler):
+    """Serves /clip_<n>.mp4 from memory; flaky mode cuts the first response of each clip short"""
+
+    protocol_version = 'HTTP/1.1'
+    clips = {}
+    flaky = False
+    dropped = set()
+    bytes_sent = 0
+    connections = set()
+    lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        body = self.clips.get(self.path)
+        if body is None:
+            self.send_error(404)
+            return
+        with self.lock:
+            StandIn.connections.add(self.client_address)
+        time.sleep(LATENCY)
+
+        start, end = 0, len(body) - 1
+        match = re.match(r'bytes=(\d+)-', self.headers.get('Range', ''))
+        if match:
+            start = int(match.group(1))
+            if start >= len(body):
+                self.send_response(416)
+                self.send_header('Content-Range', f"bytes */{len(body)}")
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header('Content-Range', f"bytes {start}-{end}/{len(body)}")
+        else:
+            self.send_response(200)
+        self.send_header('Content-Type', 'video/mp4')
+        self.send_header('Content-Length', str(end - start + 1))
+        self.send_header('Accept-Ranges', 'bytes')
+        self.end_headers()
+
+        payload = body[start:]
+        with self.lock:
+            drop = self.flaky and self.path not in StandIn.dropped
+            if drop:
+                StandIn.dropped.add(self.path)
+        if drop:
+            payload = payload[:DROP_AFTER]
+        self.wfile.write(payload)
+        with self.lock:
+            StandIn.bytes_sent += len(payload)
+        if drop:
+            self.close_connection = True
+
+
+def reset_counters(flaky=False):
+    StandIn.flaky = flaky
+    StandIn.dropped = set()
+    StandIn.bytes_sent = 0
+    StandIn.connections = set()
+
+
+def sequential_download(url, output_path):
+    """The download loop this service used before: one unpooled request per clip, 8 KB chunks"""
+    response = requests.get(url, stream=True)
+    response.raise_for_status()
+    with open(output_path, 'wb') as f:
+        for chunk in response.iter_content(chunk_size=8192):
+            f.write(chunk)
+
+
+def run():
+    with tempfile.TemporaryDirectory() as root:
+        root = Path(root)
+        Config.DOWNLOAD_RETRIES = 3
+        StandIn.clips = {f"/clip_{i}.mp4": os.urandom(CLIP_BYTES) for i in range(CLIPS)}
+        server = ThreadingHTTPServer(('127.0.0.1', 0), StandIn)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        urls = [f"http://127.0.0.1:{server.server_port}{path}" for path in StandIn.clips]
+        total_mib = CLIPS * CLIP_BYTES / 1024 ** 2
+
+        def report(label, seconds, ok=True):
+            print(f"{label:<34} {seconds:>8.3f} {total_mib / seconds:>8.1f} {StandIn.bytes_sent / 1024 ** 2:>10.1f} "
+                  f"{len(StandIn.connections):>11} {str(ok):>5}")
+
+        print(f"{'case':<34} {'seconds':>8} {'MiB/s':>8} {'MiB sent':>10} {'connections':>11} {'ok':>5}")
+        try:
+            reset_counters()
+            start = time.perf_counter()
+            for i, url in enumerate(urls):
+                sequential_download(url, root / f"sequential_{i}.mp4")
+            report('sequential, no session', time.perf_counter() - start)
+
+            for workers in (1, 4, 8):
+                Config.DOWNLOAD_WORKERS = workers
+                service = StockVideoService(cache=DownloadCache(root / f"cache_{workers}"))
+                reset_counters()
+                start = time.perf_counter()
+                results = service.download_videos([(url, root / f"pooled_{workers}_{i}.mp4") for i, url in enumerate(urls)])
+                report(f"pooled, {workers} workers", time.perf_counter() - start, all(results))
+
+            reset_counters()
+            start = time.perf_counter()
+            results = service.download_videos([(url, root / f"again_{i}.mp4") for i, url in enumerate(urls)])
+            report('cached (second job, same clips)', time.perf_counter() - start, all(results))
+
+            service = StockVideoService(cache=DownloadCache(root / 'cache_flaky'))
+            reset_counters(flaky=True)
+            start = time.perf_counter()
+            results = service.download_videos([(url, root / f"flaky_{i}.mp4") for i, url in enumerate(urls)])
+            intact = all(
+                (root / f"flaky_{i}.mp4").read_bytes() == StandIn.clips[path] for i, path in enumerate(StandIn.clips)
+            )
+            report('every first transfer cut at 1/3', time.perf_counter() - start, all(results) and intact)
+            print(f"(a restart-from-zero retry would send {total_mib * (1 + DROP_AFTER / CLIP_BYTES):.1f} MiB)")
+        finally:
+            server.shutdown()
+
+
+if __name__ == '__main__':
+    run()
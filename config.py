@@ -23,6 +23,14 @@ class Config:
     OUTPUTS_DIR = BASE_DIR / 'outputs'
     TEMP_DIR = BASE_DIR / 'temp'
     VIDEOS_DIR = BASE_DIR / 'videos'
+    CACHE_DIR = BASE_DIR / 'cache'
+    VIDEO_CATALOG_PATH = CACHE_DIR / 'video_catalog.sqlite3'
+    PROXY_CACHE_DIR = CACHE_DIR / 'proxies'
+    NLP_CACHE_PATH = CACHE_DIR / 'nlp_cache.sqlite3'
+    TTS_CACHE_DIR = CACHE_DIR / 'tts'
+    RENDER_PLAN_CACHE_PATH = CACHE_DIR / 'render_plans.sqlite3'
+    STOCK_CACHE_DIR = CACHE_DIR / 'stock'
+    PEXELS_SEARCH_CACHE_PATH = CACHE_DIR / 'pexels_search.sqlite3'
     
     # Video Settings
     VIDEO_WIDTH = 1280
@@ -30,18 +38,94 @@ class Config:
     VIDEO_FPS = 24
     VIDEO_CODEC = 'libx264'
     AUDIO_CODEC = 'aac'
+    TRANSITION_STYLE = os.getenv('TRANSITION_STYLE', 'fade')  # 'fade' through black, 'crossfade' (overlapping) or 'none'
+    TRANSITION_DURATION = float(os.getenv('TRANSITION_DURATION', 0.3))  # seconds
+    
+    # Render quality tiers; preview trades resolution, frame rate and compression for turnaround
+    # (preset None keeps each encode path's own default, render_backend None falls back to RENDER_BACKEND)
+    RENDER_QUALITIES = {
+        'final': {
+            'width': VIDEO_WIDTH, 'height': VIDEO_HEIGHT, 'fps': VIDEO_FPS,
+            'preset': None, 'render_backend': None, 'filename': 'final_video.mp4'
+        },
+        'preview': {
+            'width': int(os.getenv('PREVIEW_WIDTH', 640)), 'height': int(os.getenv('PREVIEW_HEIGHT', 360)),
+            'fps': int(os.getenv('PREVIEW_FPS', 12)), 'preset': 'ultrafast',
+            'render_backend': os.getenv('PREVIEW_RENDER_BACKEND', 'ffmpeg'), 'filename': 'preview.mp4'
+        }
+    }
+    RENDER_PLAN_CACHE_SIZE = int(os.getenv('RENDER_PLAN_CACHE_SIZE', 256))  # Clip selections kept for re-renders
+    
+    # Caption Settings
+    CAPTION_MODE = os.getenv('CAPTION_MODE', 'burn')  # 'burn' into the main encode, 'soft' subtitle track, or 'none'
+    CAPTION_FONT_SIZE = 40
+    CAPTION_COLOR = 'white'
+    CAPTION_FONT = os.getenv('CAPTION_FONT', 'DejaVuSans-Bold.ttf')  # TrueType name or path; PIL's default font if missing
+    TEXT_CACHE_SIZE = int(os.getenv('TEXT_CACHE_SIZE', 256))  # Rendered caption/placeholder images kept in memory
     
     # API Settings
     PEXELS_MAX_RESULTS = 3
+    PEXELS_SEARCH_URL = os.getenv('PEXELS_SEARCH_URL', 'https://api.pexels.com/videos/search')
+    PEXELS_SEARCH_TTL = int(os.getenv('PEXELS_SEARCH_TTL', 24 * 3600))  # seconds a query's results are reused; 0 disables
+    PEXELS_SEARCH_CACHE_SIZE = int(os.getenv('PEXELS_SEARCH_CACHE_SIZE', 2048))  # Queries kept in memory
+    PEXELS_REQUESTS_PER_SECOND = float(os.getenv('PEXELS_REQUESTS_PER_SECOND', 1.0))  # Client-side throttle; 0 disables
+    PEXELS_BURST = int(os.getenv('PEXELS_BURST', 10))  # Requests allowed back to back before throttling
+    PEXELS_RETRIES = int(os.getenv('PEXELS_RETRIES', 3))  # Retries after 429 or 5xx responses
+    PEXELS_MAX_RETRY_WAIT = float(os.getenv('PEXELS_MAX_RETRY_WAIT', 60))  # Longer server-requested waits fall back instead
+    HTTP_POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', 16))  # Kept-alive connections per host in the shared session
+    HTTP_TIMEOUT = float(os.getenv('HTTP_TIMEOUT', 30))  # seconds to connect or between received bytes
+    DOWNLOAD_WORKERS = int(os.getenv('DOWNLOAD_WORKERS', 4))  # Concurrent stock clip downloads per job
+    DOWNLOAD_RETRIES = int(os.getenv('DOWNLOAD_RETRIES', 3))  # Resumed attempts after a failed transfer
+    DOWNLOAD_CHUNK_BYTES = 1024 * 1024
+    STOCK_CACHE_MAX_BYTES = int(os.getenv('STOCK_CACHE_MAX_BYTES', 10 * 1024 ** 3))  # LRU eviction above this size
+    STALE_PART_SECONDS = int(os.getenv('STALE_PART_SECONDS', 24 * 3600))  # Untouched partial files older than this are evicted
     LOCAL_MAX_RESULTS = 3  # Number of local videos to use
+    PROBE_WORKERS = int(os.getenv('PROBE_WORKERS', 4))  # Concurrent media probes during catalog refresh
+    SCENE_SEARCH_WORKERS = int(os.getenv('SCENE_SEARCH_WORKERS', 4))  # Scene clip searches run alongside TTS
     MAX_CLIP_DURATION = 5  # seconds
+    MIN_SCENE_DURATION = 0.5  # seconds; floor for planned scene lengths
     
     # NLP Settings
     SPACY_MODEL = "en_core_web_sm"
     MAX_KEYWORDS_PER_SENTENCE = 5
+    SPACY_DISABLED_COMPONENTS = ['ner']  # Pipeline components keyword extraction doesn't use
+    SPACY_BATCH_SIZE = int(os.getenv('SPACY_BATCH_SIZE', 64))  # Texts per nlp.pipe batch
+    SPACY_N_PROCESS = int(os.getenv('SPACY_N_PROCESS', 1))  # Processes for nlp.pipe batch analysis
+    NLP_CACHE_SIZE = int(os.getenv('NLP_CACHE_SIZE', 4096))  # Analyses kept in the in-process LRU
+    NLP_DISK_CACHE = os.getenv('NLP_DISK_CACHE', 'True').lower() == 'true'  # Persist analyses across restarts
+    
+    # TTS Settings
+    TTS_BACKEND = os.getenv('TTS_BACKEND', 'gtts')  # 'gtts' (remote), 'local' (espeak-ng) or 'stub' (deterministic tone)
+    TTS_CHARS_PER_SECOND = 15  # Speaking rate used to size stub and silent audio
+    TTS_MAX_CHUNK_LENGTH = 500  # Characters per synthesis request (Google TTS has limits)
+    TTS_MAX_WORKERS = int(os.getenv('TTS_MAX_WORKERS', 4))  # Chunks synthesized concurrently
+    USE_TTS_CACHE = os.getenv('USE_TTS_CACHE', 'True').lower() == 'true'  # Reuse audio for identical text
+    TTS_CACHE_MAX_BYTES = int(os.getenv('TTS_CACHE_MAX_BYTES', 2 * 1024 ** 3))  # LRU eviction above this size
+    
+    # Proxy Cache Settings
+    USE_PROXY_CACHE = os.getenv('USE_PROXY_CACHE', 'True').lower() == 'true'  # Render from pre-normalized library clips
+    PROXY_CACHE_MAX_BYTES = int(os.getenv('PROXY_CACHE_MAX_BYTES', 20 * 1024 ** 3))  # LRU eviction above this size
+    PROXY_INGEST_WORKERS = int(os.getenv('PROXY_INGEST_WORKERS', 2))  # Concurrent proxy transcodes during ingest
+    
+    # Render Queue Settings
+    RENDER_WORKERS = int(os.getenv('RENDER_WORKERS', 2))  # Concurrent render jobs
+    RENDER_JOB_HISTORY = int(os.getenv('RENDER_JOB_HISTORY', 500))  # Finished jobs kept for status lookups
+    PARALLEL_SEGMENT_RENDER = os.getenv('PARALLEL_SEGMENT_RENDER', 'False').lower() == 'true'  # Render scenes as separate segments
+    RENDER_PROCESSES = int(os.getenv('RENDER_PROCESSES', os.cpu_count() or 2))  # Segment render processes, shared by all concurrent jobs
+    STREAMING_ASSEMBLY = os.getenv('STREAMING_ASSEMBLY', 'True').lower() == 'true'  # MoviePy path opens scenes as it reaches them
+    MAX_OPEN_READERS = int(os.getenv('MAX_OPEN_READERS', 2))  # Scene clip readers open at once while assembling
+    RENDER_BACKEND = os.getenv('RENDER_BACKEND', 'moviepy')  # 'moviepy' or 'ffmpeg' (whole timeline in one filtergraph)
+    RENDER_BACKENDS = ('moviepy', 'ffmpeg')
+    STREAM_OUTPUT = os.getenv('STREAM_OUTPUT', 'False').lower() == 'true'  # Publish scenes as HLS while rendering
+    STREAM_DIRNAME = 'stream'  # Per-project directory holding the playlist and segments
+    
+    # Media Serving Settings
+    MEDIA_OFFLOAD = os.getenv('MEDIA_OFFLOAD', 'none')  # 'none', 'x-accel' (nginx) or 'x-sendfile' (Apache/lighttpd)
+    MEDIA_ACCEL_PREFIX = os.getenv('MEDIA_ACCEL_PREFIX', '/protected-outputs/')  # Internal nginx location for OUTPUTS_DIR
+    MEDIA_CACHE_MAX_AGE = int(os.getenv('MEDIA_CACHE_MAX_AGE', 0))  # 0 = clients revalidate with ETag every time
     
     @classmethod
     def create_directories(cls):
         """Create necessary directories if they don't exist"""
-        for directory in [cls.UPLOADS_DIR, cls.OUTPUTS_DIR, cls.TEMP_DIR, cls.VIDEOS_DIR]:
+        for directory in [cls.UPLOADS_DIR, cls.OUTPUTS_DIR, cls.TEMP_DIR, cls.VIDEOS_DIR, cls.CACHE_DIR]:
             directory.mkdir(parents=True, exist_ok=True)
\ No newline at end of file
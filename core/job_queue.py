@@ -0,0 +1,112 @@
+import queue
+import threading
+import time
+from config import Config
+
+class RenderJobQueue:
+    """FIFO queue of render jobs drained by a bounded pool of worker threads"""
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+
+    def __init__(self, num_workers=None, max_history=None):
+        self.num_workers = num_workers or Config.RENDER_WORKERS
+        self.max_history = max_history or Config.RENDER_JOB_HISTORY
+        self._queue = queue.Queue()
+        self._jobs = {}
+        self._pending = []  # Job ids waiting for a worker, in submission order
+        self._finished = []  # Job ids that are done or failed, oldest first
+        self._lock = threading.Lock()
+        self._workers = []
+
+    def start(self):
+        """Start the worker threads (idempotent)"""
+        with self._lock:
+            if self._workers:
+                return
+            for i in range(self.num_workers):
+                worker = threading.Thread(
+                    target=self._worker_loop,
+                    name=f"render-worker-{i}",
+                    daemon=True
+                )
+                worker.start()
+                self._workers.append(worker)
+
+    def submit(self, job_id, func, *args, **kwargs):
+        """Enqueue a render job and return its id immediately"""
+        self.start()
+        with self._lock:
+            self._jobs[job_id] = {
+                'job_id': job_id,
+                'status': self.QUEUED,
+                'submitted_at': time.time(),
+                'started_at': None,
+                'finished_at': None,
+                'result': None,
+                'error': None
+            }
+            self._pending.append(job_id)
+        self._queue.put((job_id, func, args, kwargs))
+        return job_id
+
+    def get_status(self, job_id):
+        """Get a snapshot of a job's state, or None if the job is unknown"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            status = dict(job)
+            if job['status'] == self.QUEUED and job_id in self._pending:
+                status['queue_position'] = self._pending.index(job_id) + 1
+            else:
+                status['queue_position'] = 0
+            return status
+
+    def get_stats(self):
+        """Get queue depth and worker counts"""
+        with self._lock:
+            running = sum(1 for job in self._jobs.values() if job['status'] == self.RUNNING)
+            return {
+                'workers': self.num_workers,
+                'queued': len(self._pending),
+                'running': running
+            }
+
+    def _worker_loop(self):
+        """Take jobs off the queue and run them until the process exits"""
+        while True:
+            job_id, func, args, kwargs = self._queue.get()
+            with self._lock:
+                if job_id in self._pending:
+                    self._pending.remove(job_id)
+                job = self._jobs[job_id]
+                job['status'] = self.RUNNING
+                job['started_at'] = time.time()
+
+            try:
+                result = func(*args, **kwargs)
+                if isinstance(result, dict) and result.get('success') is False:
+                    status, error = self.FAILED, result.get('error', 'Render failed')
+                else:
+                    status, error = self.DONE, None
+            except Exception as e:
+                print(f"Error in render job {job_id}: {e}")
+                result, status, error = None, self.FAILED, str(e)
+
+            with self._lock:
+                job['status'] = status
+                job['result'] = result
+                job['error'] = error
+                job['finished_at'] = time.time()
+                self._finished.append(job_id)
+                self._prune_history()
+            self._queue.task_done()
+
+    def _prune_history(self):
+        """Forget the oldest finished jobs beyond the history limit (lock held)"""
+        while len(self._finished) > self.max_history:
+            old_id = self._finished.pop(0)
+            self._jobs.pop(old_id, None)
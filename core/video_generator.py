@@ -1,5 +1,11 @@
+import hashlib
+import json
+import os
+import shutil
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from utils.memo_cache import MemoCache
 from utils.nlp_analyzer import NLPAnalyzer
 from utils.tts_generator import TTSGenerator
 from services.local_video_service import LocalVideoService
@@ -14,9 +20,14 @@ class VideoGenerator:
         self.tts_generator = TTSGenerator()
         self.local_video_service = LocalVideoService()
         self.video_processor = VideoProcessor()
+        self.preview_processor = VideoProcessor(quality='preview')
+        # Clip choices and voiceover timing per script, shared between preview and final renders
+        self.render_plans = MemoCache(
+            Config.RENDER_PLAN_CACHE_SIZE, db_path=Config.RENDER_PLAN_CACHE_PATH, table='render_plans'
+        )
     
-    def generate_video(self, script, project_id=None):
-        """Generate a complete video from script"""
+    def generate_video(self, script, project_id=None, render_backend=None, quality='final', stream=False):
+        """Generate a complete video from script (stream also publishes it as HLS while rendering)"""
         try:
             # Generate project ID if not provided
             if not project_id:
@@ -33,19 +44,19 @@ class VideoGenerator:
             # Step 2: Generate voiceover
             print("Generating voiceover...")
             voiceover_path = project_dir / "voiceover.mp3"
-            voiceover_result = self.tts_generator.generate_voiceover(script, voiceover_path)
-            
-            if not voiceover_result:
-                raise Exception("Failed to generate voiceover")
+            sentence_timings = self._generate_timed_voiceover(script, voiceover_path)
             
             # Step 3: Create video
             print("Creating video...")
-            output_path = project_dir / "final_video.mp4"
-            video_result = self.video_processor.create_video(
+            output_path = project_dir / Config.RENDER_QUALITIES[quality]['filename']
+            video_result = self._processor_for(quality).create_video(
                 script_analysis, 
                 voiceover_path, 
                 output_path,
-                self.local_video_service
+                self.local_video_service,
+                sentence_timings=sentence_timings,
+                render_backend=render_backend,
+                stream_dir=self._prepare_stream_dir(project_dir) if stream else None
             )
             
             if not video_result:
@@ -111,17 +122,44 @@ class VideoGenerator:
                 'error': str(e)
             }
 
+    def ingest_library(self):
+        """Refresh the library catalog and transcode every clip to its normalized proxy"""
+        try:
+            self.local_video_service.refresh_catalog()
+            proxy_cache = self.video_processor.proxy_cache
+            if not proxy_cache:
+                return {'success': False, 'error': 'Proxy cache is disabled'}
+            
+            videos = self.local_video_service.list_videos()
+            proxies = proxy_cache.ingest(video['path'] for video in videos)
+            failed = [path for path, proxy in proxies.items() if proxy is None]
+            return {
+                'success': not failed,
+                'ingested': len(proxies) - len(failed),
+                'failed': failed,
+                'error': f"{len(failed)} clips failed to transcode" if failed else None
+            }
+        except Exception as e:
+            return {
+                'success': False,
+                'error': str(e)
+            }
+
     def get_project_info(self, project_id):
         """Get information about a project"""
         try:
             project_dir = Config.OUTPUTS_DIR / project_id
             video_path = Config.OUTPUTS_DIR / project_id / "final_video.mp4"
+            preview_path = project_dir / Config.RENDER_QUALITIES['preview']['filename']
+            playlist_path = project_dir / Config.STREAM_DIRNAME / 'index.m3u8'
             voiceover_path = project_dir / "voiceover.mp3"
             
             info = {
                 'project_id': project_id,
                 'project_dir': str(project_dir),
                 'video_exists': video_path.exists(),
+                'preview_exists': preview_path.exists(),
+                'stream_exists': playlist_path.exists(),
                 'voiceover_exists': voiceover_path.exists()
             }
             
@@ -129,6 +167,10 @@ class VideoGenerator:
                 info['video_size'] = video_path.stat().st_size
                 info['video_path'] = str(video_path)
             
+            if preview_path.exists():
+                info['preview_size'] = preview_path.stat().st_size
+                info['preview_path'] = str(preview_path)
+            
             if voiceover_path.exists():
                 info['voiceover_size'] = voiceover_path.stat().st_size
                 info['voiceover_path'] = str(voiceover_path)
@@ -140,46 +182,142 @@ class VideoGenerator:
                 'error': str(e)
             }
     
-    def generate_multi_scene_video(self, scenes, scene_keywords, project_id):
-        """Generate and merge videos for each scene, then combine into one final video with voiceover."""
+    def _generate_timed_voiceover(self, script, voiceover_path):
+        """Generate the voiceover; returns its sentence timing map, or None if only the fallback worked"""
+        result = self.tts_generator.generate_voiceover_with_timing(script, voiceover_path)
+        if result['success']:
+            return result['timings']
+        
+        # Untimed path still provides the silent-audio fallback
+        if not self.tts_generator.generate_voiceover(script, voiceover_path):
+            raise Exception("Failed to generate voiceover")
+        return None
+    
+    def _prepare_stream_dir(self, project_dir):
+        """Empty HLS directory for a render, so players never pick up an earlier render's playlist"""
+        stream_dir = project_dir / Config.STREAM_DIRNAME
+        shutil.rmtree(stream_dir, ignore_errors=True)
+        return stream_dir
+    
+    def _processor_for(self, quality):
+        """VideoProcessor configured for a render quality tier"""
+        return self.preview_processor if quality == 'preview' else self.video_processor
+    
+    def _render_plan_key(self, scenes):
+        """Plan cache key: the scenes plus everything that changes the voiceover timing"""
+        tts = self.tts_generator
+        payload = json.dumps([scenes, tts.backend_name, tts.language, tts.slow])
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    
+    def _load_render_plan(self, scenes):
+        """Clip selection and timing from an earlier render of the same scenes, if its clips still exist"""
+        plan = self.render_plans.get(self._render_plan_key(scenes))
+        if plan and all(os.path.exists(path) for path in plan['video_clips']):
+            return plan
+        return None
+    
+    def generate_script_video(self, script, project_id, render_backend=None, quality='final', stream=False):
+        """Split a script into scenes, extract their keywords and render the multi-scene video"""
         try:
-            from services.video_processor import add_caption_to_video
+            # Split script into scenes (using ' and ' as separator)
+            scenes = [s.strip() for s in script.split(' and ') if s.strip()]
+            print("Scenes detected:", scenes)
 
-            project_dir = Config.OUTPUTS_DIR / project_id
-            project_dir.mkdir(parents=True, exist_ok=True)
-            video_clips = []
+            plan = self._load_render_plan(scenes)
+            if plan:
+                # A preview (or earlier render) already chose clips for these scenes
+                print("Reusing clip selection and voiceover timing from an earlier render")
+                scene_keywords = plan['scene_keywords']
+            else:
+                # Extract keywords for each scene (all scenes parsed in one batch)
+                scene_keywords = []
+                for scene, analysis in zip(scenes, self.nlp_analyzer.analyze_scripts(scenes)):
+                    # Flatten keywords for this scene
+                    keywords = []
+                    for item in analysis:
+                        keywords.extend(item.get('keywords', []))
+                    scene_keywords.append(list(set(keywords)))
+                    print(f"Keywords for scene '{scene}':", keywords)
 
-            # For each scene, find a matching video and create a clip
-            for i, keywords in enumerate(scene_keywords):
-                found_videos = self.local_video_service.search_stock_videos(keywords)
-                if not found_videos:
-                    raise Exception(f"No videos found for scene {i+1}: {keywords}")
-                video_info = found_videos[0]  # Pick first match
-                video_clips.append(video_info['path'])
+            return self.generate_multi_scene_video(
+                scenes=scenes,
+                scene_keywords=scene_keywords,
+                project_id=project_id,
+                render_backend=render_backend,
+                quality=quality,
+                plan=plan,
+                stream=stream
+            )
+        except Exception as e:
+            print(f"Error in script video generation: {e}")
+            return {
+                'success': False,
+                'error': str(e),
+                'project_id': project_id
+            }
 
-            # Step: Generate voiceover for the whole script
+    def generate_multi_scene_video(self, scenes, scene_keywords, project_id, render_backend=None, quality='final', plan=None, stream=False):
+        """Generate and merge videos for each scene, then combine into one final video with voiceover."""
+        try:
+            project_dir = Config.OUTPUTS_DIR / project_id
+            project_dir.mkdir(parents=True, exist_ok=True)
             script = " and ".join(scenes)
             voiceover_path = project_dir / "voiceover.mp3"
-            voiceover_result = self.tts_generator.generate_voiceover(script, voiceover_path)
-            if not voiceover_result:
-                raise Exception("Failed to generate voiceover")
 
-            # Merge all clips into one video with voiceover
-            final_video_path = project_dir / "final_video.mp4"
-            merge_success = self.video_processor.merge_clips_with_voiceover(video_clips, voiceover_path, final_video_path)
+            if plan:
+                video_clips = plan['video_clips']
+                clip_durations = plan.get('clip_durations')
+                # Same text as the earlier render, so the sentence chunks are voiceover cache hits;
+                # the timings come from the audio actually produced rather than from the plan
+                sentence_timings = self._generate_timed_voiceover(script, voiceover_path)
+            else:
+                video_clips = []
+                clip_durations = []
+
+                # Clip searches and the voiceover don't depend on each other until the merge,
+                # so synthesize while the scenes are searched (one worker is always left for TTS)
+                with ThreadPoolExecutor(max_workers=Config.SCENE_SEARCH_WORKERS + 1) as pool:
+                    voiceover = pool.submit(self._generate_timed_voiceover, script, voiceover_path)
+                    searches = list(pool.map(self.local_video_service.search_stock_videos, scene_keywords))
+                    sentence_timings = voiceover.result()
+
+                # For each scene, take the best match as its clip
+                for i, (keywords, found_videos) in enumerate(zip(scene_keywords, searches)):
+                    if not found_videos:
+                        raise Exception(f"No videos found for scene {i+1}: {keywords}")
+                    video_info = found_videos[0]  # Pick first match
+                    video_clips.append(video_info['path'])
+                    clip_durations.append(video_info.get('source_duration'))
+
+                self.render_plans.put(self._render_plan_key(scenes), {
+                    'scene_keywords': scene_keywords,
+                    'video_clips': [str(path) for path in video_clips],
+                    'clip_durations': clip_durations,
+                    'sentence_timings': sentence_timings
+                })
+
+            # Merge all clips into one video with voiceover, each trimmed to its share of the narration.
+            # Per-scene captions are burned in during this encode or muxed as a subtitle track.
+            final_video_path = project_dir / Config.RENDER_QUALITIES[quality]['filename']
+            merge_success = self._processor_for(quality).merge_clips_with_voiceover(
+                video_clips, voiceover_path, final_video_path,
+                scene_texts=scenes, sentence_timings=sentence_timings,
+                caption_mode=Config.CAPTION_MODE,
+                render_backend=render_backend,
+                stream_dir=self._prepare_stream_dir(project_dir) if stream else None,
+                clip_durations=clip_durations
+            )
             if not merge_success:
                 raise Exception("Failed to merge video clips")
 
-            # ✅ Add captions after merging
-            caption_text = " ".join(scenes)  # Could also be per scene with timing
-            captioned_video_path = project_dir / "final_video_with_captions.mp4"
-            add_caption_to_video(final_video_path, captioned_video_path, caption_text)
-
+            subtitles_path = final_video_path.with_suffix('.vtt')
             return {
                 'success': True,
                 'project_id': project_id,
-                'video_path': str(captioned_video_path),  # Return captioned version
+                'quality': quality,
+                'video_path': str(final_video_path),
                 'voiceover_path': str(voiceover_path),
+                'subtitles_path': str(subtitles_path) if subtitles_path.exists() else None,
                 'project_dir': str(project_dir)
             }
         except Exception as e:
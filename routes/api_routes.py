@@ -1,6 +1,9 @@
-from flask import Blueprint, request, jsonify, send_file
+from flask import Blueprint, request, jsonify
+from werkzeug.security import safe_join
 from core.video_generator import VideoGenerator
+from core.job_queue import RenderJobQueue
 from services.video_processor import VideoProcessor
+from utils.media_response import send_media
 from config import Config
 import os
 
@@ -10,6 +13,9 @@ api_bp = Blueprint('api', __name__, url_prefix='/api')
 # Initialize video generator
 video_generator = VideoGenerator()
 
+# Initialize render worker pool
+render_queue = RenderJobQueue()
+
 @api_bp.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
@@ -21,11 +27,16 @@ def health_check():
             'tts_generator': True,
             'stock_video_service': True,
             'video_processor': True
-        }
+        },
+        'render_queue': render_queue.get_stats(),
+        'nlp_cache': video_generator.nlp_analyzer.cache_stats(),
+        'tts_backend': video_generator.tts_generator.backend_name,
+        'tts_cache': video_generator.tts_generator.cache_stats(),
+        'text_cache': video_generator.video_processor.text_renderer.stats()
     })
 @api_bp.route('/generate-video', methods=['POST'])
 def generate_video():
-    """Generate a video by merging scenes based on the script."""
+    """Queue a render job that merges scenes based on the script."""
     
     try:
         data = request.get_json()
@@ -34,41 +45,42 @@ def generate_video():
         if not script:
             return jsonify({'error': 'Script is required'}), 400
 
-        # Split script into scenes (using ' and ' as separator)
-        scenes = [s.strip() for s in script.split(' and ') if s.strip()]
-        print("Scenes detected:", scenes)
-
-        # Extract keywords for each scene
-        scene_keywords = []
-        for scene in scenes:
-            analysis = video_generator.nlp_analyzer.analyze_script(scene)
-            # Flatten keywords for this scene
-            keywords = []
-            for item in analysis:
-                keywords.extend(item.get('keywords', []))
-            scene_keywords.append(list(set(keywords)))
-            print(f"Keywords for scene '{scene}':", keywords)
+        quality = data.get('quality', 'final')  # 'preview' renders small and fast, reusing clips/voiceover later
+        if quality not in Config.RENDER_QUALITIES:
+            return jsonify({'error': f"quality must be one of {', '.join(Config.RENDER_QUALITIES)}"}), 400
+
+        render_backend = (
+            data.get('render_backend') or Config.RENDER_QUALITIES[quality]['render_backend'] or Config.RENDER_BACKEND
+        )
+        if render_backend not in Config.RENDER_BACKENDS:
+            return jsonify({'error': f"render_backend must be one of {', '.join(Config.RENDER_BACKENDS)}"}), 400
+
+        stream = bool(data.get('stream', Config.STREAM_OUTPUT))  # Publish scenes as HLS while the render runs
 
         import uuid
         project_id = str(uuid.uuid4())
         project_dir = Config.OUTPUTS_DIR / project_id
         project_dir.mkdir(parents=True, exist_ok=True)
 
-        # Pass scenes and their keywords to the generator
-        result = video_generator.generate_multi_scene_video(
-            scenes=scenes,
-            scene_keywords=scene_keywords,
-            project_id=project_id
+        # Hand the render off to the worker pool and return right away
+        render_queue.submit(
+            project_id, video_generator.generate_script_video, script, project_id,
+            render_backend=render_backend, quality=quality, stream=stream
         )
+        job = render_queue.get_status(project_id)
 
-        if result['success']:
-            return jsonify({
-                'success': True,
-                'project_id': project_id,
-                'video_url': f'/download/{project_id}'
-            })
-        else:
-            return jsonify({'error': result['error']}), 500
+        response = {
+            'success': True,
+            'project_id': project_id,
+            'quality': quality,
+            'status': job['status'],
+            'queue_position': job['queue_position'],
+            'status_url': f'/api/projects/{project_id}/status',
+            'video_url': _video_url(project_id, quality)
+        }
+        if stream:
+            response['stream_url'] = _stream_url(project_id)
+        return jsonify(response), 202
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -127,15 +139,65 @@ def search_videos():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@api_bp.route('/library/ingest', methods=['POST'])
+def ingest_library():
+    """Queue a job that pre-transcodes the video library to normalized proxies"""
+    try:
+        import uuid
+        job_id = f"ingest-{uuid.uuid4()}"
+        render_queue.submit(job_id, video_generator.ingest_library)
+        job = render_queue.get_status(job_id)
+        
+        return jsonify({
+            'success': True,
+            'job_id': job_id,
+            'status': job['status'],
+            'queue_position': job['queue_position']
+        }), 202
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def _video_url(project_id, quality='final'):
+    """Download URL for a project's render of the given quality"""
+    if quality == 'final':
+        return f'/download/{project_id}'
+    return f'/download/{project_id}?quality={quality}'
+
+def _stream_url(project_id):
+    """HLS playlist URL for a project rendered with stream enabled"""
+    return f'/api/stream/{project_id}/index.m3u8'
+
+@api_bp.route('/stream/<project_id>/<filename>', methods=['GET'])
+def stream_video(project_id, filename):
+    """Serve the HLS playlist and segments, which grow while the render is still running"""
+    try:
+        stream_path = safe_join(str(Config.OUTPUTS_DIR / project_id / Config.STREAM_DIRNAME), filename)
+        if not stream_path or not os.path.isfile(stream_path):
+            return jsonify({'error': 'Stream not found'}), 404
+        if filename.endswith('.m3u8'):
+            # The playlist is rewritten as scenes finish, so players must always revalidate it
+            return send_media(stream_path, mimetype='application/vnd.apple.mpegurl', max_age=0)
+        if filename.endswith('.ts'):
+            return send_media(stream_path, mimetype='video/mp2t')
+        return jsonify({'error': 'Not a stream file'}), 404
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @api_bp.route('/download/<project_id>', methods=['GET'])
 def download_video(project_id):
-    """Download generated video"""
+    """Download generated video (?quality=preview for the draft render)"""
     try:
-        video_path = Config.OUTPUTS_DIR / project_id / "final_video.mp4"
+        quality = request.args.get('quality', 'final')
+        if quality not in Config.RENDER_QUALITIES:
+            return jsonify({'error': f"quality must be one of {', '.join(Config.RENDER_QUALITIES)}"}), 400
+        
+        video_path = Config.OUTPUTS_DIR / project_id / Config.RENDER_QUALITIES[quality]['filename']
         if not video_path.exists():
             return jsonify({'error': 'Video not found'}), 404
 
-        return send_file(
+        # Conditional and ranged, so players can seek and revalidate without refetching
+        return send_media(
             video_path,
             as_attachment=False,  # Set to False for in-browser playback
             mimetype='video/mp4'
@@ -152,8 +214,9 @@ def download_voiceover(project_id):
         if not voiceover_path.exists():
             return jsonify({'error': 'Voiceover not found'}), 404
         
-        return send_file(
+        return send_media(
             voiceover_path,
+            mimetype='audio/mpeg',
             as_attachment=True,
             download_name=f"voiceover_{project_id}.mp3"
         )
@@ -173,18 +236,22 @@ def add_caption():
         data = request.get_json()
         input_video = data.get('input_video_path')
         caption_text = data.get('caption_text', '')
+        mode = data.get('mode', 'soft')  # 'soft' subtitle track (no re-encode) or 'burn'
 
         if not input_video or not os.path.exists(input_video):
             return jsonify({'error': 'Valid input_video_path required'}), 400
+        if mode not in ('soft', 'burn'):
+            return jsonify({'error': "mode must be 'soft' or 'burn'"}), 400
 
         output_video = input_video.replace(".mp4", "_captioned.mp4")
 
         # Call method from instance
-        video_processor.add_caption_to_video(input_video, output_video, caption_text)
+        video_processor.add_caption_to_video(input_video, output_video, caption_text, mode=mode)
 
         return jsonify({
             'success': True,
-            'captioned_video_url': output_video
+            'captioned_video_url': output_video,
+            'subtitles_url': os.path.splitext(output_video)[0] + '.vtt'
         })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -193,22 +260,49 @@ def add_caption():
 
 @api_bp.route('/projects/<project_id>/status', methods=['GET'])
 def get_project_status(project_id):
-    """Get project status and information"""
+    """Get project render status and information"""
     try:
-        info = video_generator.get_project_info(project_id)
+        job = render_queue.get_status(project_id)
         
-        if info.get('success') is False:
-            return jsonify({'error': info['error']}), 500
+        if job is None:
+            # Not tracked by this process (e.g. rendered before a restart)
+            info = video_generator.get_project_info(project_id)
+            
+            if info.get('success') is False:
+                return jsonify({'error': info['error']}), 500
+            
+            if info['video_exists'] or info['preview_exists']:
+                return jsonify({
+                    'status': RenderJobQueue.DONE,
+                    'video_url': _video_url(project_id, 'final' if info['video_exists'] else 'preview'),
+                    'voiceover_url': f'/download-voiceover/{project_id}',
+                    'info': info
+                })
+            return jsonify({'error': 'Project not found'}), 404
         
-        if info['video_exists']:
-            return jsonify({
-                'status': 'completed',
-                'video_url': f'/download/{project_id}',
-                'voiceover_url': f'/download-voiceover/{project_id}',
-                'info': info
-            })
-        else:
-            return jsonify({'status': 'processing'})
+        response = {
+            'status': job['status'],
+            'queue_position': job['queue_position'],
+            'submitted_at': job['submitted_at'],
+            'started_at': job['started_at'],
+            'finished_at': job['finished_at']
+        }
+        
+        if job['status'] == RenderJobQueue.RUNNING:
+            # Scenes already published can be watched before the render finishes
+            if (Config.OUTPUTS_DIR / project_id / Config.STREAM_DIRNAME / 'index.m3u8').exists():
+                response['stream_url'] = _stream_url(project_id)
+        elif job['status'] == RenderJobQueue.DONE:
+            info = video_generator.get_project_info(project_id)
+            if info.get('stream_exists'):
+                response['stream_url'] = _stream_url(project_id)
+            response['video_url'] = _video_url(project_id, 'final' if info.get('video_exists') else 'preview')
+            response['voiceover_url'] = f'/download-voiceover/{project_id}'
+            response['info'] = info
+        elif job['status'] == RenderJobQueue.FAILED:
+            response['error'] = job['error']
+        
+        return jsonify(response)
             
     except Exception as e:
         return jsonify({'error': str(e)}), 500
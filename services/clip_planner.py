@@ -0,0 +1,95 @@
+import re
+from config import Config
+
+NON_WORD = re.compile(r'[^\w]+')
+
+def _normalize(text):
+    """Lowercased text with punctuation and spacing removed, for comparing scene and TTS text"""
+    return NON_WORD.sub('', text.lower())
+
+class ClipPlanner:
+    """Plans exact per-scene durations and source in/out points from voiceover timing"""
+
+    def __init__(self):
+        self.min_scene_duration = Config.MIN_SCENE_DURATION
+        self.slow_motion_threshold = 1.0  # Sources shorter than this are slowed down rather than looped
+
+    def scene_durations(self, scene_texts, total_duration, sentence_timings=None):
+        """Split the voiceover length across scenes (by timing map if it lines up, else by text length)"""
+        if not scene_texts:
+            return []
+
+        starts = self._aligned_starts(scene_texts, sentence_timings) if sentence_timings else None
+        if starts:
+            # Each scene runs until the next one starts, so pauses are covered
+            starts[0] = 0.0
+            ends = starts[1:] + [total_duration]
+            durations = [end - start for start, end in zip(starts, ends)]
+        else:
+            weights = [max(len(text), 1) for text in scene_texts]
+            durations = [total_duration * weight / sum(weights) for weight in weights]
+
+        return [max(duration, self.min_scene_duration) for duration in durations]
+
+    def _aligned_starts(self, scene_texts, sentence_timings):
+        """Voiceover time at which each scene's text starts, or None if the scenes can't be found in the timed text
+
+        TTS splits sentences its own way, so scenes are located by character offset in the narrated text
+        rather than matched to sentences one to one; a scene starting mid-sentence is placed proportionally.
+        """
+        narrated = ''
+        spans = []  # (first char, last char, start, end) of each timed sentence in the normalized narration
+        for timing in sentence_timings:
+            text = _normalize(timing['sentence'])
+            spans.append((len(narrated), len(narrated) + len(text), timing['start'], timing['end']))
+            narrated += text
+
+        starts = []
+        cursor = 0
+        for scene_text in scene_texts:
+            text = _normalize(scene_text)
+            offset = narrated.find(text, cursor) if text else -1
+            if offset < 0:
+                return None
+            cursor = offset + len(text)
+            for first, last, start, end in spans:
+                if first <= offset < last:
+                    starts.append(start + (end - start) * (offset - first) / (last - first))
+                    break
+            else:
+                return None
+        if any(later < earlier for earlier, later in zip(starts, starts[1:])):
+            return None
+        return starts
+
+    def default_duration(self, source_duration):
+        """Scene length used when no voiceover timing is known (same rule as VideoProcessor._fit_clip_duration)"""
+        if source_duration < 3.0:
+            return min(Config.MAX_CLIP_DURATION, 4.0)
+        return min(Config.MAX_CLIP_DURATION, source_duration)
+
+    def plan_clip(self, source_duration, target_duration):
+        """Source spans that fill target_duration; returns {'spans': [(in, out), ...], 'speed': factor}.
+        
+        Returns None for a source with no usable length, which callers replace with a placeholder.
+        """
+        if not source_duration or source_duration <= 0:
+            # Nothing to trim, loop or slow down (and a zero speed factor would stall the render)
+            return None
+
+        if source_duration >= target_duration:
+            return {'spans': [(0.0, target_duration)], 'speed': 1.0}
+
+        if source_duration < self.slow_motion_threshold:
+            # Too short to loop smoothly: play the whole clip slowed down
+            return {'spans': [(0.0, source_duration)], 'speed': source_duration / target_duration}
+
+        # Loop whole passes, then take only the remainder from the last one
+        spans = []
+        remaining = target_duration
+        while remaining > source_duration:
+            spans.append((0.0, source_duration))
+            remaining -= source_duration
+        if remaining > 1e-3:
+            spans.append((0.0, remaining))
+        return {'spans': spans, 'speed': 1.0}
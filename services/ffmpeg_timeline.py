@@ -0,0 +1,141 @@
+from PIL import Image
+from config import Config
+
+class FFmpegTimeline:
+    """Compiles scene specs into ffmpeg inputs and one filtergraph, so no frame passes through Python"""
+
+    def __init__(self, media_probe, clip_planner, text_renderer, transitions, width=None, height=None, fps=None):
+        self.width = width or Config.VIDEO_WIDTH
+        self.height = height or Config.VIDEO_HEIGHT
+        self.fps = fps or Config.VIDEO_FPS
+        self.text_scale = self.width / Config.VIDEO_WIDTH  # Keeps text the same share of the frame
+        self.media_probe = media_probe
+        self.clip_planner = clip_planner
+        self.text_renderer = text_renderer
+        self.transitions = transitions
+
+    def build(self, scene_specs, work_dir, crossfade_duration=0):
+        """Inputs and filtergraph for the video timeline; returns a dict also holding scene durations"""
+        inputs = []
+        filters = []
+        labels = []
+        durations = []
+        for i, spec in enumerate(scene_specs):
+            if spec['kind'] == 'placeholder':
+                duration = spec.get('target_duration', 3)
+                chain = self._placeholder(spec['text'], duration, inputs, filters, work_dir, i)
+            else:
+                duration, chain = self._clip(spec, inputs)
+
+            if spec.get('caption'):
+                chain = self._overlay_text(
+                    chain, spec['caption'], duration, inputs, filters, work_dir, f"caption_{i}",
+                    size=round(Config.CAPTION_FONT_SIZE * self.text_scale), color=Config.CAPTION_COLOR,
+                    max_width=self.width - round(100 * self.text_scale), y=f"H-h-{round(30 * self.text_scale)}"
+                )
+            chain += self._fades(duration, spec.get('fade_in', 0), spec.get('fade_out', 0))
+
+            # xfade and concat need every scene on one time base and a constant frame rate
+            label = f'[s{i}]'
+            filters.append(f"{chain},settb=AVTB,fps={self.fps}{label}")
+            labels.append(label)
+            durations.append(duration)
+
+        if crossfade_duration and len(labels) > 1:
+            graph, video_label, length = self.transitions.xfade_filtergraph(durations, crossfade_duration, labels)
+            filters.append(graph)
+        elif len(labels) > 1:
+            video_label = '[timeline]'
+            filters.append(f"{''.join(labels)}concat=n={len(labels)}:v=1:a=0{video_label}")
+            length = sum(durations)
+        else:
+            video_label = labels[0]
+            length = durations[0]
+
+        return {
+            'inputs': inputs,
+            'input_count': inputs.count('-i'),
+            'graph': ';'.join(filters),
+            'video_label': video_label,
+            'durations': durations,
+            'length': length
+        }
+
+    def _clip(self, spec, inputs):
+        """Input args and filter chain trimming, looping or slowing a source to its planned length"""
+        source_duration = spec.get('source_duration')
+        if not source_duration:
+            # Not carried over from the catalog; read it from the file
+            metadata = self.media_probe.probe(spec['path'])
+            if not metadata:
+                raise ValueError(f"Could not read duration of {spec['path']}")
+            source_duration = metadata.get('duration') or 0
+
+        if spec.get('target_duration'):
+            target = spec['target_duration']
+        elif spec.get('fit_duration'):
+            target = self.clip_planner.default_duration(source_duration)
+        else:
+            target = source_duration
+        plan = self.clip_planner.plan_clip(source_duration, target)
+
+        index = inputs.count('-i')
+        if plan is None:
+            # No usable footage: a black frame of the planned length stands in for the scene
+            print(f"{spec['path']} has no usable duration, using a placeholder")
+            inputs += ['-f', 'lavfi', '-i', f"color=c=black:s={self.width}x{self.height}:r={self.fps}:d={target:.3f}"]
+            return target, f"[{index}:v]format=yuv420p"
+        if len(plan['spans']) > 1:
+            # Short source: let the demuxer loop it and cut the remainder with trim
+            inputs += ['-stream_loop', '-1']
+        inputs += ['-i', spec['path']]
+
+        chain = f"[{index}:v]"
+        if plan['speed'] != 1.0:
+            chain += f"setpts={1 / plan['speed']:.6f}*(PTS-STARTPTS),"
+        chain += f"fps={self.fps},"
+        if not spec.get('normalized'):
+            chain += (
+                f"scale={self.width}:{self.height}:force_original_aspect_ratio=increase,"
+                f"crop={self.width}:{self.height},"
+            )
+        chain += f"setsar=1,format=yuv420p,trim=duration={target:.3f},setpts=PTS-STARTPTS"
+        return target, chain
+
+    def _placeholder(self, text, duration, inputs, filters, work_dir, index):
+        """Black background with the text overlaid once from a pre-rendered image"""
+        background = inputs.count('-i')
+        inputs += ['-f', 'lavfi', '-i', f"color=c=black:s={self.width}x{self.height}:r={self.fps}:d={duration:.3f}"]
+        chain = f"[{background}:v]format=yuv420p"
+        return self._overlay_text(
+            chain, text, duration, inputs, filters, work_dir, f"placeholder_{index}",
+            size=round(40 * self.text_scale), color='white',
+            max_width=round(min(1200, Config.VIDEO_WIDTH - 100) * self.text_scale), y='(H-h)/2'
+        )
+
+    def _overlay_text(self, chain, text, duration, inputs, filters, work_dir, name, size, color, max_width, y):
+        """Overlay a cached text render (written out as a PNG) on a chain; returns the new chain"""
+        try:
+            rendered = self.text_renderer.render(text, size=size, color=color, max_width=max_width)
+        except Exception as e:
+            print(f"Text rendering failed: {e}")
+            return chain
+
+        image_path = work_dir / f"{name}.png"
+        Image.fromarray(rendered, 'RGBA').save(image_path)
+        image_index = inputs.count('-i')
+        inputs += ['-loop', '1', '-framerate', str(self.fps), '-t', f"{duration:.3f}", '-i', str(image_path)]
+
+        # Close the chain so the overlay can take it as its main input
+        base_label = f"[{name}_base]"
+        filters.append(f"{chain}{base_label}")
+        return f"{base_label}[{image_index}:v]overlay=x=(W-w)/2:y={y}:shortest=1:format=auto,format=yuv420p"
+
+    def _fades(self, duration, fade_in, fade_out):
+        """fade filters from/to black at the ends of a scene"""
+        chain = ''
+        if fade_in:
+            chain += f",fade=t=in:st=0:d={fade_in:.3f}"
+        if fade_out:
+            chain += f",fade=t=out:st={max(duration - fade_out, 0):.3f}:d={fade_out:.3f}"
+        return chain
@@ -0,0 +1,74 @@
+import math
+import os
+import subprocess
+from pathlib import Path
+from moviepy.config import get_setting
+from config import Config
+
+class HLSStreamWriter:
+    """Publishes finished scenes as HLS segments with a growing EVENT playlist"""
+
+    PLAYLIST_NAME = 'index.m3u8'
+
+    def __init__(self, stream_dir, voiceover_path=None, max_segment_duration=1):
+        """max_segment_duration: longest scene the render plans, which fixes the playlist's target duration"""
+        self.stream_dir = Path(stream_dir)
+        self.stream_dir.mkdir(parents=True, exist_ok=True)
+        self.voiceover_path = voiceover_path if voiceover_path and os.path.exists(str(voiceover_path)) else None
+        self.audio_codec = Config.AUDIO_CODEC
+        # Players read EXT-X-TARGETDURATION once, so it must not change as segments are added
+        self.target_duration = max(math.ceil(max_segment_duration), 1)
+        self.entries = []  # (filename, duration)
+        self.elapsed = 0.0
+        self.finished = False
+        self._write_playlist()
+
+    @property
+    def playlist_path(self):
+        return self.stream_dir / self.PLAYLIST_NAME
+
+    def add_segment(self, segment_path, duration):
+        """Mux a rendered scene with its slice of the voiceover into a TS segment and list it"""
+        filename = f"scene_{len(self.entries):04d}.ts"
+        command = [get_setting("FFMPEG_BINARY"), '-y', '-i', str(segment_path)]
+        if self.voiceover_path:
+            command += ['-ss', f"{self.elapsed:.3f}", '-t', f"{duration:.3f}", '-i', str(self.voiceover_path)]
+            command += ['-map', '0:v', '-map', '1:a', '-c:a', self.audio_codec]
+        else:
+            command += ['-map', '0:v']
+        # Offsetting timestamps keeps the segments one continuous timeline for the player
+        command += [
+            '-c:v', 'copy', '-t', f"{duration:.3f}", '-output_ts_offset', f"{self.elapsed:.3f}",
+            '-f', 'mpegts', str(self.stream_dir / filename)
+        ]
+        subprocess.run(command, check=True, capture_output=True)
+        if round(duration) > self.target_duration:
+            print(f"HLS segment {filename} ({duration:.3f}s) exceeds the target duration of {self.target_duration}s")
+
+        self.entries.append((filename, duration))
+        self.elapsed += duration
+        self._write_playlist()
+
+    def finish(self):
+        """Mark the playlist complete so players stop polling it"""
+        self.finished = True
+        self._write_playlist()
+
+    def _write_playlist(self):
+        """Rewrite the playlist atomically so readers never see a partial file"""
+        lines = [
+            '#EXTM3U',
+            '#EXT-X-VERSION:3',
+            '#EXT-X-PLAYLIST-TYPE:EVENT',
+            f'#EXT-X-TARGETDURATION:{self.target_duration}',
+            '#EXT-X-MEDIA-SEQUENCE:0'
+        ]
+        for filename, duration in self.entries:
+            lines += [f'#EXTINF:{duration:.3f},', filename]
+        if self.finished:
+            lines.append('#EXT-X-ENDLIST')
+
+        temp_path = self.stream_dir / f"{self.PLAYLIST_NAME}.tmp"
+        with open(temp_path, 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+        os.replace(temp_path, self.playlist_path)
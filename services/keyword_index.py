@@ -0,0 +1,68 @@
+class KeywordIndex:
+    """Inverted index (token/trigram -> video ids) over library filenames"""
+
+    GRAM_SIZE = 3
+
+    def __init__(self, videos=None):
+        self.build(videos or [])
+
+    def build(self, videos):
+        """(Re)build the index from a list of video dicts"""
+        self.videos = list(videos)
+        self.filenames = [video['filename'].lower() for video in self.videos]
+        self.token_postings = {}
+        self.gram_postings = {}
+        self._short_needle_cache = {}
+
+        # Tokens answer "filename word inside keyword"; trigrams answer "needle inside filename"
+        for video_id, filename in enumerate(self.filenames):
+            for token in set(filename.split()):
+                self.token_postings.setdefault(token, []).append(video_id)
+            for gram in self._grams(filename):
+                self.gram_postings.setdefault(gram, []).append(video_id)
+
+    def __len__(self):
+        return len(self.videos)
+
+    def _grams(self, text):
+        """Distinct character trigrams of a string"""
+        return {text[i:i + self.GRAM_SIZE] for i in range(len(text) - self.GRAM_SIZE + 1)}
+
+    def containing(self, needle):
+        """Ids of videos whose filename contains `needle` as a substring"""
+        if not needle:
+            return set(range(len(self.videos)))
+
+        if len(needle) < self.GRAM_SIZE:
+            # Any filename containing a short needle has a trigram that contains it
+            if needle not in self._short_needle_cache:
+                ids = set()
+                for gram, postings in self.gram_postings.items():
+                    if needle in gram:
+                        ids.update(postings)
+                ids.update(
+                    video_id for video_id, filename in enumerate(self.filenames)
+                    if len(filename) < self.GRAM_SIZE and needle in filename
+                )
+                self._short_needle_cache[needle] = ids
+            return self._short_needle_cache[needle]
+
+        # The rarest trigram bounds the candidates; confirm the real substring on each
+        rarest = None
+        for gram in self._grams(needle):
+            gram_postings = self.gram_postings.get(gram)
+            if not gram_postings:
+                return set()
+            if rarest is None or len(gram_postings) < len(rarest):
+                rarest = gram_postings
+        return {video_id for video_id in rarest if needle in self.filenames[video_id]}
+
+    def tokens_within(self, text):
+        """Ids of videos with a filename token that is a substring of `text`"""
+        ids = set()
+        for start in range(len(text)):
+            for end in range(start + 1, len(text) + 1):
+                postings = self.token_postings.get(text[start:end])
+                if postings:
+                    ids.update(postings)
+        return ids
@@ -1,129 +1,72 @@
 import os
-import random
-from pathlib import Path
 from config import Config
+from services.video_catalog import VideoCatalog
+from services.keyword_index import KeywordIndex
+from utils.file_utils import link_or_copy
+
+# Synonym map used to widen filename matching (built once at import)
+KEYWORD_MAPPING = {
+    # Car-related keywords
+    'car': ['car', 'automobile', 'vehicle', 'driving', 'lamborghini', 'forza', 'centenario'],
+    'vehicle': ['car', 'automobile', 'vehicle', 'driving', 'lamborghini', 'forza', 'centenario'],
+    'driving': ['car', 'automobile', 'vehicle', 'driving', 'lamborghini', 'forza', 'centenario'],
+    'lights': ['lights', 'city', 'manhattan', 'urban', 'night', 'street'],
+    'city': ['city', 'manhattan', 'urban', 'lights', 'street', 'plaza'],
+    'night': ['night', 'lights', 'city', 'manhattan', 'urban'],
+    
+    # Animal-related keywords
+    'cat': ['cat', 'kitten', 'kitty', 'feline', 'pet', 'cute'],
+    'kitten': ['cat', 'kitten', 'kitty', 'feline', 'pet', 'cute'],
+    'pet': ['cat', 'kitten', 'puppy', 'dog', 'pet', 'animal', 'cute'],
+    'animal': ['cat', 'kitten', 'puppy', 'dog', 'pet', 'animal', 'cute'],
+    'puppy': ['puppy', 'dog', 'pet', 'animal', 'cute', 'funny'],
+    'dog': ['puppy', 'dog', 'pet', 'animal', 'cute', 'funny'],
+    
+    # Nature-related keywords
+    'nature': ['nature', 'mountain', 'sunrise', 'sunset', 'landscape', 'beautiful'],
+    'mountain': ['mountain', 'nature', 'landscape', 'ai'],
+    'sunrise': ['sunrise', 'sunset', 'beautiful', 'nature'],
+    'sunset': ['sunrise', 'sunset', 'beautiful', 'nature'],
+    'beautiful': ['beautiful', 'sunrise', 'sunset', 'nature'],
+    
+    # Weather-related keywords
+    'snow': ['snow', 'winter', 'cold', 'chicago'],
+    'winter': ['snow', 'winter', 'cold', 'chicago'],
+    
+    # Generic keywords
+    'playing': ['playing', 'funny', 'cute', 'kitten', 'puppy', 'falling'],
+    'cute': ['cute', 'kitten', 'puppy', 'funny'],
+    'funny': ['funny', 'cute', 'puppy', 'kitten'],
+}
 
 class LocalVideoService:
     """Service for managing and selecting local videos from the videos directory"""
     
-    def __init__(self):
+    def __init__(self, catalog=None):
         self.videos_dir = Config.VIDEOS_DIR
-        self.available_videos = self._scan_videos()
-    
-    def _scan_videos(self):
-        """Scan the videos directory for available video files"""
-        videos = []
-        if self.videos_dir.exists():
-            for file_path in self.videos_dir.iterdir():
-                if file_path.is_file() and file_path.suffix.lower() in ['.mp4', '.avi', '.mov', '.mkv']:
-                    videos.append({
-                        'path': str(file_path),
-                        'filename': file_path.name,
-                        'size': file_path.stat().st_size,
-                        'source': 'local'
-                    })
-        return videos
+        self.catalog = catalog or VideoCatalog(self.videos_dir)
+        self.refresh_catalog()
+    
+    def refresh_catalog(self):
+        """Incrementally sync the persistent catalog with the videos directory"""
+        stats = self.catalog.refresh()
+        self.keyword_index = KeywordIndex(self.catalog.list_videos())
+        print(f"Video catalog refreshed: {stats}")
+        return stats
     
     def search_stock_videos(self, keywords, max_results=None):
         """Search for videos based on keywords using filename matching"""
         if not max_results:
             max_results = Config.LOCAL_MAX_RESULTS
         
-        if not self.available_videos:
+        if not self.keyword_index.videos:
             return []
         
-        # Create keyword mapping for better matching
-        keyword_mapping = {
-            # Car-related keywords
-            'car': ['car', 'automobile', 'vehicle', 'driving', 'lamborghini', 'forza', 'centenario'],
-            'vehicle': ['car', 'automobile', 'vehicle', 'driving', 'lamborghini', 'forza', 'centenario'],
-            'driving': ['car', 'automobile', 'vehicle', 'driving', 'lamborghini', 'forza', 'centenario'],
-            'lights': ['lights', 'city', 'manhattan', 'urban', 'night', 'street'],
-            'city': ['city', 'manhattan', 'urban', 'lights', 'street', 'plaza'],
-            'night': ['night', 'lights', 'city', 'manhattan', 'urban'],
-            
-            # Animal-related keywords
-            'cat': ['cat', 'kitten', 'kitty', 'feline', 'pet', 'cute'],
-            'kitten': ['cat', 'kitten', 'kitty', 'feline', 'pet', 'cute'],
-            'pet': ['cat', 'kitten', 'puppy', 'dog', 'pet', 'animal', 'cute'],
-            'animal': ['cat', 'kitten', 'puppy', 'dog', 'pet', 'animal', 'cute'],
-            'puppy': ['puppy', 'dog', 'pet', 'animal', 'cute', 'funny'],
-            'dog': ['puppy', 'dog', 'pet', 'animal', 'cute', 'funny'],
-            
-            # Nature-related keywords
-            'nature': ['nature', 'mountain', 'sunrise', 'sunset', 'landscape', 'beautiful'],
-            'mountain': ['mountain', 'nature', 'landscape', 'ai'],
-            'sunrise': ['sunrise', 'sunset', 'beautiful', 'nature'],
-            'sunset': ['sunrise', 'sunset', 'beautiful', 'nature'],
-            'beautiful': ['beautiful', 'sunrise', 'sunset', 'nature'],
-            
-            # Weather-related keywords
-            'snow': ['snow', 'winter', 'cold', 'chicago'],
-            'winter': ['snow', 'winter', 'cold', 'chicago'],
-            
-            # Generic keywords
-            'playing': ['playing', 'funny', 'cute', 'kitten', 'puppy', 'falling'],
-            'cute': ['cute', 'kitten', 'puppy', 'funny'],
-            'funny': ['funny', 'cute', 'puppy', 'kitten'],
-        }
-        
-        # Score each video based on keyword matches
+        # Score only the videos the index says can match at least one keyword
         scored_videos = []
-        for video in self.available_videos:
-            filename_lower = video['filename'].lower()
-            score = 0
-            matched_keywords = []
-            
-            for keyword in keywords:
-                keyword_lower = keyword.lower()
-                
-                # Handle multi-word keywords (like "a cat", "a car")
-                keyword_words = keyword_lower.split()
-                
-                # Direct filename match
-                if keyword_lower in filename_lower:
-                    score += 10
-                    matched_keywords.append(keyword)
-                
-                # Check individual words in multi-word keywords
-                for word in keyword_words:
-                    if word in filename_lower:
-                        score += 8
-                        if keyword not in matched_keywords:
-                            matched_keywords.append(keyword)
-                
-                # Special handling for "cat" keyword to prioritize kitten videos
-                if 'cat' in keyword_words and 'kitten' in filename_lower:
-                    score += 15  # Higher score for direct cat->kitten match
-                    if keyword not in matched_keywords:
-                        matched_keywords.append(keyword)
-                
-                # Check keyword mapping
-                if keyword_lower in keyword_mapping:
-                    for related_word in keyword_mapping[keyword_lower]:
-                        if related_word in filename_lower:
-                            score += 5
-                            if keyword not in matched_keywords:
-                                matched_keywords.append(keyword)
-                            break
-                
-                # Also check individual words in keyword mapping
-                for word in keyword_words:
-                    if word in keyword_mapping:
-                        for related_word in keyword_mapping[word]:
-                            if related_word in filename_lower:
-                                score += 5
-                                if keyword not in matched_keywords:
-                                    matched_keywords.append(keyword)
-                                break
-                
-                # Partial word match
-                for word in filename_lower.split():
-                    if keyword_lower in word or word in keyword_lower:
-                        score += 2
-                        if keyword not in matched_keywords:
-                            matched_keywords.append(keyword)
-                        break
+        for video_id in sorted(self._candidate_ids(keywords)):
+            video = self.keyword_index.videos[video_id]
+            score, matched_keywords = self._score_filename(self.keyword_index.filenames[video_id], keywords)
             
             if score > 0:
                 scored_videos.append({
@@ -138,90 +81,158 @@ class LocalVideoService:
         # If no keyword matches found, fall back to random selection
         if not scored_videos:
             print(f"No keyword matches found for: {keywords}, using random selection")
-            selected_videos = random.sample(
-                self.available_videos, 
-                min(max_results, len(self.available_videos))
-            )
+            selected_videos = self.catalog.random_videos(max_results)
         else:
             # Take top scored videos
             selected_videos = [item['video'] for item in scored_videos[:max_results]]
             print(f"Keyword matches found: {[item['matched_keywords'] for item in scored_videos[:max_results]]}")
         
         # Format videos to match the expected structure
-        formatted_videos = []
-        for video in selected_videos:
-            formatted_videos.append({
-                'url': f'file://{video["path"]}',  # Local file URL
-                'path': video['path'],  # Actual file path
-                'filename': video['filename'],
-                'width': Config.VIDEO_WIDTH,  # Default values
-                'height': Config.VIDEO_HEIGHT,
-                'duration': 10,  # Default duration
-                'preview': None,  # No preview for local videos
-                'source': 'local'
-            })
+        return [self._format_video(video) for video in selected_videos]
+    
+    def _format_video(self, video):
+        """Format a catalog entry as a search result with its probed metadata"""
+        return {
+            'url': f'file://{video["path"]}',  # Local file URL
+            'path': video['path'],  # Actual file path
+            'filename': video['filename'],
+            # Fall back to defaults for files that couldn't be probed
+            'width': video.get('width') or Config.VIDEO_WIDTH,
+            'height': video.get('height') or Config.VIDEO_HEIGHT,
+            'duration': video.get('duration') or 10,
+            'source_duration': video.get('duration'),  # Probed length only; None if probing failed
+            'fps': video.get('fps'),
+            'codec': video.get('codec'),
+            'has_audio': video.get('has_audio'),
+            'preview': None,  # No preview for local videos
+            'source': 'local'
+        }
+    
+    def _candidate_ids(self, keywords):
+        """Ids of videos that could score above zero, looked up in the inverted index"""
+        index = self.keyword_index
+        ids = set()
+        for keyword in keywords:
+            keyword_lower = keyword.lower()
+            keyword_words = keyword_lower.split()
+            
+            # Every substring the scorer checks against the filename
+            needles = {keyword_lower}
+            needles.update(keyword_words)
+            if 'cat' in keyword_words:
+                needles.add('kitten')
+            for word in [keyword_lower] + keyword_words:
+                needles.update(KEYWORD_MAPPING.get(word, []))
+            
+            for needle in needles:
+                ids |= index.containing(needle)
+            
+            # Partial match: a filename word that sits inside the keyword
+            ids |= index.tokens_within(keyword_lower)
+        return ids
+    
+    def _score_filename(self, filename_lower, keywords):
+        """Score a lowercased filename against keywords; returns (score, matched_keywords)"""
+        score = 0
+        matched_keywords = []
         
-        return formatted_videos
+        for keyword in keywords:
+            keyword_lower = keyword.lower()
+            
+            # Handle multi-word keywords (like "a cat", "a car")
+            keyword_words = keyword_lower.split()
+            
+            # Direct filename match
+            if keyword_lower in filename_lower:
+                score += 10
+                matched_keywords.append(keyword)
+            
+            # Check individual words in multi-word keywords
+            for word in keyword_words:
+                if word in filename_lower:
+                    score += 8
+                    if keyword not in matched_keywords:
+                        matched_keywords.append(keyword)
+            
+            # Special handling for "cat" keyword to prioritize kitten videos
+            if 'cat' in keyword_words and 'kitten' in filename_lower:
+                score += 15  # Higher score for direct cat->kitten match
+                if keyword not in matched_keywords:
+                    matched_keywords.append(keyword)
+            
+            # Check keyword mapping
+            if keyword_lower in KEYWORD_MAPPING:
+                for related_word in KEYWORD_MAPPING[keyword_lower]:
+                    if related_word in filename_lower:
+                        score += 5
+                        if keyword not in matched_keywords:
+                            matched_keywords.append(keyword)
+                        break
+            
+            # Also check individual words in keyword mapping
+            for word in keyword_words:
+                if word in KEYWORD_MAPPING:
+                    for related_word in KEYWORD_MAPPING[word]:
+                        if related_word in filename_lower:
+                            score += 5
+                            if keyword not in matched_keywords:
+                                matched_keywords.append(keyword)
+                            break
+            
+            # Partial word match
+            for word in filename_lower.split():
+                if keyword_lower in word or word in keyword_lower:
+                    score += 2
+                    if keyword not in matched_keywords:
+                        matched_keywords.append(keyword)
+                    break
+        
+        return score, matched_keywords
     
     def get_random_video(self):
         """Get a single random video"""
-        if not self.available_videos:
+        videos = self.catalog.random_videos(1)
+        if not videos:
             return None
         
-        video = random.choice(self.available_videos)
-        return {
-            'url': f'file://{video["path"]}',
-            'path': video['path'],
-            'filename': video['filename'],
-            'width': Config.VIDEO_WIDTH,
-            'height': Config.VIDEO_HEIGHT,
-            'duration': 10,
-            'preview': None,
-            'source': 'local'
-        }
+        return self._format_video(videos[0])
     
     def get_video_by_index(self, index):
         """Get a specific video by index"""
-        if 0 <= index < len(self.available_videos):
-            video = self.available_videos[index]
-            return {
-                'url': f'file://{video["path"]}',
-                'path': video['path'],
-                'filename': video['filename'],
-                'width': Config.VIDEO_WIDTH,
-                'height': Config.VIDEO_HEIGHT,
-                'duration': 10,
-                'preview': None,
-                'source': 'local'
-            }
+        video = self.catalog.get_video(index)
+        if video:
+            return self._format_video(video)
         return None
     
     def get_video_count(self):
         """Get the total number of available videos"""
-        return len(self.available_videos)
+        return self.catalog.count()
     
     def list_videos(self):
         """List all available videos"""
-        return self.available_videos.copy()
+        return self.catalog.list_videos()
+    
+    def get_local_path(self, video_info):
+        """Get the library file to open in place, or None if it isn't available"""
+        source_path = video_info.get('path') or video_info.get('url', '').replace('file://', '')
+        
+        if not source_path or not os.path.exists(source_path):
+            return None
+        return source_path
     
     def download_video(self, video_info, output_path):
-        """Copy local video to output path (simulates download)"""
+        """Link local video to output path (simulates download); copies only as a last resort"""
         try:
-            import shutil
-            source_path = video_info.get('path') or video_info.get('url', '').replace('file://', '')
-            
-            if not source_path or not os.path.exists(source_path):
+            source_path = self.get_local_path(video_info)
+            if not source_path:
                 return False
             
-            # Convert path to string if it's a Path object
-            output_path_str = str(output_path)
-            
-            # Copy the file
-            shutil.copy2(source_path, output_path_str)
+            # Hardlink or reflink where possible so no video bytes are duplicated
+            link_or_copy(source_path, output_path)
             return True
             
         except Exception as e:
-            print(f"Error copying video: {e}")
+            print(f"Error linking video: {e}")
             return False
     
     def get_video_info(self, video_info):
@@ -0,0 +1,82 @@
+import json
+import shutil
+import subprocess
+
+class MediaProbe:
+    """Read duration, resolution, fps, codec and audio presence from a media file"""
+
+    def __init__(self):
+        self.ffprobe = shutil.which('ffprobe')
+
+    def probe(self, path):
+        """Probe a file; returns a metadata dict or None if it can't be read"""
+        try:
+            if self.ffprobe:
+                return self._probe_ffprobe(path)
+            return self._probe_moviepy(path)
+        except Exception as e:
+            print(f"Error probing {path}: {e}")
+            return None
+
+    def probe_audio(self, path):
+        """Probe an audio-only file (e.g. a voiceover); returns {'duration': seconds} or None"""
+        try:
+            if self.ffprobe:
+                result = subprocess.run(
+                    [self.ffprobe, '-v', 'error', '-print_format', 'json', '-show_format', str(path)],
+                    capture_output=True, check=True, timeout=60
+                )
+                duration = json.loads(result.stdout).get('format', {}).get('duration')
+            else:
+                from moviepy.video.io.ffmpeg_reader import ffmpeg_parse_infos
+                duration = ffmpeg_parse_infos(str(path)).get('duration')
+            return {'duration': float(duration)} if duration else None
+        except Exception as e:
+            print(f"Error probing {path}: {e}")
+            return None
+
+    def _probe_ffprobe(self, path):
+        """Probe with ffprobe's JSON output (no frames are decoded)"""
+        result = subprocess.run(
+            [self.ffprobe, '-v', 'error', '-print_format', 'json', '-show_format', '-show_streams', str(path)],
+            capture_output=True, check=True, timeout=60
+        )
+        info = json.loads(result.stdout)
+        streams = info.get('streams', [])
+        video = next((s for s in streams if s.get('codec_type') == 'video'), None)
+        if video is None:
+            return None
+
+        duration = video.get('duration') or info.get('format', {}).get('duration')
+        return {
+            'duration': float(duration) if duration else None,
+            'width': int(video['width']),
+            'height': int(video['height']),
+            'fps': self._parse_rate(video.get('avg_frame_rate')) or self._parse_rate(video.get('r_frame_rate')),
+            'codec': video.get('codec_name'),
+            'has_audio': any(s.get('codec_type') == 'audio' for s in streams)
+        }
+
+    def _probe_moviepy(self, path):
+        """Fallback for hosts without ffprobe: parse the header via MoviePy's ffmpeg binary"""
+        from moviepy.video.io.ffmpeg_reader import ffmpeg_parse_infos
+        infos = ffmpeg_parse_infos(str(path))
+        if not infos.get('video_found'):
+            return None
+        width, height = infos['video_size']
+        return {
+            'duration': infos.get('video_duration') or infos.get('duration'),
+            'width': width,
+            'height': height,
+            'fps': infos.get('video_fps'),
+            'codec': None,
+            'has_audio': bool(infos.get('audio_found'))
+        }
+
+    def _parse_rate(self, rate):
+        """Convert an ffprobe rate like '30000/1001' to a float"""
+        if not rate or rate == '0/0':
+            return None
+        numerator, _, denominator = rate.partition('/')
+        denominator = float(denominator or 1)
+        return float(numerator) / denominator if denominator else None
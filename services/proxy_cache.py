@@ -0,0 +1,159 @@
+import hashlib
+import os
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from moviepy.config import get_setting
+from config import Config
+from utils.file_utils import evict_lru
+from utils.key_locks import KeyLocks
+from utils.memo_cache import MemoCache
+
+class ProxyCache:
+    """Content-hash-keyed cache of library clips transcoded once to the output format"""
+
+    SAMPLE_BYTES = 1024 * 1024  # Bytes hashed from each end of a source file
+    HASH_MEMO_SIZE = 4096  # Source content hashes kept in memory
+    # H.264 settings shared with rendered segments, so the library is transcoded once in the output format
+    PRESET = 'medium'
+    PROFILE = 'high'
+    LEVEL = '4.2'
+
+    # Background transcodes for proxies a render found missing, shared by every cache instance
+    _background = None
+    _pending = set()
+    _background_lock = threading.Lock()
+
+    def __init__(self, cache_dir=None, max_bytes=None):
+        self.cache_dir = cache_dir or Config.PROXY_CACHE_DIR
+        self.max_bytes = max_bytes or Config.PROXY_CACHE_MAX_BYTES
+        self.width = Config.VIDEO_WIDTH
+        self.height = Config.VIDEO_HEIGHT
+        self.fps = Config.VIDEO_FPS
+        self.codec = Config.VIDEO_CODEC
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._key_locks = KeyLocks()  # one per proxy name, so a source is transcoded once
+        self._hashes = MemoCache(self.HASH_MEMO_SIZE)  # (path, size, mtime) -> content hash
+
+    @classmethod
+    def encoder_params(cls, fps=None):
+        """Profile, level, pixel format, frame rate and GOP shared by proxies and rendered segments"""
+        fps = fps or Config.VIDEO_FPS
+        return [
+            '-profile:v', cls.PROFILE, '-level', cls.LEVEL, '-pix_fmt', 'yuv420p',
+            '-r', str(fps), '-g', str(fps)
+        ]
+
+    @classmethod
+    def encoding_args(cls, fps=None, preset=None):
+        """Full encoder settings shared by proxies and rendered segments"""
+        return ['-c:v', Config.VIDEO_CODEC, '-preset', preset or cls.PRESET] + cls.encoder_params(fps)
+
+    def _content_hash(self, source_path):
+        """Hash the file size plus its first and last bytes (memoized per path/size/mtime)"""
+        stat = os.stat(source_path)
+        memo_key = (str(source_path), stat.st_size, stat.st_mtime)
+        content_hash = self._hashes.get(memo_key)
+        if content_hash is not None:
+            return content_hash
+
+        digest = hashlib.blake2b(str(stat.st_size).encode(), digest_size=16)
+        with open(source_path, 'rb') as f:
+            digest.update(f.read(self.SAMPLE_BYTES))
+            if stat.st_size > 2 * self.SAMPLE_BYTES:
+                f.seek(-self.SAMPLE_BYTES, os.SEEK_END)
+                digest.update(f.read(self.SAMPLE_BYTES))
+        content_hash = digest.hexdigest()
+        self._hashes.put(memo_key, content_hash)
+        return content_hash
+
+    def proxy_path(self, source_path):
+        """Path the proxy for a source would have (the key includes the output format)"""
+        content_hash = self._content_hash(source_path)
+        return self.cache_dir / f"{content_hash}_{self.width}x{self.height}_{self.fps}_{self.codec}_{self.PRESET}.mp4"
+
+    def get_or_create(self, source_path):
+        """Get the normalized proxy for a source clip, transcoding it on first use"""
+        try:
+            proxy_path = self.proxy_path(source_path)
+            with self._key_locks.hold(proxy_path.name):
+                if proxy_path.exists():
+                    # Bump mtime so eviction treats it as recently used
+                    os.utime(proxy_path)
+                    return proxy_path
+                self._transcode(source_path, proxy_path)
+
+            self._evict()
+            return proxy_path
+        except Exception as e:
+            print(f"Error creating proxy for {source_path}: {e}")
+            return None
+
+    def get_existing(self, source_path):
+        """The proxy for a source if it has already been transcoded, else None (never transcodes)"""
+        try:
+            proxy_path = self.proxy_path(source_path)
+            if not proxy_path.exists():
+                return None
+            # Bump mtime so eviction treats it as recently used
+            os.utime(proxy_path)
+            return proxy_path
+        except OSError:
+            return None
+
+    def schedule(self, source_path):
+        """Transcode a source's proxy in the background, once, so later renders can use it"""
+        try:
+            name = self.proxy_path(source_path).name
+        except OSError:
+            return
+        cls = type(self)
+        with cls._background_lock:
+            if name in cls._pending:
+                return
+            cls._pending.add(name)
+            if cls._background is None:
+                cls._background = ThreadPoolExecutor(max_workers=Config.PROXY_INGEST_WORKERS)
+            background = cls._background
+
+        def transcode():
+            try:
+                self.get_or_create(source_path)
+            finally:
+                with cls._background_lock:
+                    cls._pending.discard(name)
+
+        background.submit(transcode)
+
+    def ingest(self, source_paths):
+        """Transcode many sources ahead of time; returns {source: proxy path or None}"""
+        source_paths = list(source_paths)
+        with ThreadPoolExecutor(max_workers=Config.PROXY_INGEST_WORKERS) as pool:
+            proxies = list(pool.map(self.get_or_create, source_paths))
+        return dict(zip(source_paths, proxies))
+
+    def _transcode(self, source_path, proxy_path):
+        """Scale to cover the frame, center-crop, conform fps and drop audio"""
+        temp_path = proxy_path.with_suffix('.part.mp4')
+        video_filter = (
+            f"scale={self.width}:{self.height}:force_original_aspect_ratio=increase,"
+            f"crop={self.width}:{self.height},setsar=1"
+        )
+        command = [
+            get_setting("FFMPEG_BINARY"), '-y', '-i', str(source_path),
+            '-vf', video_filter, '-an'
+        ] + self.encoding_args(self.fps) + [
+            '-movflags', '+faststart', str(temp_path)
+        ]
+        try:
+            subprocess.run(command, check=True, capture_output=True)
+            os.replace(temp_path, proxy_path)
+        finally:
+            if temp_path.exists():
+                temp_path.unlink()
+
+    def _evict(self):
+        """Delete least recently used proxies until the cache fits its size bound"""
+        with self._lock:
+            evict_lru(self.cache_dir, self.max_bytes, stale_after=Config.STALE_PART_SECONDS)
@@ -1,12 +1,52 @@
+import random
+import re
+import threading
+import time
 import requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from email.utils import parsedate_to_datetime
 from config import Config
+from utils.download_cache import DownloadCache
+from utils.key_locks import KeyLocks
+from utils.memo_cache import MemoCache
+from utils.rate_limiter import TokenBucket
+
+_session = None
+_session_lock = threading.Lock()
+
+# One request budget for the API key, shared by every job in the process
+PEXELS_RATE_LIMITER = TokenBucket(Config.PEXELS_REQUESTS_PER_SECOND, Config.PEXELS_BURST)
+
+def shared_session():
+    """Process-wide requests session, so every job reuses the same kept-alive connections"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=Config.HTTP_POOL_SIZE, pool_maxsize=Config.HTTP_POOL_SIZE)
+            _session.mount('http://', adapter)
+            _session.mount('https://', adapter)
+        return _session
 
 class StockVideoService:
     """Service for searching and downloading stock videos"""
     
-    def __init__(self):
+    def __init__(self, session=None, cache=None, search_cache=None, rate_limiter=None):
         self.pexels_api_key = Config.PEXELS_API_KEY
         self.max_results = Config.PEXELS_MAX_RESULTS
+        self.session = session or shared_session()
+        self.cache = cache or DownloadCache()
+        self.timeout = Config.HTTP_TIMEOUT
+        self.search_url = Config.PEXELS_SEARCH_URL
+        self.search_ttl = Config.PEXELS_SEARCH_TTL
+        # Results per normalized query, timestamped so they expire after search_ttl
+        self.search_cache = search_cache or MemoCache(
+            Config.PEXELS_SEARCH_CACHE_SIZE, db_path=Config.PEXELS_SEARCH_CACHE_PATH, table='pexels_search'
+        )
+        self.rate_limiter = rate_limiter or PEXELS_RATE_LIMITER
+        self._url_locks = KeyLocks()
+        self._query_locks = KeyLocks()
     
     def search_stock_videos(self, keywords, max_results=None):
         """Search for stock videos using Pexels API"""
@@ -31,45 +71,125 @@ class StockVideoService:
                 'orientation': 'landscape'
             }
             
-            response = requests.get(
-                'https://api.pexels.com/videos/search',
-                headers=headers,
-                params=params
-            )
+            cache_key = self._search_key(params)
             
-            if response.status_code == 200:
-                data = response.json()
-                videos = []
-                
-                for video in data.get('videos', []):
-                    # Get the best quality video file
-                    video_files = video.get('video_files', [])
-                    if video_files:
-                        # Prefer HD quality
-                        hd_files = [f for f in video_files if f.get('width', 0) >= Config.VIDEO_WIDTH]
-                        if hd_files:
-                            best_file = min(hd_files, key=lambda x: x.get('width', 0))
-                        else:
-                            best_file = max(video_files, key=lambda x: x.get('width', 0))
-                        
-                        videos.append({
-                            'url': best_file['link'],
-                            'width': best_file.get('width'),
-                            'height': best_file.get('height'),
-                            'duration': video.get('duration'),
-                            'preview': video.get('image'),
-                            'source': 'pexels'
-                        })
-                
-                return videos[:max_results]
-            else:
-                print(f"Pexels API error: {response.status_code}")
-                return self._get_mock_videos(keywords)
+            # Scenes searching the same query at once share one API call
+            with self._query_locks.hold(cache_key):
+                cached = self._cached_search(cache_key)
+                if cached is not None:
+                    return cached
+                response = self._throttled_get(self.search_url, headers, params)
+                videos = self._parse_search(response, max_results) if response.status_code == 200 else None
+                if videos is not None and self.search_ttl > 0:
+                    self.search_cache.put(cache_key, {'stored_at': time.time(), 'videos': videos})
+            
+            if videos is not None:
+                return videos
+            print(f"Pexels API error: {response.status_code}")
+            return self._get_mock_videos(keywords)
                 
         except Exception as e:
             print(f"Error searching videos: {e}")
             return self._get_mock_videos(keywords)
     
+    def _parse_search(self, response, max_results):
+        """Video results from a search response, picking the smallest file at least as wide as the output"""
+        data = response.json()
+        videos = []
+        
+        for video in data.get('videos', []):
+            # Get the best quality video file
+            video_files = video.get('video_files', [])
+            if video_files:
+                # Prefer HD quality
+                hd_files = [f for f in video_files if f.get('width', 0) >= Config.VIDEO_WIDTH]
+                if hd_files:
+                    best_file = min(hd_files, key=lambda x: x.get('width', 0))
+                else:
+                    best_file = max(video_files, key=lambda x: x.get('width', 0))
+                
+                videos.append({
+                    'url': best_file['link'],
+                    'width': best_file.get('width'),
+                    'height': best_file.get('height'),
+                    'duration': video.get('duration'),
+                    'preview': video.get('image'),
+                    'source': 'pexels'
+                })
+        
+        return videos[:max_results]
+    
+    def _search_key(self, params):
+        """Cache key: the query lowercased with whitespace collapsed, plus the result shape"""
+        query = ' '.join(params['query'].lower().split())
+        return f"{query}|{params['per_page']}|{params['orientation']}"
+    
+    def _cached_search(self, cache_key):
+        """Results of an earlier identical query still within the TTL, or None"""
+        if self.search_ttl <= 0:
+            return None
+        entry = self.search_cache.get(cache_key)
+        if entry and time.time() - entry['stored_at'] < self.search_ttl:
+            return entry['videos']
+        return None
+    
+    def _throttled_get(self, url, headers, params):
+        """GET through the shared token bucket, retrying 429 and 5xx with waits taken from the rate-limit headers"""
+        for attempt in range(Config.PEXELS_RETRIES + 1):
+            self.rate_limiter.acquire()
+            try:
+                response = self.session.get(url, headers=headers, params=params, timeout=self.timeout)
+            except requests.RequestException:
+                if attempt == Config.PEXELS_RETRIES:
+                    raise
+                time.sleep(self._backoff(attempt))
+                continue
+            
+            if response.headers.get('X-Ratelimit-Remaining') == '0':
+                # Quota spent: hold back every job until the window resets
+                wait = self._reset_wait(response)
+                if wait and wait <= Config.PEXELS_MAX_RETRY_WAIT:
+                    self.rate_limiter.pause(wait)
+            
+            retryable = response.status_code == 429 or response.status_code >= 500
+            if not retryable or attempt == Config.PEXELS_RETRIES:
+                return response
+            
+            wait = self._retry_after(response)
+            if wait is None:
+                wait = self._backoff(attempt)
+            if wait > Config.PEXELS_MAX_RETRY_WAIT:
+                # Waiting out a long window would stall the render; let the caller fall back
+                return response
+            if response.status_code == 429:
+                self.rate_limiter.pause(wait)
+            else:
+                time.sleep(wait)
+    
+    def _retry_after(self, response):
+        """Seconds the server asked us to wait (Retry-After, else the rate-limit reset), or None"""
+        retry_after = response.headers.get('Retry-After')
+        if retry_after:
+            try:
+                return max(float(retry_after), 0)
+            except ValueError:
+                try:
+                    return max(parsedate_to_datetime(retry_after).timestamp() - time.time(), 0)
+                except (TypeError, ValueError):
+                    pass
+        return self._reset_wait(response)
+    
+    def _reset_wait(self, response):
+        """Seconds until X-Ratelimit-Reset (a Unix timestamp), or None"""
+        try:
+            return max(float(response.headers['X-Ratelimit-Reset']) - time.time(), 0)
+        except (KeyError, ValueError):
+            return None
+    
+    def _backoff(self, attempt):
+        """Exponential backoff with jitter for retries the server gave no wait for"""
+        return min(2 ** attempt, 30) * (0.5 + random.random() / 2)
+    
     def _get_mock_videos(self, keywords):
         """Return mock video data for testing"""
         # These are placeholder URLs - in production you'd use real stock video URLs
@@ -86,27 +206,75 @@ class StockVideoService:
         return mock_videos
     
     def download_video(self, video_url, output_path):
-        """Download video from URL"""
+        """Download video from URL (or a search result) through the cache, resuming interrupted transfers"""
+        if isinstance(video_url, dict):
+            video_url = video_url['url']
         try:
-            response = requests.get(video_url, stream=True)
-            response.raise_for_status()
-            
-            # Convert path to string if it's a Path object
-            output_path_str = str(output_path)
-            
-            with open(output_path_str, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
-            
+            # Jobs picking the same clip wait for one download instead of starting their own
+            with self._url_locks.hold(video_url):
+                if self.cache.fetch(video_url, output_path):
+                    return True
+                self._fetch(video_url, self.cache.part_path(video_url))
+                self.cache.store(video_url, output_path)
             return True
         except Exception as e:
             print(f"Error downloading video: {e}")
             return False
     
+    def download_videos(self, downloads):
+        """Download (video, output_path) pairs concurrently; returns a success flag per pair"""
+        downloads = list(downloads)
+        if not downloads:
+            return []
+        with ThreadPoolExecutor(max_workers=min(Config.DOWNLOAD_WORKERS, len(downloads))) as pool:
+            return list(pool.map(lambda download: self.download_video(*download), downloads))
+    
+    def _fetch(self, video_url, part_path):
+        """Stream a URL into part_path, continuing from its current size with Range after a failure"""
+        last_error = None
+        for attempt in range(Config.DOWNLOAD_RETRIES + 1):
+            if attempt:
+                time.sleep(min(2 ** (attempt - 1), 10))
+            offset = part_path.stat().st_size if part_path.exists() else 0
+            headers = {'Range': f"bytes={offset}-"} if offset else {}
+            try:
+                with self.session.get(video_url, headers=headers, stream=True, timeout=self.timeout) as response:
+                    if response.status_code == 416 and offset:
+                        # Nothing past what we already have
+                        return
+                    response.raise_for_status()
+                    
+                    if response.status_code == 206:
+                        mode = 'ab'
+                        expected = self._total_size(response.headers.get('Content-Range'))
+                    else:
+                        # Server ignored the range: start over
+                        mode = 'wb'
+                        length = response.headers.get('Content-Length')
+                        expected = int(length) if length else None
+                    
+                    with open(part_path, mode) as f:
+                        for chunk in response.iter_content(chunk_size=Config.DOWNLOAD_CHUNK_BYTES):
+                            f.write(chunk)
+                
+                size = part_path.stat().st_size
+                if expected is not None and size != expected:
+                    raise IOError(f"Transfer ended at {size} of {expected} bytes")
+                return
+            except (requests.RequestException, IOError) as e:
+                last_error = e
+                print(f"Download attempt {attempt + 1} for {video_url} failed: {e}")
+        raise last_error
+    
+    def _total_size(self, content_range):
+        """Full size from a 'bytes start-end/total' Content-Range header, if known"""
+        match = re.match(r'bytes \d+-\d+/(\d+)', content_range or '')
+        return int(match.group(1)) if match else None
+    
     def get_video_info(self, video_url):
         """Get information about a video without downloading"""
         try:
-            response = requests.head(video_url)
+            response = self.session.head(video_url, timeout=self.timeout)
             if response.status_code == 200:
                 return {
                     'content_length': response.headers.get('content-length'),
@@ -0,0 +1,53 @@
+import threading
+from collections import OrderedDict
+from moviepy.editor import VideoClip
+from config import Config
+
+class StreamingTimeline:
+    """Scenes laid end to end for MoviePy, each scene's readers open only while its frames are being encoded"""
+
+    def __init__(self, scene_specs, durations, open_scene, transitions, overlap=0, max_open=None):
+        self.scene_specs = scene_specs
+        self.durations = durations
+        self.open_scene = open_scene  # spec -> (clip, [VideoFileClip readers to close])
+        self.transitions = transitions
+        self.overlap = overlap
+        # A dissolve reads two scenes at once
+        self.max_open = max(max_open or Config.MAX_OPEN_READERS, 2 if overlap else 1)
+        self._open = OrderedDict()  # index -> (clip, readers), least recently used first
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.peak_open = 0
+
+    def clip(self):
+        """VideoClip over the whole timeline (video only)"""
+        make_frame, length = self.transitions.timeline_frames(self.scene_frame, self.durations, self.overlap)
+        return VideoClip(make_frame, duration=length)
+
+    def scene_frame(self, index, t):
+        """Frame of one scene at its local time, opening it (and closing the stalest) on first use"""
+        with self._lock:
+            if index in self._open:
+                self._open.move_to_end(index)
+            else:
+                while len(self._open) >= self.max_open:
+                    self._close(next(iter(self._open)))
+                self._open[index] = self.open_scene(self.scene_specs[index])
+                self.opened += 1
+                self.peak_open = max(self.peak_open, len(self._open))
+            # Read under the lock so a scene can't be closed mid-frame
+            return self._open[index][0].get_frame(t)
+
+    def close(self):
+        """Close every scene still open"""
+        with self._lock:
+            for index in list(self._open):
+                self._close(index)
+
+    def _close(self, index):
+        _, readers = self._open.pop(index)
+        for reader in readers:
+            try:
+                reader.close()
+            except Exception as e:
+                print(f"Error closing clip reader: {e}")
@@ -0,0 +1,117 @@
+import numpy as np
+from moviepy.editor import VideoClip
+from config import Config
+
+# Gains are applied as 8.8 fixed point so a fade is one integer multiply and shift per frame
+FULL_GAIN = 256
+
+class TransitionEngine:
+    """Fade and crossfade transitions as precomputed NumPy gains or ffmpeg xfade filters"""
+
+    def __init__(self, style=None, duration=None, fps=None):
+        self.style = style or Config.TRANSITION_STYLE
+        self.duration = Config.TRANSITION_DURATION if duration is None else duration
+        self.fps = fps or Config.VIDEO_FPS
+
+    def sequence_fades(self, count, transition_duration=None):
+        """(fade_in, fade_out) per clip as add_transitions applies them: in on the first, out on the last"""
+        duration = self.duration if transition_duration is None else transition_duration
+        if count <= 1:
+            return [(0, 0)] * count
+        return [
+            (duration if i < count - 1 else 0, duration if i > 0 else 0)
+            for i in range(count)
+        ]
+
+    def overlap_padding(self, count, transition_duration=None):
+        """Extra seconds per scene so crossfade overlaps don't shorten the timeline"""
+        duration = self.duration if transition_duration is None else transition_duration
+        return [duration if i < count - 1 else 0 for i in range(count)]
+
+    def fade_gains(self, clip_duration, fade_in=0, fade_out=0):
+        """Per-frame fixed-point gains for a clip, computed for all frames at once"""
+        frame_count = int(np.ceil(clip_duration * self.fps)) + 1
+        times = np.arange(frame_count) / self.fps
+        gains = np.ones(frame_count)
+        if fade_in:
+            gains = np.minimum(gains, times / fade_in)
+        if fade_out:
+            gains = np.minimum(gains, (clip_duration - times) / fade_out)
+        return np.clip(np.round(gains * FULL_GAIN), 0, FULL_GAIN).astype(np.uint16)
+
+    def apply_fades(self, clip, fade_in=0, fade_out=0):
+        """Fade a clip from/to black; frames outside the fades pass through untouched"""
+        if not fade_in and not fade_out:
+            return clip
+        gains = self.fade_gains(clip.duration, fade_in, fade_out)
+        last_frame = len(gains) - 1
+        fps = self.fps
+
+        def fade(get_frame, t):
+            frame = get_frame(t)
+            gain = gains[min(int(t * fps + 1e-6), last_frame)]
+            if gain >= FULL_GAIN:
+                return frame
+            return ((frame.astype(np.uint16) * gain) >> 8).astype(np.uint8)
+
+        return clip.fl(fade)
+
+    def crossfade_duration(self, durations, transition_duration=None):
+        """Overlap length, capped so no clip is shorter than two overlaps"""
+        duration = self.duration if transition_duration is None else transition_duration
+        if len(durations) < 2:
+            return 0
+        return max(min(duration, min(durations) / 2), 0)
+
+    def crossfade_clips(self, clips, transition_duration=None):
+        """Join clips so each one dissolves into the next over an overlap"""
+        durations = [clip.duration for clip in clips]
+        overlap = self.crossfade_duration(durations, transition_duration)
+        make_frame, total = self.timeline_frames(lambda index, t: clips[index].get_frame(t), durations, overlap)
+        return VideoClip(make_frame, duration=total)
+
+    def timeline_frames(self, scene_frame, durations, overlap=0):
+        """make_frame for scenes laid end to end, dissolving over `overlap` seconds; returns (make_frame, length)
+
+        scene_frame(index, t) supplies a scene's frame at its local time, so scenes need not be open clips.
+        """
+        starts = np.concatenate([[0.0], np.cumsum([d - overlap for d in durations[:-1]])])
+        total = float(starts[-1] + durations[-1])
+
+        def frame_at(index, t):
+            local_t = min(max(t - starts[index], 0), durations[index] - 1e-3)
+            return scene_frame(index, local_t)
+
+        def make_frame(t):
+            index = int(np.searchsorted(starts, t, side='right')) - 1
+            index = min(max(index, 0), len(durations) - 1)
+            frame = frame_at(index, t)
+            into_clip = t - starts[index]
+            if index == 0 or into_clip >= overlap:
+                return frame
+
+            previous = frame_at(index - 1, t)
+            if previous.shape != frame.shape:
+                return frame
+            gain = np.uint16(round(into_clip / overlap * FULL_GAIN))
+            blended = frame.astype(np.uint16) * gain + previous.astype(np.uint16) * (FULL_GAIN - gain)
+            return (blended >> 8).astype(np.uint8)
+
+        return make_frame, total
+
+    def xfade_filtergraph(self, durations, transition_duration=None, labels=None):
+        """filter_complex chaining xfade over labelled streams (default inputs 0..n-1); returns (graph, label, length)"""
+        overlap = self.crossfade_duration(durations, transition_duration)
+        labels = labels or [f'[{i}:v]' for i in range(len(durations))]
+        parts = []
+        previous = labels[0]
+        offset = 0.0
+        for i in range(1, len(durations)):
+            offset += durations[i - 1] - overlap
+            label = f'[xf{i}]'
+            parts.append(
+                f"{previous}{labels[i]}xfade=transition=fade:duration={overlap:.3f}:offset={offset:.3f}{label}"
+            )
+            previous = label
+        length = sum(durations) - overlap * (len(durations) - 1)
+        return ';'.join(parts), previous, length
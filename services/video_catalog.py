@@ -0,0 +1,166 @@
+import os
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from config import Config
+from services.media_probe import MediaProbe
+
+class VideoCatalog:
+    """Persistent SQLite catalog of the local video library, refreshed incrementally"""
+
+    VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv')
+    
+    # Media metadata probed once per file version (NULL, and retried on the next refresh, when probing failed)
+    METADATA_COLUMNS = {
+        'duration': 'REAL',
+        'width': 'INTEGER',
+        'height': 'INTEGER',
+        'fps': 'REAL',
+        'codec': 'TEXT',
+        'has_audio': 'INTEGER'
+    }
+    VIDEO_COLUMNS = 'path, filename, size, ' + ', '.join(METADATA_COLUMNS)
+
+    def __init__(self, videos_dir=None, db_path=None, prober=None):
+        self.videos_dir = videos_dir or Config.VIDEOS_DIR
+        self.db_path = db_path or Config.VIDEO_CATALOG_PATH
+        self.prober = prober or MediaProbe()
+        self._refresh_lock = threading.Lock()
+        self._init_schema()
+
+    @contextmanager
+    def _connect(self):
+        """Open a short-lived connection (safe to use from any render worker thread)"""
+        connection = sqlite3.connect(str(self.db_path), timeout=30)
+        connection.row_factory = sqlite3.Row
+        try:
+            yield connection
+            connection.commit()
+        finally:
+            connection.close()
+
+    def _init_schema(self):
+        """Create the catalog table if it doesn't exist"""
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("""
+                CREATE TABLE IF NOT EXISTS videos (
+                    path TEXT PRIMARY KEY,
+                    filename TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    mtime REAL NOT NULL
+                )
+            """)
+            # Catalogs created before metadata probing lack these columns
+            existing = {row['name'] for row in connection.execute("PRAGMA table_info(videos)")}
+            for column, column_type in self.METADATA_COLUMNS.items():
+                if column not in existing:
+                    connection.execute(f"ALTER TABLE videos ADD COLUMN {column} {column_type}")
+            if 'probed' not in existing:
+                connection.execute("ALTER TABLE videos ADD COLUMN probed INTEGER NOT NULL DEFAULT 0")
+
+    def refresh(self):
+        """Sync the catalog with the videos directory, touching only new, changed or removed files"""
+        with self._refresh_lock:
+            stats = {'added': 0, 'updated': 0, 'removed': 0, 'unchanged': 0}
+
+            on_disk = {}
+            if self.videos_dir.exists():
+                with os.scandir(self.videos_dir) as entries:
+                    for entry in entries:
+                        if entry.is_file() and os.path.splitext(entry.name)[1].lower() in self.VIDEO_EXTENSIONS:
+                            stat = entry.stat()
+                            on_disk[entry.path] = (entry.name, stat.st_size, stat.st_mtime)
+
+            with self._connect() as connection:
+                known = {
+                    row['path']: (row['size'], row['mtime'], row['probed'])
+                    for row in connection.execute("SELECT path, size, mtime, probed FROM videos")
+                }
+
+                changed = []
+                for path, (filename, size, mtime) in on_disk.items():
+                    previous = known.get(path)
+                    if previous is None:
+                        stats['added'] += 1
+                    elif previous != (size, mtime, 1):
+                        stats['updated'] += 1
+                    else:
+                        stats['unchanged'] += 1
+                        continue
+                    changed.append((path, filename, size, mtime))
+
+                removed = [(path,) for path in known if path not in on_disk]
+                stats['removed'] = len(removed)
+
+            # Probe only new or changed files, several at a time
+            with ThreadPoolExecutor(max_workers=Config.PROBE_WORKERS) as pool:
+                probe_results = list(pool.map(self.prober.probe, [path for path, _, _, _ in changed]))
+
+            upserts = []
+            for (path, filename, size, mtime), metadata in zip(changed, probe_results):
+                # A failed probe may be transient (ffprobe busy, file still being copied), so it stays unprobed
+                probed = 1 if metadata else 0
+                metadata = metadata or {}
+                upserts.append(
+                    (path, filename, size, mtime) +
+                    tuple(metadata.get(column) for column in self.METADATA_COLUMNS) + (probed,)
+                )
+
+            with self._connect() as connection:
+                placeholders = ', '.join('?' * (5 + len(self.METADATA_COLUMNS)))
+                connection.executemany(
+                    f"INSERT OR REPLACE INTO videos (path, filename, size, mtime, {', '.join(self.METADATA_COLUMNS)}, probed) "
+                    f"VALUES ({placeholders})",
+                    upserts
+                )
+                connection.executemany("DELETE FROM videos WHERE path = ?", removed)
+
+            return stats
+
+    def _row_to_video(self, row):
+        """Convert a catalog row to the video dict used by the services"""
+        video = {
+            'path': row['path'],
+            'filename': row['filename'],
+            'size': row['size'],
+            'source': 'local'
+        }
+        for column in self.METADATA_COLUMNS:
+            video[column] = row[column]
+        if video['has_audio'] is not None:
+            video['has_audio'] = bool(video['has_audio'])
+        return video
+
+    def list_videos(self):
+        """List all catalogued videos"""
+        with self._connect() as connection:
+            rows = connection.execute(f"SELECT {self.VIDEO_COLUMNS} FROM videos ORDER BY path").fetchall()
+        return [self._row_to_video(row) for row in rows]
+
+    def get_video(self, index):
+        """Get the video at a position in path order, or None if out of range"""
+        if index < 0:
+            return None
+        with self._connect() as connection:
+            row = connection.execute(
+                f"SELECT {self.VIDEO_COLUMNS} FROM videos ORDER BY path LIMIT 1 OFFSET ?",
+                (index,)
+            ).fetchone()
+        return self._row_to_video(row) if row else None
+
+    def random_videos(self, count):
+        """Get up to `count` distinct videos chosen at random"""
+        with self._connect() as connection:
+            rows = connection.execute(
+                f"SELECT {self.VIDEO_COLUMNS} FROM videos ORDER BY RANDOM() LIMIT ?",
+                (count,)
+            ).fetchall()
+        return [self._row_to_video(row) for row in rows]
+
+    def count(self):
+        """Get the number of catalogued videos"""
+        with self._connect() as connection:
+            return connection.execute("SELECT COUNT(*) FROM videos").fetchone()[0]
@@ -1,7 +1,26 @@
-from moviepy.editor import VideoFileClip, AudioFileClip, concatenate_videoclips, ColorClip, TextClip
-from moviepy.editor import CompositeVideoClip
+from moviepy.editor import VideoFileClip, AudioFileClip, concatenate_videoclips, ImageClip
+from moviepy.video.fx.all import crop
+from moviepy.config import get_setting
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
 from config import Config
+from services.media_probe import MediaProbe
+from services.clip_planner import ClipPlanner
+from services.proxy_cache import ProxyCache
+from services.transitions import TransitionEngine
+from services.ffmpeg_timeline import FFmpegTimeline
+from services.hls_stream import HLSStreamWriter
+from services.streaming_timeline import StreamingTimeline
+from utils.subtitles import build_cues, write_webvtt
+from utils.text_renderer import TextRenderer, prepare_overlay, blend_overlay
+import multiprocessing
+import numpy as np
 import os
+import shutil
+import subprocess
+import threading
+import uuid
 import PIL
 
 # Fix for PIL ANTIALIAS deprecation
@@ -12,92 +31,192 @@ try:
         RESAMPLING_MODE = Image.ANTIALIAS
     else:
         RESAMPLING_MODE = Image.LANCZOS
+        # MoviePy's resize still looks up Image.ANTIALIAS, which Pillow 10 removed
+        Image.ANTIALIAS = RESAMPLING_MODE
 except ImportError:
     RESAMPLING_MODE = None
 
+# Shared so placeholder and caption images are rendered once per process, not once per job
+TEXT_RENDERER = TextRenderer()
+
+# One segment render pool for the whole process, shared by concurrent jobs and started on first use
+_SEGMENT_POOL = None
+_SEGMENT_POOL_LOCK = threading.Lock()
+
+def segment_pool():
+    """The process-wide segment render pool (Config.RENDER_PROCESSES workers)"""
+    global _SEGMENT_POOL
+    with _SEGMENT_POOL_LOCK:
+        if _SEGMENT_POOL is None:
+            if 'forkserver' in multiprocessing.get_all_start_methods():
+                # Workers fork from a server that has already imported this module,
+                # not from the (threaded) web server and not from a fresh interpreter
+                context = multiprocessing.get_context('forkserver')
+                context.set_forkserver_preload([__name__])
+            else:
+                context = multiprocessing.get_context('spawn')
+            _SEGMENT_POOL = ProcessPoolExecutor(max_workers=Config.RENDER_PROCESSES, mp_context=context)
+        return _SEGMENT_POOL
+
+def _discard_segment_pool(pool):
+    """Drop a pool whose worker died so the next render starts a fresh one"""
+    global _SEGMENT_POOL
+    with _SEGMENT_POOL_LOCK:
+        if _SEGMENT_POOL is pool:
+            _SEGMENT_POOL = None
+    pool.shutdown(wait=False)
+
 class VideoProcessor:
     """Service for video processing and composition"""
     
-    def __init__(self):
-        self.video_width = Config.VIDEO_WIDTH
-        self.video_height = Config.VIDEO_HEIGHT
-        self.video_fps = Config.VIDEO_FPS
+    def __init__(self, quality='final'):
+        profile = Config.RENDER_QUALITIES[quality]
+        self.quality = quality
+        self.video_width = profile['width']
+        self.video_height = profile['height']
+        self.video_fps = profile['fps']
+        self.preset = profile['preset']
+        self.text_scale = self.video_width / Config.VIDEO_WIDTH  # Keeps text the same share of the frame
         self.video_codec = Config.VIDEO_CODEC
         self.audio_codec = Config.AUDIO_CODEC
         self.max_clip_duration = Config.MAX_CLIP_DURATION
+        self.parallel_segments = Config.PARALLEL_SEGMENT_RENDER
+        self.streaming_assembly = Config.STREAMING_ASSEMBLY
+        self.proxy_cache = ProxyCache() if Config.USE_PROXY_CACHE else None
+        # Proxies are encoded at the final size; other tiers still read them but must rescale
+        self.proxies_match = bool(self.proxy_cache) and (
+            (self.proxy_cache.width, self.proxy_cache.height, self.proxy_cache.fps)
+            == (self.video_width, self.video_height, self.video_fps)
+        )
+        self.media_probe = MediaProbe()
+        self.clip_planner = ClipPlanner()
+        self.text_renderer = TEXT_RENDERER
+        self.transitions = TransitionEngine(fps=self.video_fps)
+        self.render_backend = Config.RENDER_BACKEND
+        self.ffmpeg_timeline = FFmpegTimeline(
+            self.media_probe, self.clip_planner, self.text_renderer, self.transitions,
+            width=self.video_width, height=self.video_height, fps=self.video_fps
+        )
     
-    def create_video(self, script_analysis, voiceover_path, output_path, video_service):
-        """Create final video by combining clips and voiceover"""
+    def create_video(self, script_analysis, voiceover_path, output_path, video_service, sentence_timings=None, caption_mode='none', render_backend=None, stream_dir=None):
+        """Create final video by combining clips and voiceover (caption_mode: 'burn', 'soft' or 'none').
+        
+        stream_dir publishes scenes as HLS while rendering, which always uses the per-scene segment path.
+        """
         try:
-            video_clips = []
+            scene_specs = []
             temp_files = []
+            job_tag = uuid.uuid4().hex[:8]  # Keeps temp clips of concurrent jobs apart
             
-            # Process each sentence
+            # Size every scene to the narration up front so no unused frames are decoded
+            transition_duration = Config.TRANSITION_DURATION
+            target_durations = self._plan_scene_durations(
+                [analysis['sentence'] for analysis in script_analysis], voiceover_path, sentence_timings
+            )
+            if target_durations and self.transitions.style == 'crossfade':
+                # Overlapping scenes would otherwise end before the narration does
+                padding = self.transitions.overlap_padding(len(target_durations), transition_duration)
+                target_durations = [duration + pad for duration, pad in zip(target_durations, padding)]
+            
+            # Pick a source for each sentence
+            downloads = []
             for i, analysis in enumerate(script_analysis):
                 # Search for videos based on keywords
                 videos = video_service.search_stock_videos(analysis['keywords'])
                 
+                # Fall back to a placeholder clip if no video is found or download fails
+                spec = {'kind': 'placeholder', 'text': analysis['sentence']}
+                
                 if videos:
                     # Use the first video
                     video_info = videos[0]
-                    temp_video_path = Config.TEMP_DIR / f"clip_{i}.mp4"
+                    temp_video_path = Config.TEMP_DIR / f"clip_{job_tag}_{i}.mp4"
+                    is_local = video_info.get('source') == 'local'
+                    local_path = video_service.get_local_path(video_info) if is_local else None
+                    proxy_path = self._get_proxy(local_path) if local_path else None
                     
-                    if video_service.download_video(video_info, str(temp_video_path)):
-                        temp_files.append(temp_video_path)
-                        
-                        # Load video clip
-                        clip = VideoFileClip(str(temp_video_path))
-                        
-                        # Resize to standard format with error handling
-                        try:
-                            clip = clip.resize(width=self.video_width, height=self.video_height)
-                        except Exception as resize_error:
-                            print(f"Resize error, using original size: {resize_error}")
-                            # Use original size if resize fails
-                        
-                        # Handle short clips better
-                        original_duration = clip.duration
-                        print(f"Video duration: {original_duration:.2f}s")
-                        
-                        if original_duration < 3.0:
-                            # For very short clips, use a better approach
-                            print(f"Short clip detected ({original_duration:.2f}s), using smooth extension")
-                            target_duration = min(self.max_clip_duration, 4.0)  # Cap at 4 seconds
-                            
-                            if original_duration < 1.0:
-                                # For extremely short clips, slow down more
-                                speed_factor = original_duration / target_duration
-                                clip = clip.speedx(speed_factor)
-                            else:
-                                # For moderately short clips, use a gentler approach
-                                # Create a loop that fades in/out smoothly
-                                loop_count = int(target_duration / original_duration) + 1
-                                clips_list = [clip] * loop_count
-                                extended_clip = concatenate_videoclips(clips_list)
-                                clip = extended_clip.subclip(0, target_duration)
-                        else:
-                            # For longer clips, limit duration normally
-                            max_duration = min(self.max_clip_duration, clip.duration)
-                            clip = clip.subclip(0, max_duration)
-                        
-                        video_clips.append(clip)
+                    if proxy_path:
+                        # Library clip already transcoded to the output format
+                        spec = {'kind': 'clip', 'path': str(proxy_path), 'normalized': self.proxies_match, 'fit_duration': True}
+                    elif local_path:
+                        # Read library clips in place instead of copying them to temp
+                        spec = {'kind': 'clip', 'path': local_path, 'fit_duration': True}
                     else:
-                        # If download fails, create a placeholder clip
-                        placeholder_clip = self._create_placeholder_clip(analysis['sentence'])
-                        video_clips.append(placeholder_clip)
-                else:
-                    # Create placeholder clip if no videos found
-                    placeholder_clip = self._create_placeholder_clip(analysis['sentence'])
-                    video_clips.append(placeholder_clip)
+                        downloads.append((i, video_info, temp_video_path))
+                    if local_path and video_info.get('source_duration'):
+                        # Already probed by the catalog, so the renderer needn't probe it again
+                        spec['source_duration'] = video_info['source_duration']
+                
+                if target_durations:
+                    spec['target_duration'] = target_durations[i]
+                scene_specs.append(spec)
+            
+            # Remote clips for all scenes download together, through the service's pool if it has one
+            if hasattr(video_service, 'download_videos'):
+                downloaded = video_service.download_videos([(info, str(path)) for _, info, path in downloads])
+            else:
+                downloaded = [video_service.download_video(info, str(path)) for _, info, path in downloads]
+            for (i, _, temp_video_path), ok in zip(downloads, downloaded):
+                if ok:
+                    temp_files.append(temp_video_path)
+                    spec = {'kind': 'clip', 'path': str(temp_video_path), 'fit_duration': True}
+                    if target_durations:
+                        spec['target_duration'] = target_durations[i]
+                    scene_specs[i] = spec
             
-            if not video_clips:
+            if not scene_specs:
                 raise Exception("No video clips available")
             
-            # Add transitions between clips
-            video_clips_with_transitions = self.add_transitions(video_clips, transition_duration=0.3)
+            scene_texts = [analysis['sentence'] for analysis in script_analysis]
+            self._assign_captions(scene_specs, scene_texts, caption_mode)
+            subtitle_texts = scene_texts if caption_mode == 'soft' else None
             
-            # Concatenate all video clips
-            final_video = concatenate_videoclips(video_clips_with_transitions)
+            if (render_backend or self.render_backend) == 'ffmpeg' and not stream_dir:
+                try:
+                    return self._render_with_ffmpeg(
+                        self._with_fades(scene_specs, transition_duration), voiceover_path, output_path,
+                        transition_duration=transition_duration, subtitle_texts=subtitle_texts
+                    )
+                finally:
+                    for temp_file in temp_files:
+                        if temp_file.exists():
+                            temp_file.unlink()
+            
+            if self.parallel_segments or stream_dir:
+                try:
+                    return self._render_with_segments(
+                        scene_specs, voiceover_path, output_path, transition_duration=transition_duration,
+                        subtitle_texts=subtitle_texts, stream_dir=stream_dir
+                    )
+                finally:
+                    for temp_file in temp_files:
+                        if temp_file.exists():
+                            temp_file.unlink()
+            
+            crossfade = self.transitions.style == 'crossfade' and len(scene_specs) > 1
+            if self.streaming_assembly:
+                # Each scene's reader opens when the encoder reaches it and closes once it has moved on,
+                # so memory and open files stay flat however long the script is
+                timeline = self._streaming_timeline(
+                    self._with_fades(scene_specs, transition_duration), transition_duration if crossfade else 0
+                )
+                video_clips = [timeline]
+                scene_durations = timeline.durations
+                final_video = timeline.clip()
+            else:
+                video_clips = [self._build_scene_clip(spec) for spec in scene_specs]
+                scene_durations = [clip.duration for clip in video_clips]
+                
+                if crossfade:
+                    # Overlap neighbouring clips and dissolve between them
+                    final_video = self.transitions.crossfade_clips(video_clips, transition_duration)
+                else:
+                    # Add transitions between clips
+                    if self.transitions.style == 'fade':
+                        video_clips = self.add_transitions(video_clips, transition_duration=transition_duration)
+                    
+                    # Concatenate all video clips
+                    final_video = concatenate_videoclips(video_clips)
             
             # Load voiceover (with fallback to silent audio)
             try:
@@ -123,9 +242,15 @@ class VideoProcessor:
                 str(output_path),
                 fps=self.video_fps,
                 codec=self.video_codec,
-                audio_codec=self.audio_codec
+                audio_codec=self.audio_codec,
+                preset=self._preset('medium')
             )
             
+            if subtitle_texts:
+                self._add_subtitle_track(
+                    output_path, subtitle_texts, self._timeline_durations(scene_durations, transition_duration)
+                )
+            
             # Clean up
             final_video.close()
             try:
@@ -149,71 +274,424 @@ class VideoProcessor:
             print(f"Error creating video: {e}")
             return False
     
-    def _create_placeholder_clip(self, text):
-        """Create a placeholder video clip with text"""
-        # Create a black background
-        clip = ColorClip(size=(self.video_width, self.video_height), color=(0, 0, 0), duration=3)
+    def _plan_scene_durations(self, scene_texts, voiceover_path, sentence_timings=None):
+        """Per-scene durations that add up to the voiceover, or None if its length is unknown"""
+        if not os.path.exists(str(voiceover_path)):
+            return None
+        metadata = self.media_probe.probe_audio(voiceover_path)
+        if not metadata or not metadata.get('duration'):
+            return None
+        return self.clip_planner.scene_durations(scene_texts, metadata['duration'], sentence_timings)
+    
+    def _with_fades(self, scene_specs, transition_duration):
+        """Scene specs carrying the fades add_transitions applies, for paths that fade each scene as it is built"""
+        if self.transitions.style != 'fade':
+            return scene_specs
+        fades = self.transitions.sequence_fades(len(scene_specs), transition_duration)
+        return [
+            dict(spec, fade_in=fade_in, fade_out=fade_out)
+            for spec, (fade_in, fade_out) in zip(scene_specs, fades)
+        ]
+    
+    def _assign_captions(self, scene_specs, scene_texts, caption_mode):
+        """Mark scenes for burned-in captions (placeholders already show their text)"""
+        if caption_mode != 'burn':
+            return
+        for spec, text in zip(scene_specs, scene_texts):
+            if spec['kind'] == 'clip' and text:
+                spec['caption'] = text
+    
+    def _build_scene_clip(self, spec, normalize=False, audio=None, readers=None):
+        """Build the clip for one scene spec ('clip' file or text 'placeholder'); opened files are added to readers"""
+        if spec['kind'] == 'placeholder':
+            clip = self._create_placeholder_clip(spec['text'], duration=spec.get('target_duration', 3))
+        else:
+            clip = VideoFileClip(spec['path'], audio=not normalize if audio is None else audio)
+            if readers is not None:
+                readers.append(clip)
+            
+            if spec.get('normalized'):
+                # Proxy is already at the output size
+                pass
+            elif normalize:
+                # Segments must share one exact frame size to be joined without re-encoding
+                clip = self._fill_frame(clip)
+            else:
+                # Resize to standard format with error handling
+                try:
+                    clip = clip.resize(width=self.video_width, height=self.video_height)
+                except Exception as resize_error:
+                    print(f"Resize error, using original size: {resize_error}")
+                    # Use original size if resize fails
+            
+            if spec.get('target_duration'):
+                clip = self._apply_clip_plan(clip, spec['target_duration'])
+            elif spec.get('fit_duration'):
+                clip = self._fit_clip_duration(clip)
+            
+            if spec.get('caption'):
+                # Blended here so captions cost no extra decode/encode pass
+                clip = self._overlay_caption(clip, spec['caption'])
+        
+        return self.transitions.apply_fades(clip, spec.get('fade_in', 0), spec.get('fade_out', 0))
+    
+    def _scene_duration(self, spec):
+        """Length _build_scene_clip will give a scene, known without opening the clip"""
+        if spec['kind'] == 'placeholder':
+            return spec.get('target_duration', 3)
+        if spec.get('target_duration'):
+            return spec['target_duration']
+        source_duration = self._source_duration(spec)
+        if spec.get('fit_duration'):
+            return self.clip_planner.default_duration(source_duration)
+        return source_duration
+    
+    def _source_duration(self, spec):
+        """Length of a clip scene's source, from the catalog when known, else probed"""
+        if spec.get('source_duration'):
+            return spec['source_duration']
+        metadata = self.media_probe.probe(spec['path'])
+        if not metadata or not metadata.get('duration'):
+            raise ValueError(f"Could not read duration of {spec['path']}")
+        return metadata['duration']
+    
+    def _streaming_timeline(self, scene_specs, crossfade_duration=0):
+        """Lazily opened timeline over scene specs (video only; the voiceover replaces clip audio)"""
+        durations = [self._scene_duration(spec) for spec in scene_specs]
+        overlap = self.transitions.crossfade_duration(durations, crossfade_duration) if crossfade_duration else 0
+        
+        def open_scene(spec):
+            readers = []
+            # The encoder takes its frame size from the first scene, so every scene must fill that exact frame
+            return self._build_scene_clip(spec, normalize=True, audio=False, readers=readers), readers
+        
+        return StreamingTimeline(scene_specs, durations, open_scene, self.transitions, overlap=overlap)
+    
+    def _apply_clip_plan(self, clip, target_duration):
+        """Cut a clip to the planned spans; the length comes from the header, not from decoding"""
+        plan = self.clip_planner.plan_clip(clip.duration, target_duration)
+        if plan is None:
+            print(f"Clip has no usable duration ({clip.duration}), using a placeholder")
+            return self._create_placeholder_clip('', duration=target_duration)
+        parts = [clip.subclip(start, end) for start, end in plan['spans']]
+        planned = parts[0] if len(parts) == 1 else concatenate_videoclips(parts)
+        if plan['speed'] != 1.0:
+            planned = planned.speedx(plan['speed'])
+        return planned.set_duration(target_duration)
+    
+    def _fit_clip_duration(self, clip):
+        """Extend short clips and trim long ones to the scene length"""
+        original_duration = clip.duration
+        if not original_duration or original_duration <= 0:
+            return self._apply_clip_plan(clip, self.clip_planner.default_duration(0))
+        print(f"Video duration: {original_duration:.2f}s")
+        
+        if original_duration < 3.0:
+            # Short clips are slowed down (under 1s) or looped by the planner, never past the cap
+            print(f"Short clip detected ({original_duration:.2f}s), using smooth extension")
+            target_duration = min(self.max_clip_duration, 4.0)  # Cap at 4 seconds
+        else:
+            # For longer clips, limit duration normally
+            target_duration = min(self.max_clip_duration, original_duration)
+        
+        # Planned spans cover exactly the target, instead of concatenating whole copies and cutting them back
+        return self._apply_clip_plan(clip, target_duration)
+    
+    def _fill_frame(self, clip):
+        """Scale a clip to cover the output frame and center-crop the overflow"""
+        if clip.w == self.video_width and clip.h == self.video_height:
+            return clip
+        scale = max(self.video_width / clip.w, self.video_height / clip.h)
+        new_size = (
+            max(self.video_width, round(clip.w * scale)),
+            max(self.video_height, round(clip.h * scale))
+        )
+        clip = clip.resize(newsize=new_size)
+        return crop(
+            clip,
+            x_center=clip.w / 2,
+            y_center=clip.h / 2,
+            width=self.video_width,
+            height=self.video_height
+        )
+    
+    def _render_with_segments(self, scene_specs, voiceover_path, output_path, transition_duration=0, subtitle_texts=None, stream_dir=None):
+        """Render scenes to normalized segments in parallel, then join them (by stream copy unless crossfading).
         
-        # Add text with enhanced compatibility fix for newer Pillow versions
+        With stream_dir, each finished scene is also published there as an HLS segment while the rest render.
+        """
+        segment_dir = Config.TEMP_DIR / f"segments_{uuid.uuid4().hex}"
+        segment_dir.mkdir(parents=True, exist_ok=True)
         try:
-            # Try with method='caption' first
-            text_clip = TextClip(
-                text,
-                fontsize=40,
-                color='white',
-                size=(1200, None),
-                method='caption'
-            ).set_position('center').set_duration(3)
-        except Exception as e:
-            try:
-                # Fallback without method parameter
-                text_clip = TextClip(
-                    text,
-                    fontsize=30,
-                    color='white',
-                    size=(self.video_width-100, None)
-                ).set_position('center').set_duration(3)
-            except Exception as e2:
+            specs = [dict(spec) for spec in scene_specs]
+            crossfade = bool(transition_duration) and len(specs) > 1 and self.transitions.style == 'crossfade'
+            if transition_duration and len(specs) > 1 and self.transitions.style == 'fade':
+                # Same fades add_transitions gives the MoviePy path, applied inside each segment
+                for spec, (fade_in, fade_out) in zip(specs, self.transitions.sequence_fades(len(specs), transition_duration)):
+                    spec['fade_in'] = fade_in
+                    spec['fade_out'] = fade_out
+            
+            segment_paths = []
+            durations = [None] * len(specs)
+            render_jobs = []
+            for i, spec in enumerate(specs):
+                # Every scene is trimmed to the narration, so each one is encoded (proxies just decode faster)
+                segment_path = segment_dir / f"segment_{i:04d}.mp4"
+                segment_paths.append(segment_path)
+                render_jobs.append((i, spec, str(segment_path)))
+            
+            stream = None
+            if stream_dir:
+                # The playlist's target duration is fixed up front from the planned scene lengths
+                planned = max(self._scene_duration(spec) for spec in specs)
+                stream = HLSStreamWriter(stream_dir, voiceover_path, max_segment_duration=planned)
+            if render_jobs:
+                pool = segment_pool()
                 try:
-                    # Third fallback - try with minimal parameters
-                    text_clip = TextClip(
-                        text,
-                        fontsize=24,
-                        color='white'
-                    ).set_position('center').set_duration(3)
-                except Exception as e3:
-                    # Final fallback - create simple color clip without text
-                    print(f"TextClip creation failed completely: {e3}")
-                    # Return just the background clip without text
-                    return clip
+                    # map yields in scene order, so each scene is published as soon as it and all before it are done
+                    rendered = pool.map(
+                        _render_segment,
+                        [spec for _, spec, _ in render_jobs],
+                        [path for _, _, path in render_jobs],
+                        [self.quality] * len(render_jobs)
+                    )
+                    for (i, _, _), duration in zip(render_jobs, rendered):
+                        durations[i] = duration
+                        if stream:
+                            self._publish_ready(stream, segment_paths, durations, transition_duration if crossfade else 0)
+                except BrokenProcessPool:
+                    _discard_segment_pool(pool)
+                    raise
+            if stream:
+                self._publish_ready(stream, segment_paths, durations, transition_duration if crossfade else 0)
+            
+            subtitles_path = None
+            if subtitle_texts:
+                timeline = self._timeline_durations(durations, transition_duration) if crossfade else durations
+                subtitles_path = write_webvtt(
+                    build_cues(subtitle_texts, timeline), Path(output_path).with_suffix('.vtt')
+                )
+            if crossfade:
+                self._xfade_segments(
+                    segment_paths, durations, voiceover_path, output_path, subtitles_path, transition_duration
+                )
+            else:
+                self._concat_segments(segment_paths, sum(durations), voiceover_path, output_path, subtitles_path)
+            if stream:
+                # Closed only once the final file exists; a failed join leaves the playlist open
+                stream.finish()
+            return True
+        except Exception as e:
+            print(f"Error rendering segments: {e}")
+            return False
+        finally:
+            shutil.rmtree(segment_dir, ignore_errors=True)
+    
+    def _publish_ready(self, stream, segment_paths, durations, overlap=0):
+        """Add the finished scenes that follow the last published one to the HLS stream"""
+        count = len(stream.entries)
+        while count < len(durations) and durations[count] is not None:
+            duration = durations[count]
+            if overlap and count < len(durations) - 1:
+                # Segments are cut without the crossfade, so drop the overlap the final join would share
+                duration = max(duration - overlap, 1 / self.video_fps)
+            stream.add_segment(segment_paths[count], duration)
+            count += 1
+    
+    def _render_with_ffmpeg(self, scene_specs, voiceover_path, output_path, transition_duration=0, subtitle_texts=None):
+        """Render the whole timeline (trims, loops, scaling, text, fades, audio) in one ffmpeg invocation"""
+        work_dir = Config.TEMP_DIR / f"timeline_{uuid.uuid4().hex}"
+        work_dir.mkdir(parents=True, exist_ok=True)
+        try:
+            crossfade = bool(transition_duration) and len(scene_specs) > 1 and self.transitions.style == 'crossfade'
+            timeline = self.ffmpeg_timeline.build(scene_specs, work_dir, transition_duration if crossfade else 0)
+            
+            subtitles_path = None
+            if subtitle_texts:
+                durations = timeline['durations']
+                timeline_durations = self._timeline_durations(durations, transition_duration) if crossfade else durations
+                subtitles_path = write_webvtt(
+                    build_cues(subtitle_texts, timeline_durations), Path(output_path).with_suffix('.vtt')
+                )
+            
+            input_args, output_args = self._extra_track_args(timeline['input_count'], voiceover_path, subtitles_path)
+            command = [get_setting("FFMPEG_BINARY"), '-y'] + timeline['inputs'] + input_args
+            command += ['-filter_complex', timeline['graph'], '-map', timeline['video_label']] + output_args
+            command += [
+                '-c:v', self.video_codec, '-pix_fmt', 'yuv420p', '-preset', self._preset('medium'), '-r', str(self.video_fps),
+                '-t', f"{timeline['length']:.3f}", '-movflags', '+faststart', str(output_path)
+            ]
+            
+            subprocess.run(command, check=True, capture_output=True)
+            return True
+        except subprocess.CalledProcessError as e:
+            print(f"Error rendering with ffmpeg: {e.stderr.decode(errors='replace')[-2000:]}")
+            return False
+        except Exception as e:
+            print(f"Error rendering with ffmpeg: {e}")
+            return False
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    
+    def _preset(self, default):
+        """x264 preset for an encode: the quality tier's, else the path's own default"""
+        return self.preset or default
+    
+    def _get_proxy(self, source_path):
+        """Get the normalized proxy for a library clip if it already exists, or None (render from the source)"""
+        if not self.proxy_cache or not source_path or not os.path.exists(source_path):
+            return None
+        proxy_path = self.proxy_cache.get_existing(source_path)
+        if proxy_path is None:
+            # Transcoding the whole clip here would stall this render; have it ready for the next one
+            self.proxy_cache.schedule(source_path)
+        return proxy_path
+    
+    def _concat_segments(self, segment_paths, duration, voiceover_path, output_path, subtitles_path=None):
+        """Join identically encoded segments with the concat demuxer and mux in the voiceover and subtitles"""
+        list_path = Path(segment_paths[0]).parent / "segments.txt"
+        with open(list_path, 'w') as f:
+            for segment_path in segment_paths:
+                escaped = Path(segment_path).resolve().as_posix().replace("'", "'\\''")
+                f.write(f"file '{escaped}'\n")
+        
+        command = [get_setting("FFMPEG_BINARY"), '-y', '-f', 'concat', '-safe', '0', '-i', str(list_path)]
+        input_args, output_args = self._extra_track_args(1, voiceover_path, subtitles_path)
+        command += input_args + ['-map', '0:v'] + output_args
+        command += ['-c:v', 'copy', '-t', f"{duration:.3f}", '-movflags', '+faststart', str(output_path)]
+        
+        subprocess.run(command, check=True, capture_output=True)
+    
+    def _xfade_segments(self, segment_paths, durations, voiceover_path, output_path, subtitles_path, transition_duration):
+        """Join segments with overlapping crossfades in one ffmpeg filtergraph pass"""
+        graph, video_label, length = self.transitions.xfade_filtergraph(durations, transition_duration)
+        command = [get_setting("FFMPEG_BINARY"), '-y']
+        for segment_path in segment_paths:
+            command += ['-i', str(segment_path)]
+        input_args, output_args = self._extra_track_args(len(segment_paths), voiceover_path, subtitles_path)
+        command += input_args + ['-filter_complex', graph, '-map', video_label] + output_args
+        command += [
+            '-c:v', self.video_codec, '-pix_fmt', 'yuv420p', '-preset', self._preset('veryfast'),
+            '-t', f"{length:.3f}", '-movflags', '+faststart', str(output_path)
+        ]
         
-        # Combine background and text
+        subprocess.run(command, check=True, capture_output=True)
+    
+    def _extra_track_args(self, first_index, voiceover_path, subtitles_path):
+        """ffmpeg input and output args adding the voiceover and subtitle tracks after the video inputs"""
+        input_args = []
+        output_args = []
+        next_index = first_index
+        if os.path.exists(str(voiceover_path)):
+            input_args += ['-i', str(voiceover_path)]
+            output_args += ['-map', f"{next_index}:a", '-c:a', self.audio_codec]
+            next_index += 1
+        else:
+            print(f"Voiceover file not found: {voiceover_path}")
+        if subtitles_path:
+            input_args += ['-i', str(subtitles_path)]
+            output_args += ['-map', f"{next_index}:s", '-c:s', 'mov_text']
+        return input_args, output_args
+    
+    def _timeline_durations(self, durations, transition_duration):
+        """How long each scene holds the screen once crossfade overlaps are taken out"""
+        if self.transitions.style != 'crossfade' or len(durations) < 2:
+            return durations
+        overlap = self.transitions.crossfade_duration(durations, transition_duration)
+        return [duration - overlap for duration in durations[:-1]] + [durations[-1]]
+    
+    def _add_subtitle_track(self, video_path, scene_texts, durations):
+        """Write per-scene cues as a WebVTT sidecar and mux them into the video as mov_text"""
+        subtitles_path = write_webvtt(build_cues(scene_texts, durations), Path(video_path).with_suffix('.vtt'))
+        self._mux_subtitles(video_path, subtitles_path, video_path)
+        return subtitles_path
+    
+    def _mux_subtitles(self, video_path, subtitles_path, output_path):
+        """Add a soft subtitle track; audio and video are stream-copied, not re-encoded"""
+        temp_path = Path(output_path).with_suffix('.subs.mp4')
+        command = [
+            get_setting("FFMPEG_BINARY"), '-y', '-i', str(video_path), '-i', str(subtitles_path),
+            '-map', '0:v', '-map', '0:a?', '-map', '1:s',
+            '-c:v', 'copy', '-c:a', 'copy', '-c:s', 'mov_text', '-movflags', '+faststart', str(temp_path)
+        ]
+        try:
+            subprocess.run(command, check=True, capture_output=True)
+            os.replace(temp_path, output_path)
+        finally:
+            if temp_path.exists():
+                temp_path.unlink()
+    
+    def _burn_subtitles(self, video_path, subtitles_path, output_path):
+        """Render subtitles into the frames in a single ffmpeg pass (audio is stream-copied)"""
+        # Filter arguments treat ':' and quotes as syntax, so escape them in the path
+        escaped = Path(subtitles_path).resolve().as_posix().replace(':', '\\:').replace("'", "\\'")
+        temp_path = Path(output_path).with_suffix('.burn.mp4')
+        command = [
+            get_setting("FFMPEG_BINARY"), '-y', '-i', str(video_path),
+            '-vf', f"subtitles='{escaped}':force_style='Fontsize={Config.CAPTION_FONT_SIZE // 2},MarginV=30'",
+            '-c:v', self.video_codec, '-pix_fmt', 'yuv420p', '-preset', 'veryfast',
+            '-c:a', 'copy', '-movflags', '+faststart', str(temp_path)
+        ]
         try:
-            final_clip = clip.set_make_frame(lambda t: text_clip.get_frame(t))
-            return final_clip
+            subprocess.run(command, check=True, capture_output=True)
+            os.replace(temp_path, output_path)
+        finally:
+            if temp_path.exists():
+                temp_path.unlink()
+    
+    def _overlay_caption(self, clip, text):
+        """Blend a pre-rendered caption onto each frame of a scene clip"""
+        try:
+            rendered = self.text_renderer.render(
+                text, size=round(Config.CAPTION_FONT_SIZE * self.text_scale), color=Config.CAPTION_COLOR,
+                max_width=clip.w - round(100 * self.text_scale)
+            )
         except Exception as e:
-            print(f"Error combining text with background: {e}")
+            print(f"Caption creation failed: {e}")
             return clip
+        
+        overlay = prepare_overlay(rendered)
+        x = (clip.w - rendered.shape[1]) // 2
+        y = clip.h - rendered.shape[0] - round(30 * self.text_scale)
+        return clip.fl_image(lambda frame: blend_overlay(frame, overlay, x, y))
+    
+    def _create_placeholder_clip(self, text, duration=3):
+        """Create a placeholder video clip with text"""
+        # Black background with the text composited once; every frame reuses the same image
+        frame = np.zeros((self.video_height, self.video_width, 3), dtype=np.uint8)
+        try:
+            rendered = self.text_renderer.render(
+                text, size=round(40 * self.text_scale), color='white',
+                max_width=round(min(1200, Config.VIDEO_WIDTH - 100) * self.text_scale)
+            )
+            frame = blend_overlay(
+                frame,
+                prepare_overlay(rendered),
+                (self.video_width - rendered.shape[1]) // 2,
+                (self.video_height - rendered.shape[0]) // 2
+            )
+        except Exception as e:
+            # Fall back to the plain background
+            print(f"Text rendering failed: {e}")
+        return ImageClip(frame).set_duration(duration)
     
     def add_transitions(self, clips, transition_duration=0.5):
         """Add fade transitions between video clips"""
         if len(clips) <= 1:
             return clips
         
-        # Add crossfade transitions between clips
-        from moviepy.video.compositing.transitions import crossfadein
-        
+        # Gains are precomputed per clip; frames outside the fades are passed through untouched
         final_clips = []
         for i, clip in enumerate(clips):
             if i == 0:
                 # First clip - add fade in
-                clip = clip.fadein(transition_duration)
+                clip = self.transitions.apply_fades(clip, fade_in=transition_duration)
             elif i == len(clips) - 1:
                 # Last clip - add fade out
-                clip = clip.fadeout(transition_duration)
+                clip = self.transitions.apply_fades(clip, fade_out=transition_duration)
             else:
                 # Middle clips - add both fade in and out
-                clip = clip.fadein(transition_duration).fadeout(transition_duration)
+                clip = self.transitions.apply_fades(clip, transition_duration, transition_duration)
             
             final_clips.append(clip)
         
@@ -250,40 +728,123 @@ class VideoProcessor:
             print(f"Error merging clips: {e}")
             return False
     
-    def merge_clips_with_voiceover(self, video_clips, voiceover_path, output_path):
-        """Merge video clips and add voiceover as audio track."""
+    def merge_clips_with_voiceover(self, video_clips, voiceover_path, output_path, scene_texts=None, sentence_timings=None, caption_mode='none', render_backend=None, stream_dir=None, clip_durations=None):
+        """Merge video clips and add voiceover as audio track (caption_mode: 'burn', 'soft' or 'none'; stream_dir as in create_video).
+        
+        clip_durations, when given, are the clips' already known lengths (None where unknown), so they aren't probed again.
+        """
         from moviepy.editor import VideoFileClip, AudioFileClip, concatenate_videoclips
+        # Trim each clip to its share of the narration instead of using it whole
+        transition_duration = Config.TRANSITION_DURATION
+        target_durations = self._plan_scene_durations(
+            scene_texts or [''] * len(video_clips), voiceover_path, sentence_timings
+        )
+        if target_durations and self.transitions.style == 'crossfade':
+            # Overlapping scenes would otherwise end before the narration does
+            padding = self.transitions.overlap_padding(len(target_durations), transition_duration)
+            target_durations = [duration + pad for duration, pad in zip(target_durations, padding)]
+        
+        scene_specs = []
+        for i, clip in enumerate(video_clips):
+            proxy_path = self._get_proxy(str(clip))
+            if proxy_path:
+                spec = {'kind': 'clip', 'path': str(proxy_path), 'normalized': self.proxies_match}
+            else:
+                spec = {'kind': 'clip', 'path': str(clip)}
+            if clip_durations and clip_durations[i]:
+                spec['source_duration'] = clip_durations[i]
+            if target_durations:
+                spec['target_duration'] = target_durations[i]
+            scene_specs.append(spec)
+        
+        if scene_texts:
+            self._assign_captions(scene_specs, scene_texts, caption_mode)
+        subtitle_texts = scene_texts if scene_texts and caption_mode == 'soft' else None
+        
+        if (render_backend or self.render_backend) == 'ffmpeg' and not stream_dir:
+            return self._render_with_ffmpeg(
+                self._with_fades(scene_specs, transition_duration), voiceover_path, output_path,
+                transition_duration=transition_duration, subtitle_texts=subtitle_texts
+            )
+        if self.parallel_segments or stream_dir:
+            return self._render_with_segments(
+                scene_specs, voiceover_path, output_path, transition_duration=transition_duration,
+                subtitle_texts=subtitle_texts, stream_dir=stream_dir
+            )
+        crossfade = self.transitions.style == 'crossfade' and len(scene_specs) > 1
+        clips = []
         try:
-            clips = [VideoFileClip(clip) for clip in video_clips]
-            final_clip = concatenate_videoclips(clips, method="compose")
+            if self.streaming_assembly:
+                # Readers open scene by scene during the encode instead of all up front
+                timeline = self._streaming_timeline(
+                    self._with_fades(scene_specs, transition_duration), transition_duration if crossfade else 0
+                )
+                clips = [timeline]
+                scene_durations = timeline.durations
+                final_clip = timeline.clip()
+            else:
+                clips = [self._build_scene_clip(spec) for spec in scene_specs]
+                scene_durations = [clip.duration for clip in clips]
+                if crossfade:
+                    final_clip = self.transitions.crossfade_clips(clips, transition_duration)
+                else:
+                    scene_clips = clips
+                    if self.transitions.style == 'fade':
+                        scene_clips = self.add_transitions(clips, transition_duration=transition_duration)
+                    final_clip = concatenate_videoclips(scene_clips, method="compose")
             audio = AudioFileClip(str(voiceover_path))
             final_clip = final_clip.set_audio(audio)
-            final_clip.write_videofile(str(output_path), codec="libx264", audio_codec="aac")
+            final_clip.write_videofile(
+                str(output_path), fps=self.video_fps, codec="libx264", audio_codec="aac", preset=self._preset('medium')
+            )
+            audio.close()
+            if subtitle_texts:
+                self._add_subtitle_track(
+                    output_path, subtitle_texts, self._timeline_durations(scene_durations, transition_duration)
+                )
             return True
         except Exception as e:
             print(f"Error merging clips with voiceover: {e}")
             return False
+        finally:
+            for clip in clips:
+                try:
+                    clip.close()
+                except Exception:
+                    pass
     
 
-    def add_caption_to_video(input_video_path, output_video_path, caption_text, position=("center", "bottom"), font_size=40, font_color="white"):
-        """
-        Add a caption overlay to a video.
-        """
-        # Load video
-        video = VideoFileClip(str(input_video_path))
-
-        # Create text clip for the caption
-        txt_clip = (TextClip(caption_text, fontsize=font_size, color=font_color, font="Arial-Bold")
-                    .set_duration(video.duration)
-                    .set_position(position)
-                    .margin(bottom=30, opacity=0))
-
-        # Combine video + caption
-        final_clip = CompositeVideoClip([video, txt_clip])
+    def add_caption_to_video(self, input_video_path, output_video_path, caption_text, mode='soft'):
+        """Caption an existing video: 'soft' muxes a subtitle track without re-encoding, 'burn' draws it in one ffmpeg pass"""
+        metadata = self.media_probe.probe(input_video_path)
+        if not metadata or not metadata.get('duration'):
+            raise ValueError(f"Could not read duration of {input_video_path}")
+        
+        subtitles_path = write_webvtt(
+            build_cues([caption_text], [metadata['duration']]), Path(output_video_path).with_suffix('.vtt')
+        )
+        if mode == 'burn':
+            self._burn_subtitles(input_video_path, subtitles_path, output_video_path)
+        else:
+            self._mux_subtitles(input_video_path, subtitles_path, output_video_path)
+        return str(output_video_path)
 
-        # Export video
-        final_clip.write_videofile(str(output_video_path), codec="libx264", audio_codec="aac")
-    
 
-    
-    
\ No newline at end of file
+def _render_segment(spec, output_path, quality='final'):
+    """Render one scene to a normalized, video-only segment (runs in a worker process)"""
+    processor = VideoProcessor(quality)
+    clip = processor._build_scene_clip(spec, normalize=True)
+    try:
+        clip.write_videofile(
+            str(output_path),
+            fps=processor.video_fps,
+            codec=processor.video_codec,
+            audio=False,
+            # One set of H.264 settings for proxies and segments, so both come out in the output format
+            preset=processor._preset(ProxyCache.PRESET),
+            ffmpeg_params=ProxyCache.encoder_params(processor.video_fps),
+            logger=None
+        )
+        return clip.duration
+    finally:
+        clip.close()
@@ -0,0 +1,35 @@
+import hashlib
+import uuid
+from config import Config
+from utils.file_cache import FileCache
+
+class AudioCache(FileCache):
+    """Content-addressed cache of synthesized voiceovers with size-bounded LRU eviction"""
+
+    SUFFIX = '.mp3'
+    # Served files get their own inode: the mtime bump on every hit would otherwise change their ETag
+    HARDLINK = False
+    LABEL = 'voiceover cache'
+
+    def __init__(self, cache_dir=None, max_bytes=None):
+        super().__init__(cache_dir or Config.TTS_CACHE_DIR, max_bytes or Config.TTS_CACHE_MAX_BYTES)
+
+    def key(self, text, language, slow, backend, variant=None):
+        """Address of a voiceover: everything that changes the synthesized audio.
+
+        variant separates audio of the same text made a different way (e.g. joined from sentence chunks).
+        """
+        raw = "\0".join([backend, language, str(bool(slow)), text] + ([variant] if variant else []))
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def fetch(self, key, output_path):
+        """Copy a cached voiceover to output_path; returns False on a miss"""
+        return self._fetch_entry(key, output_path)
+
+    def temp_path(self):
+        """Scratch file to synthesize into before it is stored"""
+        return self.cache_dir / f"{uuid.uuid4().hex}.part.mp3"
+
+    def store(self, key, synthesized_path, output_path):
+        """Move a freshly synthesized file into the cache and copy it to output_path"""
+        self._store_entry(key, synthesized_path, output_path)
@@ -0,0 +1,30 @@
+import hashlib
+from config import Config
+from utils.file_cache import FileCache
+
+class DownloadCache(FileCache):
+    """URL-keyed cache of downloaded stock clips with size-bounded LRU eviction"""
+
+    SUFFIX = '.mp4'
+    LABEL = 'download cache'
+
+    def __init__(self, cache_dir=None, max_bytes=None):
+        super().__init__(cache_dir or Config.STOCK_CACHE_DIR, max_bytes or Config.STOCK_CACHE_MAX_BYTES)
+
+    def key(self, url):
+        return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+    def entry_path(self, url):
+        return self._entry_path(self.key(url))
+
+    def part_path(self, url):
+        """Partial download kept between attempts so a retry can resume it (evicted once stale)"""
+        return self.cache_dir / f"{self.key(url)}.part"
+
+    def fetch(self, url, output_path):
+        """Link a cached download to output_path; returns False on a miss"""
+        return self._fetch_entry(self.key(url), output_path)
+
+    def store(self, url, output_path):
+        """Promote a finished partial download into the cache and link it to output_path"""
+        self._store_entry(self.key(url), self.part_path(url), output_path)
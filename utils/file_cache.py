@@ -0,0 +1,52 @@
+import os
+import threading
+from config import Config
+from utils.file_utils import link_or_copy, evict_lru
+
+class FileCache:
+    """Directory of files addressed by key, handed out by link or copy, with size-bounded LRU eviction"""
+
+    SUFFIX = ''
+    HARDLINK = True  # False gives callers their own copy (for files that are served, see AudioCache)
+    LABEL = 'file cache'
+
+    def __init__(self, cache_dir, max_bytes):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _entry_path(self, key):
+        return self.cache_dir / f"{key}{self.SUFFIX}"
+
+    def _fetch_entry(self, key, output_path):
+        """Put the entry for key at output_path; returns False on a miss"""
+        entry_path = self._entry_path(key)
+        try:
+            with self._lock:
+                if not entry_path.exists():
+                    self.misses += 1
+                    return False
+                # Bump mtime so eviction treats it as recently used
+                os.utime(entry_path)
+                self.hits += 1
+            link_or_copy(entry_path, output_path, hardlink=self.HARDLINK)
+            return True
+        except OSError as e:
+            print(f"Error reading {self.LABEL}: {e}")
+            return False
+
+    def _store_entry(self, key, finished_path, output_path):
+        """Move a finished file in as the entry for key, put it at output_path and evict down to size"""
+        entry_path = self._entry_path(key)
+        os.replace(finished_path, entry_path)
+        link_or_copy(entry_path, output_path, hardlink=self.HARDLINK)
+        with self._lock:
+            evict_lru(self.cache_dir, self.max_bytes, stale_after=Config.STALE_PART_SECONDS)
+
+    def stats(self):
+        """Hit and miss counters"""
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses}
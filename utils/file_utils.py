@@ -0,0 +1,68 @@
+import os
+import shutil
+import time
+
+# Linux ioctl for copy-on-write clones (btrfs, XFS with reflink, overlayfs on those)
+FICLONE = 0x40049409
+
+def link_or_copy(source_path, output_path, hardlink=True):
+    """Hardlink, reflink or (as a last resort) copy a file; returns the method used.
+
+    hardlink=False gives output_path its own inode, so touching the source later doesn't change it.
+    """
+    source_path = str(source_path)
+    output_path = str(output_path)
+    if os.path.lexists(output_path):
+        os.remove(output_path)
+
+    if hardlink:
+        try:
+            os.link(source_path, output_path)
+            return 'hardlink'
+        except OSError:
+            pass
+
+    try:
+        import fcntl
+        with open(source_path, 'rb') as src, open(output_path, 'wb') as dst:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        shutil.copystat(source_path, output_path)
+        return 'reflink'
+    except (OSError, ImportError):
+        if os.path.exists(output_path):
+            os.remove(output_path)
+
+    shutil.copy2(source_path, output_path)
+    return 'copy'
+
+
+def evict_lru(directory, max_bytes, skip_suffix='.part', stale_after=None):
+    """Delete least recently modified files in a directory until it fits max_bytes.
+
+    Names containing skip_suffix are in-progress writes and are kept, unless untouched for
+    stale_after seconds: those were abandoned and are deleted.
+    """
+    now = time.time()
+    entries = []
+    for entry in os.scandir(directory):
+        if not entry.is_file():
+            continue
+        try:
+            stat = entry.stat()
+            if skip_suffix not in entry.name:
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+            elif stale_after is not None and now - stat.st_mtime > stale_after:
+                os.remove(entry.path)
+        except OSError:
+            pass
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+            total -= size
+        except OSError:
+            pass
+    return total
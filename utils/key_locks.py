@@ -0,0 +1,28 @@
+import threading
+from contextlib import contextmanager
+
+class KeyLocks:
+    """One lock per key, created on first use and forgotten once no caller holds or waits on it"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}  # key -> [lock, callers holding or waiting on it]
+
+    @contextmanager
+    def hold(self, key):
+        """Hold the lock for key; callers using the same key run one at a time"""
+        with self._lock:
+            entry = self._entries.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._entries[key]
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
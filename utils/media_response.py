@@ -0,0 +1,47 @@
+from pathlib import Path
+from flask import Response, send_file
+from config import Config
+
+def send_media(path, mimetype=None, as_attachment=False, download_name=None, max_age=None):
+    """Response for a file under OUTPUTS_DIR, served by Flask or handed to the front proxy.
+
+    Flask responses are conditional (ETag from mtime and size, Last-Modified, 304) and honor
+    Range requests for seeking. With MEDIA_OFFLOAD set, only headers are sent and nginx
+    (X-Accel-Redirect) or Apache/lighttpd (X-Sendfile) streams the bytes.
+    """
+    path = Path(path)
+    max_age = Config.MEDIA_CACHE_MAX_AGE if max_age is None else max_age
+    if Config.MEDIA_OFFLOAD in ('x-accel', 'x-sendfile'):
+        return _offload_response(path, mimetype, as_attachment, download_name, max_age)
+
+    return send_file(
+        path,
+        mimetype=mimetype,
+        as_attachment=as_attachment,
+        download_name=download_name,
+        conditional=True,
+        etag=True,
+        max_age=max_age
+    )
+
+def _offload_response(path, mimetype, as_attachment, download_name, max_age):
+    """Empty response whose header tells the front proxy which file to send"""
+    if not path.is_file():
+        raise FileNotFoundError(path)
+
+    response = Response(mimetype=mimetype or 'application/octet-stream')
+    if Config.MEDIA_OFFLOAD == 'x-accel':
+        # Internal nginx location aliased to OUTPUTS_DIR
+        relative = path.resolve().relative_to(Config.OUTPUTS_DIR.resolve()).as_posix()
+        response.headers['X-Accel-Redirect'] = Config.MEDIA_ACCEL_PREFIX.rstrip('/') + '/' + relative
+    else:
+        response.headers['X-Sendfile'] = str(path.resolve())
+
+    if as_attachment:
+        response.headers['Content-Disposition'] = f'attachment; filename="{download_name or path.name}"'
+    if max_age:
+        response.cache_control.public = True
+        response.cache_control.max_age = max_age
+    else:
+        response.cache_control.no_cache = True
+    return response
@@ -0,0 +1,108 @@
+import copy
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+
+class MemoCache:
+    """Two-tier memoization cache: in-process LRU backed by an optional SQLite store"""
+
+    def __init__(self, max_entries, db_path=None, table='memo'):
+        self.max_entries = max_entries
+        self.db_path = db_path
+        self.table = table
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        if self.db_path:
+            self._init_disk()
+
+    def _connect(self):
+        """Open a short-lived connection to the disk tier"""
+        return sqlite3.connect(str(self.db_path), timeout=30)
+
+    def _init_disk(self):
+        """Create the disk table if it doesn't exist"""
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        connection = self._connect()
+        try:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(f"CREATE TABLE IF NOT EXISTS {self.table} (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            connection.commit()
+        finally:
+            connection.close()
+
+    def get(self, key):
+        """Get a cached value (memory first, then disk), or None on a miss"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+                # Callers may mutate what they get back; keep the cached copy intact
+                return copy.deepcopy(self._entries[key])
+
+        value = self._disk_get(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._remember(key, copy.deepcopy(value))
+        return value
+
+    def put(self, key, value):
+        """Store a JSON-serializable value in both tiers"""
+        with self._lock:
+            self._remember(key, copy.deepcopy(value))
+        self._disk_put(key, value)
+
+    def _remember(self, key, value):
+        """Insert into the LRU and evict the oldest entries (lock held)"""
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _disk_get(self, key):
+        if not self.db_path:
+            return None
+        try:
+            connection = self._connect()
+            try:
+                row = connection.execute(f"SELECT value FROM {self.table} WHERE key = ?", (key,)).fetchone()
+            finally:
+                connection.close()
+            return json.loads(row[0]) if row else None
+        except Exception as e:
+            print(f"Error reading memo cache: {e}")
+            return None
+
+    def _disk_put(self, key, value):
+        if not self.db_path:
+            return
+        try:
+            connection = self._connect()
+            try:
+                connection.execute(
+                    f"INSERT OR REPLACE INTO {self.table} (key, value) VALUES (?, ?)",
+                    (key, json.dumps(value))
+                )
+                connection.commit()
+            finally:
+                connection.close()
+        except Exception as e:
+            print(f"Error writing memo cache: {e}")
+
+    def stats(self):
+        """Hit and miss counters"""
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0
+            }
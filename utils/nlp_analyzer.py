@@ -1,39 +1,79 @@
+import hashlib
 import spacy
 import subprocess
 from config import Config
+from utils.memo_cache import MemoCache
 
 class NLPAnalyzer:
     """Natural Language Processing analyzer for script analysis"""
     
     def __init__(self):
         self.nlp = self._load_spacy_model()
+        self.cache = MemoCache(
+            Config.NLP_CACHE_SIZE,
+            db_path=Config.NLP_CACHE_PATH if Config.NLP_DISK_CACHE else None,
+            table='keyword_analysis'
+        )
     
     def _load_spacy_model(self):
         """Load spaCy model, download if not available"""
+        # Keyword extraction only needs POS tags, lemmas, sentences and noun chunks
+        disabled = Config.SPACY_DISABLED_COMPONENTS
         try:
-            return spacy.load(Config.SPACY_MODEL)
+            return spacy.load(Config.SPACY_MODEL, disable=disabled)
         except OSError:
             print(f"Downloading spaCy model: {Config.SPACY_MODEL}")
             subprocess.run(["python", "-m", "spacy", "download", Config.SPACY_MODEL])
-            return spacy.load(Config.SPACY_MODEL)
+            return spacy.load(Config.SPACY_MODEL, disable=disabled)
+    
+    def _cache_key(self, kind, text):
+        """Key on the whitespace-normalized text plus everything that changes the result"""
+        normalized = " ".join(text.split())
+        raw = "\0".join([kind, Config.SPACY_MODEL, str(Config.MAX_KEYWORDS_PER_SENTENCE), normalized])
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
     
     def analyze_script(self, script):
         """Analyze script and extract keywords from each sentence"""
-        doc = self.nlp(script)
-        sentences = [sent.text.strip() for sent in doc.sents if sent.text.strip()]
+        return self.analyze_scripts([script])[0]
+    
+    def analyze_scripts(self, scripts, n_process=None, batch_size=None):
+        """Analyze many scripts in one batched nlp.pipe pass; returns one analysis per script"""
+        results = [None] * len(scripts)
+        misses = []
+        for i, script in enumerate(scripts):
+            cached = self.cache.get(self._cache_key('analysis', script))
+            if cached is None:
+                misses.append(i)
+            else:
+                results[i] = cached
+        
+        if misses:
+            docs = self.nlp.pipe(
+                [scripts[i] for i in misses],
+                n_process=n_process or Config.SPACY_N_PROCESS,
+                batch_size=batch_size or Config.SPACY_BATCH_SIZE
+            )
+            for i, doc in zip(misses, docs):
+                results[i] = self._analyze_doc(doc)
+                # Only the whole script is cached: its sentences were parsed in context, which can
+                # tag and chunk them differently from the same sentence analyzed on its own
+                self.cache.put(self._cache_key('analysis', scripts[i]), results[i])
         
+        return results
+    
+    def _analyze_doc(self, doc):
+        """Extract keywords per sentence from an already parsed doc"""
         analysis = []
-        for sentence in sentences:
-            sent_doc = self.nlp(sentence)
+        for sent in doc.sents:
+            sentence = sent.text.strip()
+            if not sentence:
+                continue
             
             # Extract nouns, verbs, and adjectives as keywords
-            keywords = []
-            for token in sent_doc:
-                if token.pos_ in ['NOUN', 'VERB', 'ADJ'] and not token.is_stop:
-                    keywords.append(token.lemma_.lower())
+            keywords = self._token_keywords(sent)
             
             # Also extract noun phrases
-            noun_phrases = [chunk.text.lower() for chunk in sent_doc.noun_chunks]
+            noun_phrases = [chunk.text.lower() for chunk in sent.noun_chunks]
             
             # Combine and deduplicate
             all_keywords = list(set(keywords + noun_phrases))
@@ -45,13 +85,23 @@ class NLPAnalyzer:
         
         return analysis
     
-    def extract_keywords(self, text):
-        """Extract keywords from a single text"""
-        doc = self.nlp(text)
+    def _token_keywords(self, tokens):
+        """Lemmas of non-stopword nouns, verbs and adjectives"""
         keywords = []
-        
-        for token in doc:
+        for token in tokens:
             if token.pos_ in ['NOUN', 'VERB', 'ADJ'] and not token.is_stop:
                 keywords.append(token.lemma_.lower())
-        
-        return list(set(keywords)) 
\ No newline at end of file
+        return keywords
+    
+    def extract_keywords(self, text):
+        """Extract keywords from a single text"""
+        key = self._cache_key('keywords', text)
+        keywords = self.cache.get(key)
+        if keywords is None:
+            keywords = list(set(self._token_keywords(self.nlp(text))))
+            self.cache.put(key, keywords)
+        return keywords
+    
+    def cache_stats(self):
+        """Hit and miss counters of the keyword analysis cache"""
+        return self.cache.stats()
@@ -0,0 +1,41 @@
+import threading
+import time
+
+class TokenBucket:
+    """Thread-safe token bucket: a steady request rate with bursts up to capacity"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate  # tokens per second; <= 0 disables throttling
+        self.capacity = max(capacity, 1)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a request may go out; returns the seconds spent waiting"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self.blocked_until and (self.rate <= 0 or self.tokens >= 1):
+                    if self.rate > 0:
+                        self.tokens -= 1
+                    return waited
+                wait = self.blocked_until - now
+                if self.rate > 0:
+                    wait = max(wait, (1 - self.tokens) / self.rate)
+            time.sleep(wait)
+            waited += wait
+
+    def pause(self, seconds):
+        """Hold every caller back for a while, e.g. until the server's rate-limit window resets"""
+        with self._lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+            self.tokens = 0.0
+
+    def _refill(self, now):
+        if self.rate > 0:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
@@ -0,0 +1,29 @@
+def build_cues(texts, durations):
+    """Timed cues for consecutive scenes: [{'start', 'end', 'text'}, ...]"""
+    cues = []
+    start = 0.0
+    for text, duration in zip(texts, durations):
+        end = start + duration
+        if text and text.strip():
+            cues.append({'start': start, 'end': end, 'text': text.strip()})
+        start = end
+    return cues
+
+def format_timestamp(seconds):
+    """WebVTT timestamp, e.g. 00:01:02.345"""
+    milliseconds = int(round(seconds * 1000))
+    hours, milliseconds = divmod(milliseconds, 3600 * 1000)
+    minutes, milliseconds = divmod(milliseconds, 60 * 1000)
+    seconds, milliseconds = divmod(milliseconds, 1000)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}.{milliseconds:03d}"
+
+def write_webvtt(cues, output_path):
+    """Write cues as a WebVTT file (also readable by ffmpeg for mov_text muxing)"""
+    lines = ['WEBVTT', '']
+    for index, cue in enumerate(cues, start=1):
+        # A blank line ends a cue, so collapse line breaks inside the text
+        text = ' '.join(cue['text'].split())
+        lines += [str(index), f"{format_timestamp(cue['start'])} --> {format_timestamp(cue['end'])}", text, '']
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lines))
+    return output_path
@@ -0,0 +1,108 @@
+import threading
+from collections import OrderedDict
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+from config import Config
+
+class TextRenderer:
+    """Renders static text once to an RGBA array and keeps recent renders in an LRU"""
+
+    def __init__(self, max_entries=None):
+        self.max_entries = max_entries or Config.TEXT_CACHE_SIZE
+        self._renders = OrderedDict()
+        self._fonts = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, text, font=None, size=40, color='white', max_width=None):
+        """RGBA uint8 array of the text, wrapped to max_width pixels (read-only, shared between callers)"""
+        font = font or Config.CAPTION_FONT
+        key = (text, font, size, color, max_width)
+        with self._lock:
+            if key in self._renders:
+                self._renders.move_to_end(key)
+                self.hits += 1
+                return self._renders[key]
+            self.misses += 1
+
+        image = self._draw(text, self._load_font(font, size), color, max_width)
+        image.setflags(write=False)
+        with self._lock:
+            self._renders[key] = image
+            while len(self._renders) > self.max_entries:
+                self._renders.popitem(last=False)
+        return image
+
+    def stats(self):
+        """Hit and miss counters plus current size"""
+        with self._lock:
+            return {'entries': len(self._renders), 'hits': self.hits, 'misses': self.misses}
+
+    def _load_font(self, font, size):
+        """TrueType font by name or path, falling back to PIL's built-in font"""
+        key = (font, size)
+        if key not in self._fonts:
+            try:
+                self._fonts[key] = ImageFont.truetype(font, size)
+            except OSError:
+                try:
+                    self._fonts[key] = ImageFont.load_default(size=size)
+                except TypeError:
+                    # Pillow < 10.1 has only the fixed-size bitmap font
+                    self._fonts[key] = ImageFont.load_default()
+        return self._fonts[key]
+
+    def _draw(self, text, font, color, max_width):
+        """Draw centered, word-wrapped lines on a transparent canvas"""
+        measure = ImageDraw.Draw(Image.new('RGBA', (1, 1)))
+        lines = self._wrap(text, font, max_width, measure)
+        line_boxes = [measure.textbbox((0, 0), line or ' ', font=font) for line in lines]
+        line_height = max(box[3] for box in line_boxes) + 4
+        width = max(box[2] for box in line_boxes) + 8
+        height = line_height * len(lines) + 4
+
+        image = Image.new('RGBA', (width, height), (0, 0, 0, 0))
+        draw = ImageDraw.Draw(image)
+        for i, (line, box) in enumerate(zip(lines, line_boxes)):
+            draw.text(((width - box[2]) // 2, 2 + i * line_height), line, font=font, fill=color)
+        return np.asarray(image)
+
+    def _wrap(self, text, font, max_width, measure):
+        """Greedy word wrap by rendered width"""
+        if not max_width:
+            return text.splitlines() or ['']
+
+        lines = []
+        for paragraph in text.splitlines() or ['']:
+            current = ''
+            for word in paragraph.split():
+                candidate = f"{current} {word}".strip()
+                if not current or measure.textlength(candidate, font=font) <= max_width:
+                    current = candidate
+                else:
+                    lines.append(current)
+                    current = word
+            lines.append(current)
+        return lines
+
+def prepare_overlay(rgba):
+    """Split an RGBA render into premultiplied color and inverse alpha, computed once per overlay"""
+    alpha = rgba[:, :, 3:4].astype(np.float32) / 255.0
+    return rgba[:, :, :3].astype(np.float32) * alpha, 1.0 - alpha
+
+def blend_overlay(frame, overlay, x, y):
+    """Alpha-composite a prepared overlay onto a frame at (x, y) with whole-array ops"""
+    premultiplied, inverse_alpha = overlay
+    x, y = max(int(x), 0), max(int(y), 0)
+    height = min(inverse_alpha.shape[0], frame.shape[0] - y)
+    width = min(inverse_alpha.shape[1], frame.shape[1] - x)
+    if height <= 0 or width <= 0:
+        return frame
+
+    # Decoded frames may be read-only views, so write into a copy
+    output = np.array(frame, dtype=np.uint8, copy=True)
+    region = output[y:y + height, x:x + width].astype(np.float32)
+    blended = premultiplied[:height, :width] + region * inverse_alpha[:height, :width]
+    output[y:y + height, x:x + width] = blended.astype(np.uint8)
+    return output
@@ -0,0 +1,93 @@
+import shutil
+import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from pydub import AudioSegment
+from pydub.generators import Sine
+from config import Config
+
+def estimate_speech_seconds(text):
+    """Rough spoken length of text at a normal speaking rate"""
+    return max(len(text) / Config.TTS_CHARS_PER_SECOND, 0.5)
+
+class TTSBackend:
+    """Interface for speech synthesizers used by TTSGenerator"""
+
+    name = 'base'
+    concurrent = False  # Whether batch items may be synthesized in parallel
+
+    def synthesize(self, text, output_path, language, slow):
+        """Synthesize text to an MP3 file, raising on failure"""
+        raise NotImplementedError
+
+    def synthesize_batch(self, texts, output_paths, language, slow):
+        """Synthesize several texts; raises the first failure"""
+        if not self.concurrent or len(texts) <= 1:
+            for text, output_path in zip(texts, output_paths):
+                self.synthesize(text, output_path, language, slow)
+            return
+
+        with ThreadPoolExecutor(max_workers=Config.TTS_MAX_WORKERS) as pool:
+            futures = [
+                pool.submit(self.synthesize, text, output_path, language, slow)
+                for text, output_path in zip(texts, output_paths)
+            ]
+            for future in futures:
+                future.result()
+
+class GTTSBackend(TTSBackend):
+    """Google TTS over the network"""
+
+    name = 'gtts'
+    concurrent = True  # Requests are latency-bound, so overlap them
+
+    def synthesize(self, text, output_path, language, slow):
+        from gtts import gTTS
+        tts = gTTS(text=text, lang=language, slow=slow)
+        tts.save(str(output_path))
+
+class LocalBackend(TTSBackend):
+    """Offline synthesis with the espeak-ng (or espeak) command-line engine"""
+
+    name = 'local'
+    concurrent = True  # Each espeak call is its own process
+
+    def __init__(self):
+        self.binary = shutil.which('espeak-ng') or shutil.which('espeak')
+
+    def synthesize(self, text, output_path, language, slow):
+        if not self.binary:
+            raise RuntimeError("espeak-ng is not installed")
+        words_per_minute = 120 if slow else 170
+        with tempfile.TemporaryDirectory() as work_dir:
+            wav_path = Path(work_dir) / "speech.wav"
+            # Text goes in on stdin so it can never be read as an option
+            subprocess.run(
+                [self.binary, '-v', language, '-s', str(words_per_minute), '-w', str(wav_path), '--stdin'],
+                input=text.encode('utf-8'), check=True, capture_output=True
+            )
+            AudioSegment.from_wav(str(wav_path)).export(str(output_path), format='mp3')
+
+class StubBackend(TTSBackend):
+    """Deterministic tone whose length follows the text; for CI and benchmarks"""
+
+    name = 'stub'
+
+    def synthesize(self, text, output_path, language, slow):
+        duration_ms = int(estimate_speech_seconds(text) * 1000 * (1.5 if slow else 1.0))
+        tone = Sine(220).to_audio_segment(duration=duration_ms, volume=-30.0)
+        tone.export(str(output_path), format='mp3')
+
+TTS_BACKENDS = {
+    GTTSBackend.name: GTTSBackend,
+    LocalBackend.name: LocalBackend,
+    StubBackend.name: StubBackend
+}
+
+def create_tts_backend(name=None):
+    """Instantiate a backend by name (defaults to Config.TTS_BACKEND)"""
+    name = name or Config.TTS_BACKEND
+    if name not in TTS_BACKENDS:
+        raise ValueError(f"Unknown TTS backend '{name}', expected one of {sorted(TTS_BACKENDS)}")
+    return TTS_BACKENDS[name]()
@@ -1,54 +1,205 @@
-from gtts import gTTS
+from pydub import AudioSegment
 import os
+import re
+import shutil
+import uuid
+from config import Config
+from utils.audio_cache import AudioCache
+from utils.tts_backends import create_tts_backend, estimate_speech_seconds
+
+# Sentence ends (. ! ?) and clause breaks used to chunk long scripts
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+')
+CLAUSE_BOUNDARY = re.compile(r'(?<=[,;:])\s+')
 
 class TTSGenerator:
-    """Text-to-Speech generator using Google TTS"""
+    """Text-to-Speech generator with a pluggable synthesis backend (gTTS, local engine or stub)"""
     
-    def __init__(self, language='en', slow=False):
+    def __init__(self, language='en', slow=False, backend=None):
         self.language = language
         self.slow = slow
+        self.backend = backend or create_tts_backend()
+        self.backend_name = self.backend.name
+        self.audio_cache = AudioCache() if Config.USE_TTS_CACHE else None
     
     def generate_voiceover(self, script, output_path):
-        """Generate voiceover using gTTS"""
+        """Generate voiceover with the configured backend"""
         try:
+            # Identical text, language and speed reuse the cached audio
+            if self._fetch_cached(script, output_path, self.language, self.slow):
+                return True
+            
             # Split long scripts into smaller chunks to avoid API limits
-            max_chunk_length = 500  # Google TTS has limits
-            if len(script) > max_chunk_length:
+            if len(script) > Config.TTS_MAX_CHUNK_LENGTH:
                 return self._generate_voiceover_chunked(script, output_path)
             
-            tts = gTTS(text=script, lang=self.language, slow=self.slow)
-            tts.save(str(output_path))
+            self._synthesize_cached(script, output_path, self.language, self.slow)
             return True
         except Exception as e:
             print(f"Error generating voiceover: {e}")
             # Create a silent audio file as fallback
-            return self._create_silent_audio(output_path)
+            return self._create_silent_audio(output_path, estimate_speech_seconds(script))
+    
+    def _synthesize(self, text, output_path, language, slow):
+        """Synthesize text to an MP3 file"""
+        self.backend.synthesize(text, output_path, language, slow)
+    
+    def _fetch_cached(self, text, output_path, language, slow):
+        """Link a cached voiceover to output_path; returns False on a miss or with the cache off"""
+        if not self.audio_cache:
+            return False
+        key = self.audio_cache.key(text, language, slow, self.backend_name)
+        return self.audio_cache.fetch(key, output_path)
+    
+    def _synthesize_cached(self, text, output_path, language, slow):
+        """Synthesize text and store the result in the voiceover cache"""
+        if not self.audio_cache:
+            self._synthesize(text, output_path, language, slow)
+            return
+        
+        # Synthesize into the cache first so output_path is never a half-written shared file
+        temp_path = self.audio_cache.temp_path()
+        try:
+            self._synthesize(text, temp_path, language, slow)
+            key = self.audio_cache.key(text, language, slow, self.backend_name)
+            self.audio_cache.store(key, temp_path, output_path)
+        finally:
+            if temp_path.exists():
+                temp_path.unlink()
     
     def _generate_voiceover_chunked(self, script, output_path):
         """Generate voiceover for long scripts by splitting into chunks"""
         try:
-            # For now, just try to generate the full script
-            # If it fails, create silent audio
-            try:
-                tts = gTTS(text=script, lang=self.language, slow=self.slow)
-                tts.save(str(output_path))
+            result = self.generate_voiceover_with_timing(script, output_path)
+            if result['success']:
                 return True
-            except Exception as e:
-                print(f"Error generating full voiceover: {e}")
-                return self._create_silent_audio(output_path)
-                
+            print(f"Error generating chunked voiceover: {result['error']}")
+            return self._create_silent_audio(output_path, estimate_speech_seconds(script))
         except Exception as e:
             print(f"Error in chunked voiceover generation: {e}")
-            return self._create_silent_audio(output_path)
+            return self._create_silent_audio(output_path, estimate_speech_seconds(script))
     
-    def _create_silent_audio(self, output_path):
+    def generate_voiceover_with_timing(self, script, output_path):
+        """Synthesize sentence chunks in parallel, join them in order and map each sentence's time span"""
+        try:
+            sentences = self._split_sentences(script)
+            if not sentences:
+                raise ValueError("Script has no text to synthesize")
+            
+            # One or more chunks per sentence, each within the backend's length limit
+            chunks = []
+            for sentence_index, sentence in enumerate(sentences):
+                for piece in self._split_long_text(sentence, Config.TTS_MAX_CHUNK_LENGTH):
+                    chunks.append((sentence_index, piece))
+            
+            work_dir = Config.TEMP_DIR / f"tts_{uuid.uuid4().hex}"
+            work_dir.mkdir(parents=True, exist_ok=True)
+            try:
+                chunk_paths = [work_dir / f"chunk_{i:04d}.mp3" for i in range(len(chunks))]
+                self._synthesize_chunks([text for _, text in chunks], chunk_paths)
+                
+                # Join in script order and record where each sentence lands
+                combined = AudioSegment.empty()
+                spans = {}
+                for (sentence_index, _), path in zip(chunks, chunk_paths):
+                    start = len(combined)
+                    combined += AudioSegment.from_file(str(path), format='mp3')
+                    span_start = spans.get(sentence_index, (start, None))[0]
+                    spans[sentence_index] = (span_start, len(combined))
+                
+                if len(chunks) == 1:
+                    self._place_file(chunk_paths[0], script, output_path)
+                else:
+                    joined_path = work_dir / "joined.mp3"
+                    combined.export(str(joined_path), format='mp3')
+                    self._place_file(joined_path, script, output_path)
+            finally:
+                shutil.rmtree(work_dir, ignore_errors=True)
+            
+            timings = [
+                {
+                    'sentence': sentence,
+                    'start': spans[i][0] / 1000.0,
+                    'end': spans[i][1] / 1000.0
+                }
+                for i, sentence in enumerate(sentences)
+            ]
+            return {
+                'success': True,
+                'file_path': str(output_path),
+                'duration': len(combined) / 1000.0,
+                'timings': timings
+            }
+        except Exception as e:
+            print(f"Error generating timed voiceover: {e}")
+            return {'success': False, 'error': str(e)}
+    
+    def _synthesize_chunks(self, texts, chunk_paths):
+        """Reuse cached chunks and synthesize the rest in one backend batch"""
+        missing = [
+            (text, chunk_path) for text, chunk_path in zip(texts, chunk_paths)
+            if not self._fetch_cached(text, chunk_path, self.language, self.slow)
+        ]
+        if not missing:
+            return
+        
+        if not self.audio_cache:
+            self.backend.synthesize_batch(
+                [text for text, _ in missing], [path for _, path in missing], self.language, self.slow
+            )
+            return
+        
+        temp_paths = [self.audio_cache.temp_path() for _ in missing]
+        try:
+            self.backend.synthesize_batch([text for text, _ in missing], temp_paths, self.language, self.slow)
+            for (text, chunk_path), temp_path in zip(missing, temp_paths):
+                key = self.audio_cache.key(text, self.language, self.slow, self.backend_name)
+                self.audio_cache.store(key, temp_path, chunk_path)
+        finally:
+            for temp_path in temp_paths:
+                if temp_path.exists():
+                    temp_path.unlink()
+    
+    def _place_file(self, audio_path, script, output_path):
+        """Put finished audio at output_path, caching it under the whole script"""
+        if self.audio_cache:
+            # Joined from sentence chunks, so it must not be served as the whole-script synthesis (or vice versa)
+            key = self.audio_cache.key(script, self.language, self.slow, self.backend_name, variant='timed')
+            cache_temp = self.audio_cache.temp_path()
+            shutil.copyfile(audio_path, cache_temp)
+            self.audio_cache.store(key, cache_temp, output_path)
+        else:
+            shutil.copyfile(audio_path, output_path)
+    
+    def _split_sentences(self, script):
+        """Split text on sentence-ending punctuation"""
+        return [s.strip() for s in SENTENCE_BOUNDARY.split(script) if s.strip()]
+    
+    def _split_long_text(self, text, max_length):
+        """Break text longer than max_length at clause, then word, boundaries"""
+        if len(text) <= max_length:
+            return [text]
+        
+        pieces = []
+        current = ''
+        for part in CLAUSE_BOUNDARY.split(text):
+            words = [part] if len(part) <= max_length else part.split()
+            for word in words:
+                candidate = f"{current} {word}".strip()
+                if len(candidate) <= max_length or not current:
+                    current = candidate
+                else:
+                    pieces.append(current)
+                    current = word
+        if current:
+            pieces.append(current)
+        return pieces
+    
+    def _create_silent_audio(self, output_path, duration=1.0):
         """Create a silent audio file as fallback"""
         try:
-            # Create a simple empty file as fallback
-            with open(str(output_path), 'wb') as f:
-                # Write minimal MP3 header
-                f.write(b'\xff\xfb\x90\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00')
-            print(f"Created minimal audio fallback at {output_path}")
+            silence = AudioSegment.silent(duration=int(duration * 1000))
+            silence.export(str(output_path), format='mp3')
+            print(f"Created {duration:.1f}s silent audio fallback at {output_path}")
             return True
         except Exception as e:
             print(f"Error creating silent audio: {e}")
@@ -61,8 +212,9 @@ class TTSGenerator:
             language = kwargs.get('language', self.language)
             slow = kwargs.get('slow', self.slow)
             
-            tts = gTTS(text=script, lang=language, slow=slow)
-            tts.save(str(output_path))
+            cached = self._fetch_cached(script, output_path, language, slow)
+            if not cached:
+                self._synthesize_cached(script, output_path, language, slow)
             
             # Return metadata about the generated audio
             return {
@@ -70,8 +222,13 @@ class TTSGenerator:
                 'file_path': str(output_path),
                 'language': language,
                 'text_length': len(script),
-                'file_size': os.path.getsize(str(output_path)) if os.path.exists(str(output_path)) else 0
+                'file_size': os.path.getsize(str(output_path)) if os.path.exists(str(output_path)) else 0,
+                'cached': cached
             }
         except Exception as e:
             print(f"Error generating voiceover: {e}")
-            return {'success': False, 'error': str(e)} 
\ No newline at end of file
+            return {'success': False, 'error': str(e)}
+    
+    def cache_stats(self):
+        """Hit and miss counters of the voiceover cache"""
+        return self.audio_cache.stats() if self.audio_cache else {}